@@ -0,0 +1,264 @@
+# batch_prompts.py — pembuatan prompt massal tanpa UI (output JSONL, bisa dilanjutkan)
+#
+# Contoh:
+#   python batch_prompts.py --presets --styles all -o presets.jsonl
+#   python batch_prompts.py --themes tema.csv --styles 0,3 -o tema.jsonl -j 4
+#   python batch_prompts.py --presets --variations 50 -o variasi.jsonl
+#   GEMINI_API_KEYS=k1,k2,k3 python batch_prompts.py --presets -o presets.jsonl -j 12
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from hashlib import sha1
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+
+from gemini_router import POLICIES, parse_models, router
+from gemini_scheduler import PRIORITY_BACKGROUND, scheduler
+from preset_library import get_preset_library
+from theme_cache import get_theme_cache
+import telemetry
+from prompt_core import (
+    FIELD_KEYS, STYLE_PRESETS, _call_gemini, build_export_payload,
+    PACK_SIZE, build_theme_prompt, compose_many, compose_prompt, compose_prompt_localized, parse_sections,
+    prewarm_section_cache, translate_fields_to_english,
+)
+from variations import MAX_VARIATIONS, generate_variations, render_variations
+
+DEFAULT_MODEL = "gemini-1.5-flash-8b"
+
+
+def load_themes(path: str) -> List[str]:
+    """Baca tema dari .csv (kolom 'theme'/'tema' atau kolom pertama), .jsonl, atau teks per baris."""
+    themes: List[str] = []
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            rows = list(csv.reader(f))
+            col = 0
+            header = [h.strip().lower() for h in rows[0]] if rows else []
+            for name in ("theme", "tema"):
+                if name in header:
+                    col = header.index(name)
+                    rows = rows[1:]
+                    break
+            themes = [r[col] for r in rows if len(r) > col]
+        elif path.endswith(".jsonl"):
+            for line in f:
+                if line.strip():
+                    obj = json.loads(line)
+                    themes.append(obj if isinstance(obj, str) else obj.get("theme") or obj.get("tema") or "")
+        else:
+            themes = [line.rstrip("\n") for line in f]
+    return [t.strip() for t in themes if t and t.strip()]
+
+
+def parse_styles(spec: Optional[str]) -> List[str]:
+    """'all' = semua STYLE_PRESETS, '0,3' = indeks, kosong = tanpa bias gaya."""
+    if not spec:
+        return [""]
+    if spec == "all":
+        return list(STYLE_PRESETS)
+    return [STYLE_PRESETS[int(i)] for i in spec.split(",")]
+
+
+def job_id(kind: str, name: str, style: str) -> str:
+    return sha1(f"{kind}\x00{name}\x00{style}".encode("utf-8")).hexdigest()[:16]
+
+
+def iter_jobs(presets: bool, themes: List[str], styles: List[str]) -> Iterator[Dict[str, str]]:
+    for style in styles:
+        if presets:
+            for name in get_preset_library().presets:
+                yield {"id": job_id("preset", name, style), "preset": name, "style": style}
+        for theme in themes:
+            yield {"id": job_id("theme", theme, style), "theme": theme, "style": style}
+
+
+class Checkpoint:
+    """
+    File JSONL berisi tahap yang sudah selesai per job:
+      {"id": ..., "stage": "fields", "fields": {...}}  — hasil generate tema tersimpan
+      {"id": ..., "stage": "done"}                      — baris output sudah ditulis
+    Run yang terhenti dilanjutkan tanpa mengulang panggilan API yang sudah selesai.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.done: Set[str] = set()
+        self.fields: Dict[str, Dict[str, str]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # baris terakhir terpotong saat proses dihentikan
+                    if rec.get("stage") == "done":
+                        self.done.add(rec["id"])
+                    elif rec.get("stage") == "fields":
+                        self.fields[rec["id"]] = rec["fields"]
+        self._lock = threading.Lock()
+        self._f = open(path, "a", encoding="utf-8")
+
+    def record(self, rec: Dict) -> None:
+        with self._lock:
+            self._f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+            self._f.flush()
+
+    def close(self) -> None:
+        self._f.close()
+
+
+def build_fields(job: Dict[str, str], ckpt: Checkpoint, api_key: str, model: str,
+                 fresh_themes: bool = False) -> Dict[str, str]:
+    if "preset" in job:
+        fields = dict(get_preset_library().presets[job["preset"]])
+        if job["style"]:
+            fields["Style & Lighting"] = job["style"]
+        return fields
+    if job["id"] in ckpt.fields:
+        return ckpt.fields[job["id"]]
+    hit = None if fresh_themes else get_theme_cache().lookup(job["theme"], job["style"])
+    if hit is not None:
+        ckpt.record({"id": job["id"], "stage": "fields", "fields": hit.fields})
+        return hit.fields
+    generated = _call_gemini(build_theme_prompt(job["theme"], job["style"]), model, api_key,
+                             priority=PRIORITY_BACKGROUND)
+    sec = parse_sections(generated)
+    fields = {k: sec.get(k, "") for k in FIELD_KEYS}
+    if any(fields.values()):
+        get_theme_cache().put(job["theme"], job["style"], fields)
+    ckpt.record({"id": job["id"], "stage": "fields", "fields": fields})
+    return fields
+
+
+def run_job(job: Dict[str, str], ckpt: Checkpoint, api_key: str, model: str,
+            toggles: Dict[str, bool], text_id: Optional[str] = None,
+            fresh_themes: bool = False, n_variations: int = 0) -> Dict:
+    fields = build_fields(job, ckpt, api_key, model, fresh_themes)
+    warnings: List[str] = []
+    if text_id is None:
+        text_id = compose_prompt_localized(fields, toggles, lang="ID")
+    text_en = translate_fields_to_english(fields, toggles, api_key, model, warn=warnings.append)
+    if warnings:
+        raise Exception(warnings[0])
+    variations: List[Dict[str, str]] = []
+    if n_variations:
+        var = generate_variations(compose_prompt(fields, {}), n_variations, api_key, model,
+                                  base_fields=fields, priority=PRIORITY_BACKGROUND)
+        if not var.records and var.errors:
+            raise var.errors[0]
+        variations = var.records
+    payload = build_export_payload(fields, toggles, text_id, text_en,
+                                   variations_en=render_variations(variations, toggles),
+                                   variations=variations)
+    payload["job"] = job
+    return payload
+
+
+def run_batch(jobs: List[Dict[str, str]], out_path: str, ckpt_path: str, api_key: str, model: str,
+              toggles: Dict[str, bool], concurrency: int = 4,
+              pack_size: int = PACK_SIZE, fresh_themes: bool = False,
+              n_variations: int = 0) -> Tuple[int, int, int]:
+    """Kembalikan (berhasil, dilewati, gagal)."""
+    ckpt = Checkpoint(ckpt_path)
+    pending = [j for j in jobs if j["id"] not in ckpt.done]
+    skipped = len(jobs) - len(pending)
+    # Field yang sudah diketahui (preset, tema dari checkpoint): teks ID disusun
+    # sekaligus, dan terjemahannya berpaket dulu sehingga job di bawah cukup
+    # membaca cache per bagian.
+    known_jobs = [j for j in pending if "preset" in j or j["id"] in ckpt.fields]
+    known = [build_fields(j, ckpt, api_key, model) for j in known_jobs]
+    text_ids = dict(zip((j["id"] for j in known_jobs), compose_many(known, toggles, lang="ID")))
+    if pack_size > 1:
+        prewarm_section_cache(known, api_key, model, pack_size=pack_size)
+    ok = failed = 0
+    try:
+        with open(out_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+            futures = {pool.submit(run_job, j, ckpt, api_key, model, toggles,
+                                   text_ids.get(j["id"]), fresh_themes, n_variations): j
+                       for j in pending}
+            for fut in as_completed(futures):
+                job = futures[fut]
+                try:
+                    payload = fut.result()
+                except Exception as e:
+                    failed += 1
+                    print(f"[gagal] {job.get('preset') or job.get('theme')}: {e}", file=sys.stderr)
+                    continue
+                # Output ditulis dulu, baru checkpoint "done": paling buruk satu baris duplikat
+                out.write(json.dumps(payload, ensure_ascii=False) + "\n")
+                out.flush()
+                ckpt.record({"id": job["id"], "stage": "done"})
+                ok += 1
+    finally:
+        ckpt.close()
+    return ok, skipped, failed
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    load_dotenv()
+    ap = argparse.ArgumentParser(description="Buat prompt ID ➜ EN secara massal (output JSONL).")
+    ap.add_argument("--presets", action="store_true", help="Sertakan semua template dari pack (XPROMPT_PRESET_PACK).")
+    ap.add_argument("--themes", help="File tema custom (.csv / .jsonl / .txt).")
+    ap.add_argument("--styles", default="", help="'all', indeks STYLE_PRESETS dipisah koma, atau kosong.")
+    ap.add_argument("-o", "--out", required=True, help="File output JSONL (di-append).")
+    ap.add_argument("--checkpoint", help="File checkpoint (default: <out>.ckpt).")
+    ap.add_argument("-j", "--concurrency", type=int, default=4)
+    ap.add_argument("--pack", type=int, default=PACK_SIZE,
+                    help="Jumlah teks per request terjemahan berpaket (0/1 = tanpa paket).")
+    ap.add_argument("--max-wait", type=float, default=900.0,
+                    help="Detik maksimum menunggu anggaran RPM sebelum job dianggap gagal.")
+    ap.add_argument("--fresh-themes", action="store_true",
+                    help="Selalu generate tema dari Gemini, abaikan cache tema yang mirip.")
+    ap.add_argument("--variations", type=int, default=0,
+                    help=f"Jumlah variasi EN unik per job (0 = tanpa, maks {MAX_VARIATIONS}).")
+    ap.add_argument("--model", default=DEFAULT_MODEL)
+    ap.add_argument("--api-key", default=os.getenv("GEMINI_API_KEYS") or os.getenv("GEMINI_API_KEY", ""),
+                    help="Satu atau beberapa key dipisah koma (opsional bobot `key:2`); naikkan -j sebanding.")
+    ap.add_argument("--fallback-models", default=",".join(router.fallback_models),
+                    help="Model cadangan dipisah koma bila kuota semua key untuk --model habis.")
+    ap.add_argument("--routing", choices=POLICIES, default=router.policy)
+    ap.add_argument("--no-static-camera", action="store_true")
+    ap.add_argument("--black-bg", action="store_true")
+    ap.add_argument("--no-ultra-sharp", action="store_true")
+    ap.add_argument("--no-diag-lighting", action="store_true")
+    args = ap.parse_args(argv)
+
+    if not args.api_key:
+        ap.error("Harap isi GEMINI_API_KEY (env atau --api-key).")
+    themes = load_themes(args.themes) if args.themes else []
+    if not args.presets and not themes:
+        ap.error("Pilih --presets dan/atau --themes.")
+
+    # Default sama dengan checkbox di sidebar
+    toggles = {
+        "static_camera": not args.no_static_camera,
+        "black_bg": args.black_bg,
+        "ultra_sharp": not args.no_ultra_sharp,
+        "diag_lighting": not args.no_diag_lighting,
+    }
+    scheduler.max_wait = args.max_wait
+    router.policy = args.routing
+    router.fallback_models = parse_models(args.fallback_models)
+    telemetry.start_metrics_server()  # XPROMPT_METRICS_PORT: pantau run panjang dari Prometheus
+    jobs = list(iter_jobs(args.presets, themes, parse_styles(args.styles)))
+    ok, skipped, failed = run_batch(
+        jobs, args.out, args.checkpoint or args.out + ".ckpt",
+        args.api_key, args.model, toggles, args.concurrency, args.pack, args.fresh_themes,
+        min(max(0, args.variations), MAX_VARIATIONS),
+    )
+    print(f"Selesai: {ok} berhasil, {skipped} dilewati (checkpoint), {failed} gagal.", file=sys.stderr)
+    for r in router.status(args.api_key, args.model):
+        print(f"  {r['key']} {r['model']}: {r['calls']} panggilan, sisa {r['rpd']}/hari"
+              + (f", jeda {r['cooldown']:.0f} s ({r['last_error']})" if r["cooldown"] else ""), file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
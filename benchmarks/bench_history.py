@@ -0,0 +1,77 @@
+# bench_history.py — waktu insert & pencarian riwayat pada tabel besar
+#
+#   python benchmarks/bench_history.py [--rows 300000] [--path /tmp/history_bench.sqlite3]
+#
+# Baris dibuat dari preset (ID) dengan variasi kata acak agar indeks FTS5
+# berisi kosakata realistis. File dibuat ulang setiap run.
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preset_library import get_preset_library  # noqa: E402
+from prompt_core import build_export_payload, compose_prompt, compose_prompt_localized  # noqa: E402
+from prompt_history import PromptHistory  # noqa: E402
+
+TOGGLES = {"static_camera": True, "ultra_sharp": True}
+QUERIES = ["", "pixar", "hutan", "dino neon", "budaya indonesia", "kartun laut", "zzzz tidak ada"]
+
+
+def make_payloads(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    presets = list(get_preset_library().presets.items())
+    words = sorted({w for _, f in presets for v in f.values() for w in v.split() if w.isalpha()})
+    payloads = []
+    for i in range(count):
+        title, fields = presets[i % len(presets)]
+        fields = dict(fields)
+        fields["Foreground"] = f"{fields['Foreground']} {' '.join(rng.choice(words) for _ in range(6))} #{i}"
+        payloads.append((title, build_export_payload(fields, TOGGLES, compose_prompt_localized(fields, TOGGLES, "ID"),
+                                                     compose_prompt(fields, TOGGLES))))
+    return payloads
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--rows", type=int, default=300000)
+    ap.add_argument("--path", default=os.path.join("/tmp", "history_bench.sqlite3"))
+    ap.add_argument("--pages", type=int, default=5, help="Halaman yang diambil per query (offset naik).")
+    args = ap.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.path + suffix):
+            os.remove(args.path + suffix)
+    history = PromptHistory(args.path, max_entries=0)
+
+    payloads = make_payloads(min(args.rows, 5000))
+    start = time.perf_counter()
+    for i in range(args.rows):
+        title, payload = payloads[i % len(payloads)]
+        if i >= len(payloads):  # payload unik per baris (digest berbeda)
+            payload = dict(payload, job={"n": i})
+        history.record("bench", title, payload)
+    insert = time.perf_counter() - start
+    print(f"{args.rows} baris: insert {insert:.1f} s ({insert / args.rows * 1e6:.0f} µs/baris), "
+          f"file {os.path.getsize(args.path) / 1e6:.0f} MB")
+
+    history.record("bench", "warm", payloads[0][1])
+    for q in QUERIES:
+        times = []
+        found = 0
+        for page in range(args.pages):
+            t = time.perf_counter()
+            found += len(history.search(q, limit=10, offset=page * 10))
+            times.append(time.perf_counter() - t)
+        print(f"  {q or '(kosong)':<20} {len(times)} halaman • median {sorted(times)[len(times) // 2] * 1e3:7.2f} ms"
+              f" • maks {max(times) * 1e3:7.2f} ms • {found} hasil")
+    t = time.perf_counter()
+    history.get(args.rows // 2)
+    print(f"  get(id)              {(time.perf_counter() - t) * 1e3:7.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# bench_parse_sections.py — parse_sections satu-regex vs implementasi lama
+#
+#   python benchmarks/bench_parse_sections.py [--variations 50] [--repeat 5]
+import argparse
+import os
+import re
+import sys
+import timeit
+from typing import Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preset_library import get_preset_library  # noqa: E402
+from prompt_core import SectionParser, compose_prompt_localized, parse_sections  # noqa: E402
+
+
+def parse_sections_legacy(text: str) -> Dict[str, str]:
+    """Salinan parse_sections sebelum parser terkompilasi (pembanding)."""
+    KEY_ALIASES = {
+        "foreground": "Foreground", "latar depan": "Foreground", "latar depan:": "Foreground",
+        "midground": "Midground", "lapisan tengah": "Midground", "lapisan tengah:": "Midground",
+        "background": "Background", "latar belakang": "Background", "latar belakang:": "Background",
+        "floating elements": "Floating Elements", "elemen mengambang": "Floating Elements",
+        "elemen mengambang:": "Floating Elements",
+        "central banner": "Central Banner", "papan utama": "Central Banner", "papan utama:": "Central Banner",
+        "text & effects": "Text & Effects", "teks & efek": "Text & Effects", "teks & efek:": "Text & Effects",
+        "background style": "Background Style", "gaya latar": "Background Style",
+        "gaya latar:": "Background Style",
+        "style & lighting": "Style & Lighting", "gaya & pencahayaan": "Style & Lighting",
+        "gaya & pencahayaan:": "Style & Lighting",
+    }
+    parts = {}
+    current_key = None
+    for line in text.splitlines():
+        line = line.strip()
+        line = re.sub(r"^\*\*|\*\*$", "", line).strip()
+        if not line:
+            continue
+        matched = False
+        for alias, std_key in sorted(KEY_ALIASES.items(), key=lambda kv: -len(kv[0])):
+            if line.lower().startswith(alias) and (len(alias) == len(line) or line[len(alias):len(alias)+1] in [":", " "]):
+                if ":" in line:
+                    _, value = line.split(":", 1)
+                    value = value.strip()
+                else:
+                    value = ""
+                current_key = std_key
+                parts[current_key] = value
+                matched = True
+                break
+        if not matched and current_key:
+            parts[current_key] += " " + line
+    for k in parts:
+        parts[k] = parts[k].strip()
+    return parts
+
+
+def build_corpus(variations: int) -> str:
+    """Keluaran mirip 'Variasi' panjang: semua preset (ID) diulang, dengan baris lanjutan."""
+    blocks = []
+    for fields in get_preset_library().presets.values():
+        text = compose_prompt_localized(fields, {}, lang="ID")
+        blocks.append(text.replace(". ", ".\n", 1))  # sebagian nilai terpecah ke baris berikutnya
+    return "\n\n".join(blocks * max(1, variations // len(blocks) + 1))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--variations", type=int, default=50)
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    text = build_corpus(args.variations)
+    assert parse_sections(text) == parse_sections_legacy(text), "hasil parser berbeda"
+    lines = text.count("\n") + 1
+
+    def streamed() -> Dict[str, str]:
+        parser = SectionParser()
+        for i in range(0, len(text), 64):  # potongan kecil seperti stream Gemini
+            parser.feed(text[i:i + 64])
+        return parser.close()
+
+    def reparse_prefix() -> None:
+        # Pola lama di UI streaming: parse ulang seluruh teks tiap potongan
+        for i in range(64, len(text) + 64, 64 * 32):
+            parse_sections_legacy(text[:i])
+
+    cases = [
+        ("legacy", lambda: parse_sections_legacy(text)),
+        ("compiled", lambda: parse_sections(text)),
+        ("streaming feed", streamed),
+        ("legacy reparse /32 chunk", reparse_prefix),
+    ]
+    print(f"{lines} baris, {len(text)} karakter")
+    for name, fn in cases:
+        n = max(1, int(1.0 / max(timeit.timeit(fn, number=1), 1e-6)))
+        best = min(timeit.repeat(fn, number=n, repeat=args.repeat)) / n
+        print(f"{name:<26} {best * 1e3:9.3f} ms/run  ({lines / best / 1e3:8.1f}k baris/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# bench_style_suggest.py — automaton saran gaya vs rantai `any(k in style ...)` lama
+#
+#   python benchmarks/bench_style_suggest.py [--sizes 50,500,5000,20000] [--repeat 5]
+#
+# Tabel sintetis dengan jumlah kata kunci yang makin besar (kata kunci asli +
+# kata acak). Pemindaian naif tumbuh linear terhadap jumlah kata kunci;
+# automaton seharusnya tetap datar karena hanya bergantung panjang teks gaya.
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import timeit
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from preset_library import get_preset_library  # noqa: E402
+from prompt_core import STYLE_PRESETS  # noqa: E402
+from style_suggest import DEFAULT_TABLE_PATH, StyleSuggester  # noqa: E402
+
+
+def get_suggested_text_effects_legacy(style_lighting: str) -> str:
+    """Salinan rantai if/elif sebelum tabel saran (pembanding pada tabel asli)."""
+    style = style_lighting.lower()
+    if any(k in style for k in ["photorealistic", "dslr", "8k", "natural", "realistic", "documentary", "portrait", "cinematic", "environmental", "fine art", "ethnographic"]):
+        return "realistic"
+    elif any(k in style for k in ["3d pixar", "claymation", "kawaii", "chibi", "neon", "playful", "watercolor", "gouache", "papercraft", "halftone", "comic"]):
+        return "cartoon"
+    elif any(k in style for k in ["holographic", "vaporwave", "isometric", "glitch", "scanline", "rim light", "moonlight", "neon rim"]):
+        return "scifi"
+    elif any(k in style for k in ["traditional", "wood", "carved", "calligraphy", "ethnic", "folk"]):
+        return "traditional"
+    elif any(k in style for k in ["minimal", "line-art", "gradient", "clean", "soft blend", "pastel"]):
+        return "minimal"
+    return "default"
+
+
+def naive_scores(table: Dict, style: str) -> Dict[str, float]:
+    """Skor berbobot yang sama dengan StyleSuggester, tetapi memindai setiap kata kunci."""
+    style = style.lower()
+    scores = {}
+    for bucket in table["buckets"]:
+        s = sum(w for k, w in bucket["keywords"].items() if k in style)
+        if s:
+            scores[bucket["name"]] = s
+    return scores
+
+
+def grow_table(base: Dict, size: int, seed: int = 0) -> Dict:
+    """Salin tabel asli lalu tambah kata acak (5–12 huruf) hingga `size` kata kunci."""
+    rng = random.Random(seed)
+    table = json.loads(json.dumps(base))
+    total = sum(len(b["keywords"]) for b in table["buckets"])
+    while total < size:
+        bucket = rng.choice(table["buckets"])
+        word = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(5, 12)))
+        if word not in bucket["keywords"]:
+            bucket["keywords"][word] = round(rng.uniform(0.5, 2.0), 1)
+            total += 1
+    return table
+
+
+def best_time(fn, repeat: int) -> float:
+    n = max(1, int(0.2 / max(timeit.timeit(fn, number=1), 1e-6)))
+    return min(timeit.repeat(fn, number=n, repeat=repeat)) / n
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument("--sizes", default="50,500,5000,20000")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    with open(DEFAULT_TABLE_PATH, encoding="utf-8") as f:
+        base = json.load(f)
+    styles: List[str] = list(STYLE_PRESETS) + [f["Style & Lighting"] for f in get_preset_library().presets.values()]
+
+    real = StyleSuggester(DEFAULT_TABLE_PATH)
+    print(f"{len(styles)} teks gaya; tabel asli {len(real.keywords)} kata kunci")
+    legacy = best_time(lambda: [get_suggested_text_effects_legacy(s) for s in styles], args.repeat)
+    print(f"{'rantai if/elif lama':<26} {legacy / len(styles) * 1e6:8.2f} µs/gaya")
+    memo = best_time(lambda: [real.suggest(s) for s in styles], args.repeat)
+    print(f"{'suggest (memo, rerun)':<26} {memo / len(styles) * 1e6:8.2f} µs/gaya")
+
+    print(f"\n{'kata kunci':>10} {'naif µs/gaya':>14} {'automaton µs/gaya':>18} {'build ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in (int(x) for x in args.sizes.split(",")):
+            table = grow_table(base, size)
+            path = os.path.join(tmp, f"table_{size}.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(table, f)
+            build = best_time(lambda: StyleSuggester(path), 1)
+            suggester = StyleSuggester(path)
+            for s in styles:
+                assert suggester.scores(s) == naive_scores(table, s), f"skor berbeda untuk {s!r}"
+            naive = best_time(lambda: [naive_scores(table, s) for s in styles], args.repeat)
+            auto = best_time(lambda: [suggester.scores(s) for s in styles], args.repeat)
+            print(f"{len(suggester.keywords):>10} {naive / len(styles) * 1e6:>14.2f} "
+                  f"{auto / len(styles) * 1e6:>18.2f} {build * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# run_benchmarks.py — micro-benchmark jalur panas pembuatan prompt (tanpa UI, tanpa jaringan)
+#
+#   python benchmarks/run_benchmarks.py                       # simpan ke benchmarks/results/<rev>.json
+#   python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+#   python benchmarks/run_benchmarks.py -k parse --quick
+#
+# Hasil disimpan per versi (git rev) agar regresi terlihat antar versi;
+# --compare keluar dengan kode 1 bila ada benchmark yang melambat melewati --threshold.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import timeit
+from typing import Callable, Dict, List, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import gemini_client  # noqa: E402
+import prompt_core  # noqa: E402
+from gemini_scheduler import scheduler  # noqa: E402
+from preset_library import get_preset_library  # noqa: E402
+from style_suggest import get_style_suggester  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+STUB_MODEL = "bench-stub"
+TOGGLES_ALL = {k: True for k in prompt_core.TOGGLE_KEYS}
+
+
+# -------------------------------
+# Input representatif
+# -------------------------------
+def variation_output(fields: Dict[str, str], n: int = 10) -> str:
+    """Keluaran 'Variasi' gaya Gemini: n blok berlabel **bold** dengan judul dan penutup."""
+    blocks = []
+    for i in range(1, n + 1):
+        lines = [f"**Variation {i}:**"]
+        lines += [f"**{k}:** {v}" for k, v in fields.items() if v]
+        blocks.append("\n".join(lines))
+    return "\n\n".join(blocks) + "\n\nOption notes: each variation keeps the same structure."
+
+
+class StubBackend:
+    """Pengganti gemini_client.generate lokal: respons tetap, latensi opsional."""
+
+    def __init__(self, response: str, latency: float = 0.0):
+        self.response = response
+        self.latency = latency
+        self.calls = 0
+
+    def generate(self, prompt: str, model_name: str, api_key: str) -> str:
+        self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return self.response
+
+    def __enter__(self) -> "StubBackend":
+        self._orig = gemini_client.generate
+        gemini_client.generate = self.generate
+        # Anggaran tak terbatas: yang diukur overhead, bukan antrean RPM
+        scheduler.limits[STUB_MODEL] = (10 ** 9, 10 ** 9)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        gemini_client.generate = self._orig
+
+
+# -------------------------------
+# Benchmark
+# -------------------------------
+def build_cases() -> List[Tuple[str, Callable[[], object], int]]:
+    """(nama, fungsi, jumlah item per panggilan) — item dipakai untuk menghitung µs/item."""
+    presets = list(get_preset_library().presets.values())
+    ids = prompt_core.compose_many(presets, TOGGLES_ALL, lang="ID")
+    variations = [variation_output(f) for f in presets]
+    styles = [f.get("Style & Lighting", "") for f in presets]
+    stub = StubBackend(prompt_core.compose_prompt(presets[0], TOGGLES_ALL))
+    suggester = get_style_suggester()
+
+    def call_gemini_stub() -> None:
+        with stub:
+            for _ in range(100):
+                prompt_core._call_gemini("bench", STUB_MODEL, "bench-key")
+
+    return [
+        ("compose_prompt", lambda: [prompt_core.compose_prompt(f, TOGGLES_ALL) for f in presets], len(presets)),
+        ("compose_prompt_localized[ID]",
+         lambda: [prompt_core.compose_prompt_localized(f, TOGGLES_ALL, "ID") for f in presets], len(presets)),
+        ("compose_many[ID]", lambda: prompt_core.compose_many(presets, TOGGLES_ALL, lang="ID"), len(presets)),
+        ("parse_sections[preset ID]", lambda: [prompt_core.parse_sections(t) for t in ids], len(ids)),
+        ("parse_sections[10 variations bold]",
+         lambda: [prompt_core.parse_sections(t) for t in variations], len(variations)),
+        ("get_suggested_text_effects", lambda: [prompt_core.get_suggested_text_effects(s) for s in styles],
+         len(styles)),
+        ("style_suggest.scores[uncached]", lambda: [suggester.scores(s) for s in styles], len(styles)),
+        ("_call_gemini[stub backend]", call_gemini_stub, 100),
+    ]
+
+
+def measure(fn: Callable[[], object], repeat: int, budget: float) -> Dict[str, float]:
+    once = max(timeit.timeit(fn, number=1), 1e-7)
+    number = max(1, int(budget / once))
+    runs = [t / number for t in timeit.repeat(fn, number=number, repeat=repeat)]
+    runs.sort()
+    return {"best": runs[0], "median": runs[len(runs) // 2], "number": number, "repeat": repeat}
+
+
+def git_rev() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline_path: str, threshold: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    print(f"\nDibanding {os.path.basename(baseline_path)} (median):")
+    for name, res in results.items():
+        if name not in baseline:
+            continue
+        ratio = res["median"] / baseline[name]["median"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  ⚠ REGRESI"
+            regressions += 1
+        print(f"  {name:<36} {ratio:6.2f}×{flag}")
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Micro-benchmark jalur panas prompt_core.")
+    ap.add_argument("-k", dest="filter", default="", help="Hanya benchmark yang namanya memuat teks ini.")
+    ap.add_argument("--repeat", type=int, default=7)
+    ap.add_argument("--budget", type=float, default=0.2, help="Detik kira-kira per pengulangan.")
+    ap.add_argument("--quick", action="store_true", help="repeat=3, budget=0.05 (cek cepat).")
+    ap.add_argument("-o", "--out", help="File hasil JSON (default: benchmarks/results/<git rev>.json).")
+    ap.add_argument("--no-save", action="store_true")
+    ap.add_argument("--compare", help="File hasil sebelumnya sebagai pembanding.")
+    ap.add_argument("--threshold", type=float, default=0.15, help="Batas perlambatan (0.15 = 15%%).")
+    args = ap.parse_args(argv)
+    if args.quick:
+        args.repeat, args.budget = 3, 0.05
+
+    results: Dict[str, Dict[str, float]] = {}
+    for name, fn, items in build_cases():
+        if args.filter not in name:
+            continue
+        res = measure(fn, args.repeat, args.budget)
+        res["per_item"] = res["median"] / items
+        results[name] = res
+        print(f"{name:<36} median {res['median'] * 1e3:9.3f} ms  •  {res['per_item'] * 1e6:8.2f} µs/item")
+
+    rev = git_rev()
+    if not args.no_save:
+        out = args.out or os.path.join(RESULTS_DIR, f"{rev}.json")
+        os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump({
+                "rev": rev,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "results": results,
+            }, f, indent=2)
+        print(f"\nHasil disimpan: {os.path.relpath(out)}")
+    if args.compare:
+        return 1 if compare(results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
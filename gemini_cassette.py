@@ -0,0 +1,198 @@
+# gemini_cassette.py — rekam/putar ulang panggilan Gemini (kaset JSONL)
+#
+# XPROMPT_CASSETTE=record  : panggilan tetap ke Gemini, setiap respons (plus waktunya) dicatat
+# XPROMPT_CASSETTE=replay  : respons dilayani dari kaset, TANPA akses jaringan sama sekali
+#
+# Opsi replay:
+#   XPROMPT_CASSETTE_PATH     file kaset (default .cache/gemini_cassette.jsonl)
+#   XPROMPT_CASSETTE_LATENCY  "recorded" = tiru waktu rekaman, angka = detik tetap, default 0
+#   XPROMPT_CASSETTE_FAULTS   mis. "429:0.2,timeout:0.05" — peluang galat tiruan per panggilan
+#   XPROMPT_CASSETTE_SEED     seed acak galat agar run bisa diulang persis (default 0)
+#
+# Untuk run yang benar-benar bisa diulang, pakai juga XPROMPT_CACHE_PATH=:memory:
+# agar hit cache terjemahan dari run sebelumnya tidak melewati kaset.
+import json
+import os
+import random
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Union
+
+import gemini_client
+from translation_cache import make_key
+
+DEFAULT_CASSETTE_PATH = os.path.join(".cache", "gemini_cassette.jsonl")
+CASSETTE_VERSION = "cassette-v1"
+FAULT_KINDS = ("429", "timeout")
+
+
+class CassetteMiss(Exception):
+    """Mode replay: request ini tidak ada di kaset (tidak ada fallback ke jaringan)."""
+
+
+def parse_faults(spec: str) -> Dict[str, float]:
+    """'429:0.2,timeout:0.05' ➜ {'429': 0.2, 'timeout': 0.05}"""
+    faults: Dict[str, float] = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        kind, _, prob = part.partition(":")
+        if kind not in FAULT_KINDS:
+            raise ValueError(f"Jenis galat kaset tidak dikenal: {kind!r} (pilih {', '.join(FAULT_KINDS)})")
+        faults[kind] = float(prob or 1.0)
+    return faults
+
+
+class Cassette:
+    """
+    Pengganti gemini_client di batas _call_gemini/stream_gemini (antarmuka
+    generate/generate_stream yang sama). Kunci rekaman = hash(prompt, model);
+    rekaman ganda untuk kunci yang sama diputar bergiliran, sehingga beberapa
+    klik "Variasi" tetap mendapat respons berbeda seperti saat direkam.
+    """
+
+    def __init__(self, path: str, mode: str, latency: Union[str, float] = 0.0,
+                 faults: Optional[Dict[str, float]] = None, seed: int = 0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Mode kaset tidak dikenal: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self.faults = faults or {}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._records: Dict[str, List[Dict]] = {}
+        self._turn: Dict[str, int] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # baris terakhir terpotong saat proses dihentikan
+                    self._records.setdefault(rec["key"], []).append(rec)
+        elif mode == "replay":
+            raise FileNotFoundError(f"Kaset tidak ditemukan: {path}")
+        if mode == "record":
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    @staticmethod
+    def key(prompt: str, model_name: str) -> str:
+        return make_key(prompt, model_name, CASSETTE_VERSION)
+
+    # -- rekam --------------------------------------------------------------
+    def _append(self, rec: Dict) -> None:
+        with self._lock:
+            self._records.setdefault(rec["key"], []).append(rec)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    def _record_text(self, prompt: str, model_name: str, api_key: str) -> str:
+        start = time.perf_counter()
+        text = gemini_client.generate(prompt, model_name, api_key)
+        self._append({"key": self.key(prompt, model_name), "model": model_name.split("/", 1)[-1],
+                      "chunks": [text], "offsets": [time.perf_counter() - start],
+                      "elapsed": time.perf_counter() - start})
+        return text
+
+    def _record_stream(self, prompt: str, model_name: str, api_key: str) -> Iterator[str]:
+        start = time.perf_counter()
+        stream = gemini_client.generate_stream(prompt, model_name, api_key)  # error awal naik di sini
+        chunks: List[str] = []
+        offsets: List[float] = []
+
+        def gen() -> Iterator[str]:
+            for chunk in stream:
+                chunks.append(chunk)
+                offsets.append(time.perf_counter() - start)
+                yield chunk
+            # Hanya stream yang selesai utuh yang masuk kaset
+            self._append({"key": self.key(prompt, model_name), "model": model_name.split("/", 1)[-1],
+                          "chunks": chunks, "offsets": offsets, "elapsed": time.perf_counter() - start})
+        return gen()
+
+    # -- putar ulang ----------------------------------------------------------
+    def _next_record(self, prompt: str, model_name: str) -> Dict:
+        key = self.key(prompt, model_name)
+        with self._lock:
+            recs = self._records.get(key)
+            if not recs:
+                raise CassetteMiss(f"Request tidak ada di kaset {self.path} (model {model_name}, kunci {key[:12]}…)")
+            turn = self._turn.get(key, 0)
+            rec = recs[turn % len(recs)]
+            fault = next((k for k, p in self.faults.items() if self._rng.random() < p), None)
+            if fault is None:
+                self._turn[key] = turn + 1  # request yang gagal diulang dengan rekaman yang sama
+        if fault == "429":
+            raise Exception("429 RESOURCE_EXHAUSTED: quota exceeded (galat tiruan kaset)")
+        if fault == "timeout":
+            self._sleep(sum(self._delays(rec)))  # request "menggantung" selama latensi normalnya
+            raise TimeoutError("Deadline exceeded: request timeout (galat tiruan kaset)")
+        return rec
+
+    def _delays(self, rec: Dict) -> List[float]:
+        """Jeda sebelum tiap chunk: selisih offset rekaman, atau latensi tetap di chunk pertama."""
+        if self.latency == "recorded":
+            prev, delays = 0.0, []
+            for off in rec["offsets"]:
+                delays.append(max(0.0, off - prev))
+                prev = off
+            return delays
+        return [float(self.latency)] + [0.0] * (len(rec["chunks"]) - 1)
+
+    @staticmethod
+    def _sleep(seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def _replay_text(self, prompt: str, model_name: str) -> str:
+        rec = self._next_record(prompt, model_name)
+        self._sleep(sum(self._delays(rec)))
+        return "".join(rec["chunks"])
+
+    def _replay_stream(self, prompt: str, model_name: str) -> Iterator[str]:
+        rec = self._next_record(prompt, model_name)
+        delays = self._delays(rec)
+        self._sleep(delays[0])  # seperti gemini_client: chunk pertama diambil sebelum kembali
+
+        def gen() -> Iterator[str]:
+            for chunk, delay in zip(rec["chunks"], [0.0] + delays[1:]):
+                self._sleep(delay)
+                yield chunk
+        return gen()
+
+    # -- antarmuka gemini_client --------------------------------------------
+    def generate(self, prompt: str, model_name: str, api_key: str) -> str:
+        if self.mode == "record":
+            return self._record_text(prompt, model_name, api_key)
+        return self._replay_text(prompt, model_name)
+
+    def generate_stream(self, prompt: str, model_name: str, api_key: str) -> Iterator[str]:
+        if self.mode == "record":
+            return self._record_stream(prompt, model_name, api_key)
+        return self._replay_stream(prompt, model_name)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"keys": len(self._records), "records": sum(len(r) for r in self._records.values())}
+
+
+_cassette: Optional[Cassette] = None
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Satu instance per proses; None bila XPROMPT_CASSETTE tidak diset (panggilan langsung ke Gemini)."""
+    global _cassette
+    mode = os.getenv("XPROMPT_CASSETTE", "").strip().lower()
+    if mode in ("", "off", "0"):
+        return None
+    with _cassette_lock:
+        if _cassette is None:
+            latency = os.getenv("XPROMPT_CASSETTE_LATENCY", "0")
+            _cassette = Cassette(
+                os.getenv("XPROMPT_CASSETTE_PATH", DEFAULT_CASSETTE_PATH),
+                mode,
+                latency=latency if latency == "recorded" else float(latency),
+                faults=parse_faults(os.getenv("XPROMPT_CASSETTE_FAULTS", "")),
+                seed=int(os.getenv("XPROMPT_CASSETTE_SEED", "0")),
+            )
+        return _cassette
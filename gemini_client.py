@@ -0,0 +1,183 @@
+# gemini_client.py — registry client Gemini (dipakai ulang per API key)
+import threading
+import time
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import telemetry
+
+IDLE_TTL = 15 * 60  # detik sebelum client yang menganggur ditutup
+
+_lock = threading.Lock()
+_backend: Optional[str] = None          # "genai" (SDK baru) atau "legacy" (google.generativeai)
+_clients: Dict[str, Tuple[Any, float]] = {}   # api_key -> (client, terakhir dipakai)
+_model_names: Dict[str, str] = {}       # nama model -> bentuk nama yang terbukti berhasil
+_legacy_key: Optional[str] = None
+_legacy_lock = threading.Lock()
+
+
+def detect_backend() -> str:
+    """Deteksi SDK sekali per proses, bukan dengan gagal di setiap request."""
+    global _backend
+    if _backend is None:
+        try:
+            from google import genai  # noqa: F401
+            _backend = "genai"
+        except ImportError:
+            import google.generativeai  # noqa: F401  (ImportError diteruskan ke pemanggil)
+            _backend = "legacy"
+    return _backend
+
+
+def _close(client: Any) -> None:
+    close = getattr(client, "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception:
+            pass
+
+
+def evict_idle(now: Optional[float] = None) -> int:
+    """Tutup client yang tidak dipakai lebih lama dari IDLE_TTL."""
+    now = now or time.monotonic()
+    with _lock:
+        stale = [k for k, (_, used) in _clients.items() if now - used > IDLE_TTL]
+        dropped = [_clients.pop(k)[0] for k in stale]
+    for client in dropped:
+        _close(client)
+    return len(dropped)
+
+
+def get_client(api_key: str) -> Any:
+    """Client SDK baru per API key; koneksi HTTP (keep-alive) ikut dipakai ulang."""
+    evict_idle()
+    with _lock:
+        entry = _clients.get(api_key)
+        if entry is None:
+            from google import genai
+            client = genai.Client(api_key=api_key)
+        else:
+            client = entry[0]
+        _clients[api_key] = (client, time.monotonic())
+        return client
+
+
+def _used(model_name: str, path: str) -> None:
+    """Catat jalur yang melayani panggilan: nama apa adanya, prefiks models/, atau SDK lama."""
+    telemetry.GEMINI_PATH.inc(model=telemetry.model_label(model_name), path=path)
+
+
+def _genai_path(name: str, model_name: str) -> str:
+    return "genai_models_prefix" if name.startswith("models/") and not model_name.startswith("models/") else "genai"
+
+
+def _is_model_name_error(e: Exception) -> bool:
+    """Hanya nama model yang tidak dikenali layak dicoba ulang dengan prefiks models/."""
+    msg = str(e).lower()
+    return ("404" in msg or "not_found" in msg or "not found" in msg
+            or "invalid model" in msg or "unsupported model" in msg or "model name" in msg)
+
+
+def _model_candidates(model_name: str):
+    known = _model_names.get(model_name)
+    if known:
+        return [known]
+    alt = model_name if model_name.startswith("models/") else f"models/{model_name}"
+    return [model_name] if alt == model_name else [model_name, alt]
+
+
+def _generate_genai(prompt: str, model_name: str, api_key: str) -> str:
+    client = get_client(api_key)
+    *firsts, last = _model_candidates(model_name)
+    for name in firsts:
+        try:
+            resp = client.models.generate_content(model=name, contents=prompt)
+        except Exception as e:
+            # 429/auth/jaringan: request kedua hanya membakar kuota yang tidak dijatah scheduler
+            if not _is_model_name_error(e):
+                raise
+            continue
+        _model_names[model_name] = name
+        _used(model_name, _genai_path(name, model_name))
+        return getattr(resp, "text", getattr(resp, "output_text", str(resp)))
+    resp = client.models.generate_content(model=last, contents=prompt)
+    _model_names[model_name] = last
+    _used(model_name, _genai_path(last, model_name))
+    return getattr(resp, "text", getattr(resp, "output_text", str(resp)))
+
+
+def _generate_legacy(prompt: str, model_name: str, api_key: str) -> str:
+    global _legacy_key
+    import google.generativeai as genai_old
+    # configure() bersifat global di SDK lama, jadi dijaga lock saat berganti key
+    with _legacy_lock:
+        if _legacy_key != api_key:
+            genai_old.configure(api_key=api_key)
+            _legacy_key = api_key
+        model = genai_old.GenerativeModel(model_name.split("/", 1)[-1])
+        resp = model.generate_content(prompt)
+    _used(model_name, "legacy")
+    return getattr(resp, "text", str(resp))
+
+
+def generate(prompt: str, model_name: str, api_key: str) -> str:
+    """Panggil Gemini lewat backend yang terdeteksi; error SDK diteruskan apa adanya."""
+    if detect_backend() == "genai":
+        return _generate_genai(prompt, model_name, api_key)
+    return _generate_legacy(prompt, model_name, api_key)
+
+
+def _chunk_texts(head: Any, it: Iterator[Any]) -> Iterator[str]:
+    if head is not None:
+        yield getattr(head, "text", "") or ""
+    for chunk in it:
+        yield getattr(chunk, "text", "") or ""
+
+
+def _open_stream(client: Any, name: str, prompt: str):
+    # Error dari server baru muncul saat chunk pertama diambil, jadi ambil di sini
+    it = iter(client.models.generate_content_stream(model=name, contents=prompt))
+    return it, next(it, None)
+
+
+def _stream_genai(prompt: str, model_name: str, api_key: str) -> Iterator[str]:
+    client = get_client(api_key)
+    *firsts, last = _model_candidates(model_name)
+    for name in firsts:
+        try:
+            it, head = _open_stream(client, name, prompt)
+        except Exception as e:
+            if not _is_model_name_error(e):
+                raise
+            continue
+        _model_names[model_name] = name
+        _used(model_name, _genai_path(name, model_name))
+        return _chunk_texts(head, it)
+    it, head = _open_stream(client, last, prompt)
+    _model_names[model_name] = last
+    _used(model_name, _genai_path(last, model_name))
+    return _chunk_texts(head, it)
+
+
+def _stream_legacy(prompt: str, model_name: str, api_key: str) -> Iterator[str]:
+    global _legacy_key
+    import google.generativeai as genai_old
+    with _legacy_lock:
+        if _legacy_key != api_key:
+            genai_old.configure(api_key=api_key)
+            _legacy_key = api_key
+        model = genai_old.GenerativeModel(model_name.split("/", 1)[-1])
+        it = iter(model.generate_content(prompt, stream=True))
+        head = next(it, None)
+    _used(model_name, "legacy")
+    return _chunk_texts(head, it)
+
+
+def generate_stream(prompt: str, model_name: str, api_key: str) -> Iterator[str]:
+    """
+    Versi streaming dari generate(). Request dibuka dan chunk pertama diambil
+    sebelum fungsi kembali, sehingga error awal (429, key salah) langsung naik.
+    """
+    if detect_backend() == "genai":
+        return _stream_genai(prompt, model_name, api_key)
+    return _stream_legacy(prompt, model_name, api_key)
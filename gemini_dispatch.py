@@ -0,0 +1,127 @@
+# gemini_dispatch.py — jalankan panggilan Gemini yang saling lepas secara bersamaan
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Optional, Tuple
+
+DEFAULT_TIMEOUT = 60.0  # detik per panggilan
+MAX_WORKERS = 8
+BACKGROUND_WORKERS = 4
+
+# Pool dibagi semua sesi dalam satu proses (modul tidak dieksekusi ulang saat rerun)
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="gemini")
+# Job latar belakang bisa menunggu anggaran scheduler sampai MAX_WAIT sambil memegang
+# worker; pool terpisah agar tidak menahan panggilan yang sedang ditunggu pengguna.
+_background_executor = ThreadPoolExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="gemini-bg")
+
+
+class CallResult(NamedTuple):
+    value: Any
+    error: Optional[Exception]
+    elapsed: float
+
+
+def _timed(fn: Callable[[], Any]) -> Tuple[Any, float]:
+    start = time.perf_counter()
+    value = fn()
+    return value, time.perf_counter() - start
+
+
+def _timeout_error(deadline: float) -> Exception:
+    return Exception(f"❌ **Waktu habis** setelah {deadline:g} detik. Coba lagi nanti.")
+
+
+def submit_call(fn: Callable[[], Any]) -> Future:
+    """Kirim satu job yang ditunggu pengguna ke pool bersama tanpa menunggu hasilnya."""
+    return _executor.submit(fn)
+
+
+def submit_background(fn: Callable[[], Any]) -> Future:
+    """Kirim job prioritas rendah (mis. terjemahan latar belakang) ke pool latar belakang."""
+    return _background_executor.submit(fn)
+
+
+class PendingCalls:
+    """Job yang sudah dikirim ke pool; `results()` menunggu dan mengumpulkan hasilnya."""
+
+    def __init__(self, jobs: Dict[str, Callable[[], Any]],
+                 timeouts: Optional[Dict[str, float]] = None,
+                 default_timeout: float = DEFAULT_TIMEOUT):
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.start = time.perf_counter()
+        self.futures = {name: _executor.submit(_timed, fn) for name, fn in jobs.items()}
+
+    def results(self) -> Dict[str, CallResult]:
+        results: Dict[str, CallResult] = {}
+        for name, fut in self.futures.items():
+            deadline = self.timeouts.get(name, self.default_timeout)
+            remaining = max(0.0, deadline - (time.perf_counter() - self.start))
+            try:
+                value, elapsed = fut.result(timeout=remaining)
+                results[name] = CallResult(value, None, elapsed)
+            except FutureTimeout:
+                fut.cancel()  # Tidak menghentikan thread yang sudah jalan; hasilnya diabaikan
+                results[name] = CallResult(None, _timeout_error(deadline), time.perf_counter() - self.start)
+            except Exception as e:
+                results[name] = CallResult(None, e, time.perf_counter() - self.start)
+        return results
+
+
+def start_calls(jobs: Dict[str, Callable[[], Any]],
+                timeouts: Optional[Dict[str, float]] = None,
+                default_timeout: float = DEFAULT_TIMEOUT) -> PendingCalls:
+    """Kirim job tanpa menunggu; thread skrip bisa mengerjakan hal lain (mis. streaming)."""
+    return PendingCalls(jobs, timeouts, default_timeout)
+
+
+_DONE = object()
+
+
+def stream_call(open_stream: Callable[[], Iterator[str]], timeout: float = DEFAULT_TIMEOUT) -> Iterator[str]:
+    """
+    Konsumsi stream di pool dan teruskan chunk ke thread skrip dengan tenggat
+    yang sama seperti panggilan biasa: stream yang macet tidak menahan rerun.
+    Tenggat dihitung sejak producer mulai jalan, bukan sejak antre di pool.
+    Setelah waktu habis producer berhenti pada chunk berikutnya dan menutup stream.
+    """
+    chunks: "queue.Queue" = queue.Queue()
+    abandoned = threading.Event()
+    started = threading.Event()
+    start = [0.0]
+
+    def produce() -> None:
+        start[0] = time.perf_counter()
+        started.set()
+        stream = None
+        try:
+            stream = open_stream()
+            for chunk in stream:
+                if abandoned.is_set():
+                    break
+                chunks.put(chunk)
+            chunks.put(_DONE)
+        except Exception as e:
+            chunks.put(e)
+        finally:
+            close = getattr(stream, "close", None)
+            if callable(close):
+                close()
+
+    _executor.submit(produce)
+    try:
+        started.wait()
+        while True:
+            remaining = timeout - (time.perf_counter() - start[0])
+            try:
+                item = chunks.get(timeout=max(0.0, remaining))
+            except queue.Empty:
+                raise _timeout_error(timeout) from None
+            if item is _DONE:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        abandoned.set()
@@ -0,0 +1,192 @@
+# gemini_router.py — pool API key × daftar model dengan failover saat kuota habis
+#
+# GEMINI_API_KEY (atau GEMINI_API_KEYS) boleh berisi beberapa key dipisah koma,
+# opsional dengan bobot `key:2`. Setiap pasangan (key, model) adalah satu rute
+# dengan bucket RPM/RPD sendiri di scheduler, jadi throughput naik sebanding
+# jumlah key. Rute yang mendapat 429/RESOURCE_EXHAUSTED atau key tidak valid
+# diistirahatkan (cooldown) dan panggilan langsung dialihkan ke rute berikutnya;
+# model cadangan (XPROMPT_FALLBACK_MODELS) baru dipakai bila semua key untuk
+# model yang dipilih sedang istirahat.
+#
+# Kebijakan (XPROMPT_ROUTING):
+#   lru       rute yang bisa jalan paling cepat, lalu yang paling lama tidak dipakai
+#   weighted  acak berbobot: bobot key × sisa anggaran RPM
+import os
+import random
+import re
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, TypeVar
+
+import telemetry
+from gemini_scheduler import PRIORITY_USER, RateLimitTimeout, is_quota_error, key_id, scheduler
+
+T = TypeVar("T")
+
+POLICIES = ("lru", "weighted")
+QUOTA_COOLDOWN = 60.0          # 429 per menit: bucket menit terisi lagi dalam ~1 menit
+DAILY_QUOTA_COOLDOWN = 3600.0  # kuota harian habis: jangan dicoba lagi dalam waktu dekat
+AUTH_COOLDOWN = 3600.0         # key ditolak: kemungkinan salah ketik/dicabut
+
+_SEPARATORS = re.compile(r"[,;\s]+")
+
+
+class Route(NamedTuple):
+    api_key: str
+    model: str
+    weight: float = 1.0
+
+
+class RouteHealth:
+    __slots__ = ("cooldown_until", "failures", "calls", "last_used", "last_error")
+
+    def __init__(self):
+        self.cooldown_until = 0.0
+        self.failures = 0      # gagal beruntun; direset setelah sukses
+        self.calls = 0
+        self.last_used = 0.0
+        self.last_error = ""
+
+
+def parse_keys(raw: str) -> List[Tuple[str, float]]:
+    """'k1, k2:2' ➜ [(k1, 1.0), (k2, 2.0)]; key ganda diabaikan, urutan dipertahankan."""
+    keys: Dict[str, float] = {}
+    for token in _SEPARATORS.split(raw or ""):
+        key, sep, weight = token.rpartition(":")
+        if not sep or not key:
+            key, weight = token, ""
+        try:
+            w = float(weight) if weight else 1.0
+        except ValueError:  # ':' bagian dari key, bukan bobot
+            key, w = token, 1.0
+        if key and key not in keys:
+            keys[key] = max(w, 0.0)
+    return list(keys.items())
+
+
+def parse_models(raw: str) -> List[str]:
+    return [m for m in _SEPARATORS.split(raw or "") if m]
+
+
+def is_auth_error(e: Exception) -> bool:
+    msg = str(e).lower()
+    return ("401" in msg or "403" in msg or "unauthorized" in msg or "invalid key" in msg
+            or "api key not valid" in msg or "permission_denied" in msg)
+
+
+def _cooldown(e: Exception, category: str) -> float:
+    if category == "auth":
+        return AUTH_COOLDOWN
+    msg = str(e).lower().replace(" ", "")
+    return DAILY_QUOTA_COOLDOWN if "perday" in msg or "daily" in msg else QUOTA_COOLDOWN
+
+
+class Router:
+    """
+    Satu instance per proses (seperti scheduler): kesehatan rute dibagi semua
+    sesi, sehingga key yang baru kena 429 di satu sesi juga dihindari sesi lain.
+    """
+
+    def __init__(self, policy: str = "lru", fallback_models: Optional[List[str]] = None):
+        self.policy = policy if policy in POLICIES else "lru"
+        self.fallback_models = list(fallback_models or [])
+        self._health: Dict[Tuple[str, str], RouteHealth] = {}
+        self._lock = threading.Lock()
+
+    def routes(self, api_key: str, model: str) -> List[Route]:
+        """Semua rute, model utama dulu lalu model cadangan; di dalam satu model urut sesuai key."""
+        models = [model] + [m for m in self.fallback_models if m != model]
+        return [Route(k, m, w) for m in models for k, w in parse_keys(api_key) if w > 0]
+
+    def _health_of(self, route: Route) -> RouteHealth:
+        h = self._health.get((key_id(route.api_key), route.model))
+        if h is None:
+            h = self._health[(key_id(route.api_key), route.model)] = RouteHealth()
+        return h
+
+    def _order(self, routes: List[Route], now: float) -> List[Route]:
+        up = [r for r in routes if self._health_of(r).cooldown_until <= now]
+        rank = {m: i for i, m in enumerate(dict.fromkeys(r.model for r in routes))}
+        if self.policy == "weighted":
+            # Efraimidis–Spirakis: urutan acak berbobot tanpa pengembalian
+            def score(r: Route) -> float:
+                w = r.weight * (1 + scheduler.remaining(r.model, r.api_key)["rpm"])
+                return -random.random() ** (1.0 / w)
+            return sorted(up, key=lambda r: (rank[r.model], score(r)))
+        return sorted(up, key=lambda r: (rank[r.model], scheduler.wait_time(r.model, r.api_key),
+                                         self._health_of(r).last_used))
+
+    def run(self, fn: Callable[[Route], T], api_key: str, model: str, priority: int = PRIORITY_USER) -> T:
+        """
+        Jalankan `fn(route)` pada rute terbaik. Dengan satu rute perilakunya sama
+        seperti scheduler.run (429 diulang dengan backoff); dengan beberapa rute
+        429/key ditolak/antrean penuh langsung dialihkan ke rute berikutnya.
+        """
+        routes = self.routes(api_key, model)
+        if len(routes) <= 1:
+            route = routes[0] if routes else Route(api_key, model)
+            result = scheduler.run(lambda: fn(route), route.model, priority, key=route.api_key)
+            with self._lock:
+                self._health_of(route).calls += 1
+            return result
+        with self._lock:
+            now = time.monotonic()
+            order = self._order(routes, now)
+            if not order:
+                wait = min(self._health_of(r).cooldown_until for r in routes) - now
+                raise RateLimitTimeout(
+                    f"Semua {len(routes)} kombinasi API key/model sedang jeda kuota; "
+                    f"tersedia lagi dalam {wait / 60:.0f} menit.")
+            self._health_of(order[0]).last_used = now  # sesi paralel tidak berebut rute yang sama
+        last_error: Exception = RateLimitTimeout(model)
+        for route in order:
+            with self._lock:
+                self._health_of(route).last_used = time.monotonic()
+            try:
+                result = scheduler.run(lambda: fn(route), route.model, priority, retries=0, key=route.api_key)
+            except RateLimitTimeout as e:
+                self._failover(route, "rate_limit_wait", cooldown=0.0)
+                last_error = e
+                continue
+            except Exception as e:
+                category = "quota" if is_quota_error(e) else "auth" if is_auth_error(e) else None
+                if category is None:
+                    raise
+                if category == "quota":
+                    scheduler.penalize(route.model, route.api_key)
+                self._failover(route, category, cooldown=_cooldown(e, category))
+                last_error = e
+                continue
+            with self._lock:
+                h = self._health_of(route)
+                h.calls += 1
+                h.failures = 0
+            return result
+        raise last_error
+
+    def _failover(self, route: Route, category: str, cooldown: float) -> None:
+        telemetry.GEMINI_FAILOVERS.inc(model=route.model.split("/", 1)[-1], key=key_id(route.api_key),
+                                       category=category)
+        with self._lock:
+            h = self._health_of(route)
+            h.failures += 1
+            h.last_error = category
+            if cooldown:
+                h.cooldown_until = max(h.cooldown_until, time.monotonic() + cooldown)
+
+    def status(self, api_key: str, model: str) -> List[Dict[str, object]]:
+        """Ringkasan per rute untuk sidebar/CLI; key hanya ditampilkan sebagai pengenal pendek."""
+        now = time.monotonic()
+        rows = []
+        for route in self.routes(api_key, model):
+            with self._lock:
+                h = self._health_of(route)
+                cooldown = max(0.0, h.cooldown_until - now)
+                calls, failures, last_error = h.calls, h.failures, h.last_error
+            rows.append(dict(key=key_id(route.api_key), model=route.model, weight=route.weight,
+                             cooldown=cooldown, calls=calls, failures=failures, last_error=last_error,
+                             **scheduler.remaining(route.model, route.api_key)))
+        return rows
+
+
+router = Router(os.getenv("XPROMPT_ROUTING", "lru"), parse_models(os.getenv("XPROMPT_FALLBACK_MODELS", "")))
@@ -0,0 +1,158 @@
+# gemini_scheduler.py — pembatas laju per (model, API key) (RPM/RPD) dengan antrean prioritas
+import heapq
+import itertools
+import random
+import threading
+import time
+from hashlib import sha256
+from typing import Callable, Dict, Tuple, TypeVar
+
+import telemetry
+
+T = TypeVar("T")
+
+# (RPM, RPD) tier gratis — samakan dengan catatan di selectbox model
+MODEL_LIMITS: Dict[str, Tuple[int, int]] = {
+    "gemini-1.5-flash-8b": (15, 500),
+    "gemini-1.5-flash": (15, 50),
+    "gemini-1.5-pro": (2, 50),
+}
+DEFAULT_LIMITS = (15, 500)
+
+# Angka kecil = didahulukan
+PRIORITY_USER = 0         # klik pengguna: enhance, variasi, tema custom
+PRIORITY_BACKGROUND = 10  # terjemahan otomatis, batch
+
+MAX_WAIT = 20.0       # detik maksimum menunggu giliran (UI); batch menaikkannya
+MAX_RETRIES = 3
+BACKOFF_BASE = 1.0    # detik; 1, 2, 4 ... + jitter
+
+
+class RateLimitTimeout(Exception):
+    """Giliran tidak didapat dalam MAX_WAIT karena anggaran RPM/RPD habis."""
+
+
+def key_id(api_key: str) -> str:
+    """Pengenal pendek API key untuk label metrik/log — key asli tidak pernah dicatat."""
+    return sha256(api_key.encode("utf-8")).hexdigest()[:8] if api_key else ""
+
+
+def is_quota_error(e: Exception) -> bool:
+    msg = str(e).lower()
+    return "429" in msg or "quota" in msg or "resource_exhausted" in msg
+
+
+def _bucket_key(model: str, key: str) -> Tuple[str, str]:
+    return model.split("/", 1)[-1], key_id(key)
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, per_seconds: float):
+        self.capacity = capacity
+        self.rate = capacity / per_seconds
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, now: float) -> float:
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self) -> None:
+        self.tokens -= 1
+
+    def drain(self) -> None:
+        self.tokens = min(self.tokens, 0.0)
+
+
+class Scheduler:
+    """
+    Satu instance per proses, dipakai semua sesi. Setiap pasangan (model,
+    API key) punya bucket RPM dan RPD — kuota Gemini berlaku per key — dan
+    permintaan menunggu dalam antrean prioritas milik pasangan itu hingga kedua
+    bucket punya token (key yang habis tidak menahan antrean key lain).
+    """
+
+    def __init__(self, limits: Dict[str, Tuple[int, int]] = None):
+        self.limits = dict(limits or MODEL_LIMITS)
+        self.max_wait = MAX_WAIT
+        self._buckets: Dict[Tuple[str, str], Tuple[TokenBucket, TokenBucket]] = {}
+        self._waiters: Dict[Tuple[str, str], list] = {}
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    def _model_buckets(self, model: str, key: str = "") -> Tuple[TokenBucket, TokenBucket]:
+        bucket_key = _bucket_key(model, key)
+        if bucket_key not in self._buckets:
+            rpm, rpd = self.limits.get(bucket_key[0], DEFAULT_LIMITS)
+            self._buckets[bucket_key] = (TokenBucket(rpm, 60.0), TokenBucket(rpd, 86400.0))
+        return self._buckets[bucket_key]
+
+    def acquire(self, model: str, priority: int = PRIORITY_USER, key: str = "") -> None:
+        deadline = time.monotonic() + self.max_wait
+        ticket = (priority, next(self._seq))
+        short, kid = _bucket_key(model, key)
+        with self._cond:
+            waiters = self._waiters.setdefault((short, kid), [])
+            heapq.heappush(waiters, ticket)
+            try:
+                while True:
+                    now = time.monotonic()
+                    minute, day = self._model_buckets(model, key)
+                    wait = max(minute.wait_time(now), day.wait_time(now))
+                    if waiters[0] == ticket and wait == 0:
+                        minute.take()
+                        day.take()
+                        telemetry.SCHEDULER_REMAINING.set(minute.tokens, model=short, key=kid, window="minute")
+                        telemetry.SCHEDULER_REMAINING.set(day.tokens, model=short, key=kid, window="day")
+                        return
+                    if now + wait > deadline and waiters[0] == ticket:
+                        raise RateLimitTimeout(f"Anggaran {model} habis, perlu menunggu {wait:.0f} detik.")
+                    if now >= deadline:
+                        raise RateLimitTimeout(f"Antrean {model} penuh.")
+                    self._cond.wait(timeout=min(wait or 0.05, deadline - now))
+            finally:
+                waiters.remove(ticket)
+                heapq.heapify(waiters)
+                self._cond.notify_all()
+
+    def penalize(self, model: str, key: str = "") -> None:
+        """Server mengembalikan 429: kosongkan bucket menit agar semua sesi ikut menahan diri."""
+        with self._cond:
+            self._model_buckets(model, key)[0].drain()
+
+    def wait_time(self, model: str, key: str = "") -> float:
+        """Detik hingga (model, key) punya token lagi; 0 = bisa langsung jalan."""
+        with self._cond:
+            now = time.monotonic()
+            minute, day = self._model_buckets(model, key)
+            return max(minute.wait_time(now), day.wait_time(now))
+
+    def remaining(self, model: str, key: str = "") -> Dict[str, int]:
+        with self._cond:
+            now = time.monotonic()
+            minute, day = self._model_buckets(model, key)
+            minute.wait_time(now)
+            day.wait_time(now)
+            return {"rpm": max(0, int(minute.tokens)), "rpd": max(0, int(day.tokens))}
+
+    def run(self, fn: Callable[[], T], model: str, priority: int = PRIORITY_USER,
+            retries: int = MAX_RETRIES, key: str = "") -> T:
+        """Jalankan `fn` setelah mendapat giliran; 429 diulang dengan exponential backoff + jitter."""
+        for attempt in range(retries + 1):
+            self.acquire(model, priority, key)
+            try:
+                return fn()
+            except Exception as e:
+                if not is_quota_error(e) or attempt == retries:
+                    raise
+                telemetry.GEMINI_RETRIES.inc(model=model.split("/", 1)[-1])
+                self.penalize(model, key)
+                time.sleep(BACKOFF_BASE * (2 ** attempt) + random.uniform(0, BACKOFF_BASE))
+        raise RateLimitTimeout(model)  # tidak tercapai
+
+
+scheduler = Scheduler()
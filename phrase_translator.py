@@ -0,0 +1,205 @@
+# phrase_translator.py — penerjemah ID ➜ EN lokal berbasis tabel frasa
+#
+# Teks dipecah menjadi klausa (koma, titik koma, titik, tanda kurung). Klausa
+# yang sama persis dengan satu frasa tabel, atau seluruhnya sudah berbahasa
+# Inggris, diterjemahkan lokal tanpa jaringan. Klausa yang menggabungkan
+# beberapa entri tidak dirakit kata per kata — urutan kata Indonesia ("papan
+# neon") akan terbawa — dan dikirim ke Gemini oleh pemanggil.
+import re
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Frasa ID ➜ EN yang sering muncul di preset. Setiap entri hanya dipakai bila
+# mencakup satu klausa utuh, sehingga urutan kata Inggris selalu dari tabel.
+GLOSSARY: Dict[str, str] = {
+    # Posisi
+    "kiri": "left", "kanan": "right", "tengah": "center", "atas": "top", "bawah": "bottom",
+    "tengah-bawah": "bottom-center", "tengah-atas": "top-center",
+    "kiri-atas": "top-left", "kanan-atas": "top-right",
+    "kiri-bawah": "bottom-left", "kanan-bawah": "bottom-right",
+    "bunga nasional": "national flower",
+    # Efek & teks
+    "konfeti pelangi": "rainbow confetti", "konfeti": "confetti",
+    "konfeti warna buah": "fruit-colored confetti", "konfeti warna tim": "team-colored confetti",
+    "bokeh lembut": "soft bokeh", "bokeh halus": "subtle bokeh", "bokeh warna": "colorful bokeh",
+    "bokeh lampu": "light bokeh", "bokeh digital": "digital bokeh",
+    "outline neon": "neon outline", "outline glow": "glow outline", "outline glow kuat": "strong glow outline",
+    "bintang kuning": "yellow stars", "bintang berkedip": "twinkling stars",
+    "jejak neon": "neon trails", "jejak meteor": "meteor trails", "jejak gelembung": "bubble trails",
+    "neon glow": "neon glow", "glow kuat": "strong glow", "glow lembut kuning": "soft yellow glow",
+    "glitter halus": "fine glitter", "glitter pastel": "pastel glitter", "sparkle emas": "golden sparkle",
+    "sparkle biru": "blue sparkle", "kilau oranye": "orange shimmer", "starburst kuning": "yellow starburst",
+    "efek ledakan kecil": "small burst effects", "percikan neon hijau": "green neon sparks",
+    "asap lembut biru": "soft blue smoke", "glitch lembut": "soft glitch", "glitch ringan": "light glitch",
+    "scanline tipis": "thin scanlines", "efek hologram": "hologram effect",
+    "ekspresi besar": "big expressions", "ekspresi tenang": "calm expression",
+    "balon huruf": "letter balloons", "balok alfabet": "alphabet blocks",
+    "ikon": "icons", "ikon alam": "nature icons", "ikon atom": "atom icons", "ikon nada": "music note icons",
+    "simbol": "symbols", "simbol budaya": "cultural symbols", "lambang": "emblems", "motif": "motifs",
+    "papan": "signs", "plakat": "plaque", "rambu": "signs", "rambu lucu": "funny signs",
+    "kata neon": "neon words", "lencana neon ruang angkasa": "neon space badges",
+    "piringan vinyl neon": "neon vinyl records", "balon": "balloons",
+    # Warna & palet
+    "warna cerah": "bright colors", "palet cerah": "bright palette", "palet pelangi": "rainbow palette",
+    "palet biru-ungu": "blue-purple palette", "palet biru-putih": "blue-white palette",
+    "palet turquoise-koral": "turquoise-coral palette", "aksen neon": "neon accents",
+    "aksen emas-merah": "gold-red accents", "hitam pekat": "pitch black", "tanpa kabut": "no fog",
+    # Cahaya & suasana
+    "pencahayaan alami": "natural lighting", "pencahayaan dramatis": "dramatic lighting",
+    "pencahayaan alami pagi hari": "natural morning lighting",
+    "cahaya alami pagi hari": "natural morning light", "cahaya alami siang hari": "natural daylight",
+    "cahaya pagi": "morning light", "cahaya diagonal": "diagonal light", "cahaya lilin": "candlelight",
+    "bayangan lembut": "soft shadows", "bayangan alami": "natural shadows", "shadow lembut": "soft shadows",
+    "caustic lembut": "soft caustics", "refleksi halus": "subtle reflections",
+    "rim light tipis": "thin rim light", "rim light senja": "dusk rim light",
+    "spotlight panggung": "stage spotlight", "lampu panggung": "stage lights",
+    "suasana hangat": "warm atmosphere", "suasana sakral": "sacred atmosphere",
+    "tropis cerah": "bright tropical", "udara segar": "fresh air", "cuaca cerah": "clear weather",
+    "embun pagi": "morning dew", "kabut pagi": "morning mist",
+    # Latar umum
+    "awan lembut": "soft clouds", "awan kapas": "cotton clouds", "langit cerah": "clear sky",
+    "langit biru cerah": "clear blue sky", "langit dramatis": "dramatic sky",
+    "langit senja lembut": "soft dusk sky", "langit senja oranye": "orange dusk sky",
+    "matahari terbit": "sunrise", "matahari terbenam": "sunset", "pelangi": "rainbow",
+    "aurora": "aurora", "air terjun": "waterfall", "padang rumput": "meadow", "padang hijau": "green field",
+    "bunga liar": "wildflowers", "bukit hijau": "green hills", "terumbu karang": "coral reef",
+    "gerombolan ikan": "schools of fish", "laut biru jernih": "clear blue sea", "ombak laut": "ocean waves",
+    "daun rimba": "jungle leaves", "savana": "savanna", "gunung es": "iceberg", "iglo": "igloo",
+    "tanah merah": "red soil", "gurun alami": "natural desert", "pohon kelapa": "coconut trees",
+    "kincir angin": "windmill", "lumbung merah": "red barn", "gedung kota": "city buildings",
+    "lampu lalu lintas": "traffic lights", "jembatan jauh": "distant bridge", "jembatan besi": "iron bridge",
+    "kota cerah": "bright city", "tenda festival": "festival tents", "tembok kastel": "castle walls",
+    "pasar tradisional": "traditional market", "interior kayu hangat": "warm wooden interior",
+    "panggung kayu hangat": "warm wooden stage", "lapangan salju berkilau": "sparkling snowfield",
+    "latar hitam total untuk fokus karakter": "fully black background to focus on the characters",
+    # Gaya
+    "gaya buku cerita pastel": "pastel storybook style", "gaya gulungan": "scroll style",
+}
+
+# Kosakata Inggris yang sudah umum dipakai apa adanya di prompt (diteruskan tanpa terjemahan)
+EN_WORDS = set("""
+3d 4k 8k f/1.8 f/16 a and art aperture ambient blur cartoon chibi chrome cinematic clean clay claymation
+comic composition cool depth detail detailed documentary dslr edges environmental ethnographic expression
+facial fabric field film fine flat focus gouache golden grain glow ghibli-soft halftone hdri holographic
+hour hyper-detailed hyperrealistic illustration isometric kawaii lighting light line-art long-shadow
+low-poly minimal moonlight motion museum-grade natural neon of oil painting papercraft pastel photorealistic
+pixar plastic playful portrait quality realism realistic render resolution rim sensory shallow skin soft
+spotlight style studio subtle sunlight texture toy trails ultra-detailed ultra-sharp vaporwave voxel
+watercolor weave wind with
+""".split())
+
+# Label papan/banner Inggris dalam kutip ('PANDA','UFO'); hanya dipakai untuk daftar
+# berkutip. Label lain (mis. 'APEL', 'SELAMAT DATANG') tetap diterjemahkan Gemini.
+LABEL_WORDS = set("""
+acrobat africa alien ambulance apple art bamboo banana bear bike blocks boat bounce boomerang buffalo
+bus butterfly carriage castle cat chem cheetah chicken city clown cow crab dance dino dj dog dolphin
+dragon drone duck eagle elephant engine fish fox fun giraffe go gorilla grape hat hippo horse jester
+jump kangaroo knight lab lake lights lion milk monkey mountain mist narwhal orange owl panda pattern
+penguin planet rabbit rice robo robot run sand sea seahorse seal sheep slow snow spin stars station
+steppe stop sun sunrise taxi tea team temple terrace toucan toy tradition train t-rex turtle ufo
+water watermelon weave win wine winter yurt zebra
+""".split())
+
+_TOKEN = re.compile(r"[\w/.'’-]+(?<![.])|[^\w\s]")
+# Pemisah klausa: kelompok (…) utuh, atau tanda baca yang diikuti spasi/akhir teks
+_CLAUSE_SPLIT = re.compile(r"(\([^()]*\)|[,;:.!?]+(?=\s|$))")
+# Daftar label berkutip huruf besar, mis. 'PANDA','ALIEN','UFO'
+_QUOTED_LIST = re.compile(r"^(?:['‘][A-Z0-9][A-Z0-9 &\-]*['’],?\s*)+$")
+_QUOTED_LABEL = re.compile(r"['‘]([^'‘’]*)['’]")
+
+
+def _tokens(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
+
+
+def _is_english_label_list(core: str) -> bool:
+    """Daftar berkutip yang setiap katanya label/kosakata Inggris yang dikenal."""
+    if not _QUOTED_LIST.match(core):
+        return False
+    words = [w for label in _QUOTED_LABEL.findall(core) for w in re.split(r"[\s&]+", label.lower()) if w]
+    return bool(words) and all(w in LABEL_WORDS or w in EN_WORDS or w.isdigit() for w in words)
+
+
+class PhraseTable:
+    """Frasa (urutan token) ➜ terjemahan; hanya klausa yang sama persis dengan satu entri yang cocok."""
+
+    def __init__(self, entries: Optional[Dict[str, str]] = None):
+        self._phrases: Dict[Tuple[str, ...], str] = {}
+        for src, dst in (entries or {}).items():
+            self.add(src, dst)
+
+    def add(self, src: str, dst: str) -> None:
+        self._phrases[tuple(_tokens(src))] = dst
+
+    def lookup(self, toks: List[str]) -> Optional[str]:
+        return self._phrases.get(tuple(toks))
+
+    def translate_clause(self, clause: str) -> Optional[str]:
+        """
+        Terjemahan lokal bila klausa sama dengan satu frasa tabel, atau semua
+        token sudah kosakata Inggris; selain itu None (kirim ke Gemini).
+        """
+        core = clause.strip()
+        if not core:
+            return clause
+        if _is_english_label_list(core):
+            return core
+        toks = _tokens(core)
+        dst = self.lookup(toks)
+        if dst is not None:
+            # Huruf besar di awal klausa dipertahankan
+            return dst[:1].upper() + dst[1:] if core[0].isupper() else dst
+        if all(t in EN_WORDS or re.fullmatch(r"[\d/.x-]+|[^\w\s]", t) for t in toks):
+            return core  # kosakata Inggris diteruskan apa adanya
+        return None
+
+
+def split_clauses(text: str) -> List[Tuple[str, bool]]:
+    """Pecah teks menjadi potongan (teks, perlu_diterjemahkan). Pemisah & spasi ikut apa adanya."""
+    pieces: List[Tuple[str, bool]] = []
+    for part in _CLAUSE_SPLIT.split(text):
+        if not part:
+            continue
+        if part.startswith("(") and part.endswith(")"):
+            pieces += [("(", False), (part[1:-1], True), (")", False)]
+        elif _CLAUSE_SPLIT.fullmatch(part) or not part.strip():
+            pieces.append((part, False))
+        else:
+            lead = part[:len(part) - len(part.lstrip())]
+            trail = part[len(part.rstrip()):]
+            if lead:
+                pieces.append((lead, False))
+            pieces.append((part.strip(), True))
+            if trail:
+                pieces.append((trail, False))
+    return pieces
+
+
+def translate_offline(text: str, table: "PhraseTable") -> Tuple[List[Tuple[str, Optional[str]]], List[str]]:
+    """
+    Kembalikan (potongan, klausa_tidak_dikenal). Setiap potongan berisi
+    (teks ID, teks EN atau None bila harus diterjemahkan dari luar).
+    """
+    pieces: List[Tuple[str, Optional[str]]] = []
+    unknown: List[str] = []
+    for part, translatable in split_clauses(text):
+        en = table.translate_clause(part) if translatable else part
+        if en is None:
+            unknown.append(part)
+        pieces.append((part, en))
+    return pieces, unknown
+
+
+def render(pieces: Iterable[Tuple[str, Optional[str]]], remote: Dict[str, str]) -> str:
+    """Gabungkan hasil lokal dengan terjemahan klausa dari Gemini (fallback: teks asli)."""
+    return "".join(en if en is not None else remote.get(src, src) for src, en in pieces)
+
+
+_table: Optional[PhraseTable] = None
+
+
+def get_phrase_table() -> PhraseTable:
+    """Tabel dibangun sekali per proses (modul tidak dieksekusi ulang saat rerun)."""
+    global _table
+    if _table is None:
+        _table = PhraseTable(GLOSSARY)
+    return _table
@@ -0,0 +1,70 @@
+# preset_library.py — pack template (data/presets.json) dengan indeks pencarian
+import json
+import os
+import re
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set
+
+from shared_state import FileReloader
+
+DEFAULT_PACK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "presets.json")
+SUPPORTED_VERSIONS = {1}
+
+_WORD = re.compile(r"\w+")
+
+
+def _words(text: str) -> List[str]:
+    return _WORD.findall(text.lower())
+
+
+class PresetLibrary:
+    """
+    Template dimuat sekali dari file pack berversi. Indeks terbalik
+    token ➜ judul dibangun dari judul dan kedelapan field, sehingga pencarian
+    kata kunci tidak perlu memindai seluruh teks template.
+    """
+
+    def __init__(self, path: str = DEFAULT_PACK_PATH):
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            pack = json.load(f)
+        self.version = pack.get("version")
+        if self.version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Versi pack template tidak didukung: {self.version!r}")
+        self.presets: Dict[str, Dict[str, str]] = pack["presets"]
+        self._order = {title: i for i, title in enumerate(self.presets)}
+        self._index: Dict[str, Set[str]] = {}
+        for title, fields in self.presets.items():
+            for word in set(_words(title + " " + " ".join(fields.values()))):
+                self._index.setdefault(word, set()).add(title)
+        self._vocab = sorted(self._index)
+
+    def _prefix_matches(self, prefix: str) -> Set[str]:
+        # Kosakata terurut: semua token berawalan `prefix` berada berurutan
+        hits: Set[str] = set()
+        i = bisect_left(self._vocab, prefix)
+        while i < len(self._vocab) and self._vocab[i].startswith(prefix):
+            hits |= self._index[self._vocab[i]]
+            i += 1
+        return hits
+
+    def search(self, query: str) -> List[str]:
+        """Judul yang memuat SEMUA kata kunci (cocok awalan), urut sesuai pack."""
+        words = _words(query)
+        if not words:
+            return list(self.presets)
+        result: Optional[Set[str]] = None
+        for word in sorted(words, key=len, reverse=True):
+            hits = self._prefix_matches(word)
+            result = hits if result is None else result & hits
+            if not result:
+                return []
+        return sorted(result, key=self._order.__getitem__)
+
+
+_library = FileReloader(PresetLibrary)
+
+
+def get_preset_library(path: Optional[str] = None) -> PresetLibrary:
+    """Pack aktif; dimuat ulang otomatis bila file pack berubah (hot reload, lihat shared_state)."""
+    return _library.get(path or os.getenv("XPROMPT_PRESET_PACK", DEFAULT_PACK_PATH))
@@ -0,0 +1,624 @@
+# prompt_core.py — logika inti (tanpa UI): preset, compose, parse, terjemahan
+# Dipakai oleh streamlit_app.py dan jalur headless (batch) tanpa menjalankan UI.
+import logging
+import os
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import re
+from translation_cache import get_translation_cache, make_key
+import gemini_client
+from gemini_cassette import get_cassette
+import telemetry
+from phrase_translator import get_phrase_table, render, translate_offline
+from style_suggest import get_style_suggester
+from gemini_router import is_auth_error, router
+from gemini_scheduler import PRIORITY_BACKGROUND, PRIORITY_USER, RateLimitTimeout, is_quota_error
+
+logger = logging.getLogger(__name__)
+
+FIELD_KEYS = [
+    "Foreground", "Midground", "Background", "Floating Elements",
+    "Central Banner", "Text & Effects", "Background Style", "Style & Lighting"
+]
+
+# -------------------------------
+# Gemini API — robust import/fallback
+# -------------------------------
+def _error_category(e2: Exception) -> str:
+    """Kategori error untuk metrik; cabangnya sama dengan pesan di _friendly_error."""
+    if isinstance(e2, RateLimitTimeout):
+        return "rate_limit_wait"
+    error_msg = str(e2).lower()
+    if is_quota_error(e2):
+        return "quota"
+    elif is_auth_error(e2):
+        return "auth"
+    elif "network" in error_msg or "connection" in error_msg or "timeout" in error_msg:
+        return "network"
+    return "other"
+
+def _friendly_error(e2: Exception) -> Exception:
+    """Ubah error SDK menjadi pesan Indonesia yang siap ditampilkan di UI."""
+    # 🔽 Jangan pernah gunakan RuntimeError di sini!
+    category = _error_category(e2)
+    if category == "rate_limit_wait":
+        return Exception(
+            "⏳ **Batas permintaan tercapai.**\n\n"
+            f"{e2}\n\n"
+            "Coba lagi sebentar lagi, atau pilih model dengan kuota lebih besar."
+        )
+    if category == "quota":
+        return Exception(
+            "❌ **Kuota harian terlampaui!**\n\n"
+            "Anda telah melebihi batas permintaan gratis.\n\n"
+            "🔹 Solusi:\n"
+            "- Gunakan model `gemini-1.5-flash-8b` (kuota 500/hari)\n"
+            "- Tambahkan API key lain (pisahkan dengan koma) atau model cadangan (XPROMPT_FALLBACK_MODELS)\n"
+            "- Hubungkan billing di [Google AI Studio](https://aistudio.google.com/) untuk upgrade\n"
+            "- Tunggu ~24 jam hingga kuota reset"
+        )
+    elif category == "auth":
+        return Exception("❌ **API Key tidak valid.** Periksa kembali GEMINI_API_KEY Anda.")
+    elif category == "network":
+        return Exception("❌ **Gagal koneksi ke Gemini.** Periksa internet atau coba lagi nanti.")
+    else:
+        return Exception(f"❌ **Gagal memanggil Gemini:**\n\n`{str(e2)}`")
+
+def _record_call(model_name: str, kind: str, prompt: str, response: Optional[str], elapsed: float,
+                 error: Optional[Exception] = None) -> None:
+    model = telemetry.model_label(model_name)
+    telemetry.GEMINI_SECONDS.observe(elapsed, model=model, kind=kind, outcome="error" if error else "ok")
+    telemetry.GEMINI_REQUEST_BYTES.observe(telemetry.utf8_len(prompt), model=model, kind=kind)
+    if error is not None:
+        telemetry.GEMINI_ERRORS.inc(model=model, category=_error_category(error))
+    else:
+        telemetry.GEMINI_RESPONSE_BYTES.observe(telemetry.utf8_len(response), model=model, kind=kind)
+
+def _backend():
+    """gemini_client, atau kaset rekam/putar ulang bila XPROMPT_CASSETTE diset (lihat gemini_cassette.py)."""
+    return get_cassette() or gemini_client
+
+def _call_gemini(prompt: str, model_name: str, api_key: str, priority: int = PRIORITY_USER) -> str:
+    start = time.perf_counter()
+    with telemetry.span("gemini.generate", model=model_name, priority=priority, prompt_chars=len(prompt)):
+        try:
+            # Client dipakai ulang per API key; SDK & bentuk nama model dideteksi sekali.
+            # Router memilih (key, model) dari pool dan mengalihkan 429; scheduler membagi
+            # anggaran RPM/RPD per key antar sesi.
+            backend = _backend()
+            text = router.run(lambda r: backend.generate(prompt, r.model, r.api_key), api_key, model_name, priority)
+        except Exception as e2:
+            _record_call(model_name, "text", prompt, None, time.perf_counter() - start, e2)
+            raise _friendly_error(e2)
+    _record_call(model_name, "text", prompt, text, time.perf_counter() - start)
+    return text
+
+def stream_gemini(prompt: str, model_name: str, api_key: str, priority: int = PRIORITY_USER,
+                  timings: Optional[Dict[str, float]] = None) -> Iterator[str]:
+    """
+    Seperti _call_gemini tetapi menghasilkan teks per chunk. `timings` diisi
+    "ttft" (detik hingga chunk pertama) dan "total". 429 sebelum chunk pertama
+    tetap diulang/dialihkan oleh router; error di tengah stream langsung dilaporkan.
+    """
+    start = time.perf_counter()
+    received: List[str] = []
+    error: Optional[Exception] = None
+    with telemetry.span("gemini.generate_stream", model=model_name, priority=priority, prompt_chars=len(prompt)):
+        try:
+            backend = _backend()
+            chunks = router.run(lambda r: backend.generate_stream(prompt, r.model, r.api_key),
+                                api_key, model_name, priority)
+            for i, chunk in enumerate(chunks):
+                if i == 0:
+                    ttft = time.perf_counter() - start
+                    telemetry.GEMINI_TTFT.observe(ttft, model=telemetry.model_label(model_name))
+                    if timings is not None:
+                        timings["ttft"] = ttft
+                if chunk:
+                    received.append(chunk)
+                    yield chunk
+        except Exception as e2:
+            error = e2
+            raise _friendly_error(e2)
+        finally:
+            total = time.perf_counter() - start
+            if timings is not None:
+                timings["total"] = total
+            _record_call(model_name, "stream", prompt, "".join(received), total, error)
+
+# Template (PRESETS) ada di data/presets.json — lihat preset_library.py
+
+STYLE_PRESETS: List[str] = [
+    # --- Gaya Kartun & Ilustrasi ---
+    "3D Pixar (ekspresi besar, outline neon, ultra tajam)",
+    "Claymation 3D (tekstur tanah liat, lighting studio)",
+    "Low-poly 3D pastel (bentuk sederhana)",
+    "Watercolor cartoon (aquarel lembut)",
+    "Neon playful (glow rim light, warna cerah)",
+    "Ghibli-soft (warna natural, ambient warm)",
+    "Halftone comic (tekstur titik komik)",
+    "Kawaii chibi (proporsi imut)",
+    "Line-art minimal (clean strokes)",
+    "Papercraft layered 3D (kertas berlapis)",
+
+    # --- Gaya Realistis & Natural ---
+    "Photorealistic (ultra-detailed, natural skin texture, cinematic lighting)",
+    "DSLR Photography (f/1.8 aperture, shallow depth of field, ambient daylight)",
+    "Hyperrealistic (8K resolution, micro-details, realistic pores and hair)",
+    "Natural Lighting Portrait (soft window light, no flash, warm tone)",
+    "Cinematic Realism (film grain, 35mm, dramatic shadows, realistic atmosphere)",
+    "Documentary Style (on-location, natural expressions, candid moment)",
+    "Studio Portrait (professional lighting, softbox, clean background)",
+    "Environmental Realism (orang asli di habitat alami, pencahayaan alami)",
+    "Ethnographic Realism (detail budaya, pakaian tradisional, ekspresi wajar)",
+    "Fine Art Realism (oil painting style, brush texture, museum-grade detail)",
+
+    # --- Gaya Material & Render ---
+    "Plastic toy render (material mengkilap, HDRI studio)",
+    "Isometric 3D city (geometri rapi)",
+    "Voxel art (blok piksel 3D)",
+    "Gouache illustration (kuas tebal)",
+    "Chalkboard school (tulisan kapur)",
+    "Pastel gradient minimal (soft blend)",
+    "Holographic chrome (reflective, iridescent)",
+    "Retro vaporwave (grid, neon sunset)",
+    "PBR realistic toy (material realistis)"
+]
+
+# -------------------------------
+# Utilities
+# -------------------------------
+# -------------------------------
+# Compose — satu mesin, tabel per bahasa
+# -------------------------------
+TOGGLE_KEYS = ["static_camera", "black_bg", "ultra_sharp", "diag_lighting"]
+
+# Menambah bahasa cukup dengan menambah entri: label tiap field + kalimat tiap toggle
+COMPOSE_LANGS: Dict[str, Dict[str, Dict[str, str]]] = {
+    "EN": {
+        "labels": {k: k for k in FIELD_KEYS},
+        "toggles": {
+            "static_camera": "Camera: perfectly static tripod; no pan, no zoom.",
+            "black_bg": "Background: pure solid black to isolate subjects; avoid ambient fog.",
+            "ultra_sharp": "Rendering: cinematic composition, ultra-sharp focus, clean edges, no blur.",
+            "diag_lighting": "Lighting: dramatic diagonal from bottom-left to top-right.",
+        },
+    },
+    "ID": {
+        "labels": {
+            "Foreground": "Latar Depan",
+            "Midground": "Lapisan Tengah",
+            "Background": "Latar Belakang",
+            "Floating Elements": "Elemen Mengambang",
+            "Central Banner": "Papan Utama",
+            "Text & Effects": "Teks & Efek",
+            "Background Style": "Gaya Latar",
+            "Style & Lighting": "Gaya & Pencahayaan",
+        },
+        "toggles": {
+            "static_camera": "Kamera: statis sempurna dengan tripod; tanpa pan, tanpa zoom.",
+            "black_bg": "Latar: hitam pekat untuk fokus karakter; hindari kabut ambient.",
+            "ultra_sharp": "Rendering: komposisi sinematik, fokus sangat tajam, tepi bersih, tanpa blur.",
+            "diag_lighting": "Pencahayaan: diagonal dramatis dari kiri-bawah ke kanan-atas.",
+        },
+    },
+}
+
+
+class PromptComposer:
+    """Awalan label dan kalimat toggle disiapkan sekali per bahasa, lalu dipakai ulang."""
+
+    def __init__(self, lang: str):
+        table = COMPOSE_LANGS[lang]
+        self.lang = lang
+        self.prefixes = [(k, table["labels"][k] + ": ") for k in FIELD_KEYS]
+        self.toggle_lines = [(t, table["toggles"][t]) for t in TOGGLE_KEYS]
+
+    def _suffix(self, toggles: Dict[str, bool]) -> List[str]:
+        return [line for t, line in self.toggle_lines if toggles.get(t)]
+
+    def compose(self, fields: Dict[str, str], toggles: Dict[str, bool]) -> str:
+        return self.compose_many([fields], toggles)[0]
+
+    def compose_many(self, records: Iterable[Dict[str, str]], toggles: Dict[str, bool]) -> List[str]:
+        """Banyak record dengan toggle yang sama; bagian toggle dibangun sekali untuk semuanya."""
+        prefixes = self.prefixes
+        suffix = self._suffix(toggles)
+        join = " \n".join
+        out: List[str] = []
+        append = out.append
+        for fields in records:
+            get = fields.get
+            parts = [p + v for k, p in prefixes if (v := (get(k) or "").strip())]
+            if suffix:
+                parts += suffix
+            append(join(parts))
+        return out
+
+
+_composers: Dict[str, PromptComposer] = {}
+
+
+def get_composer(lang: str) -> PromptComposer:
+    # Bahasa selain yang terdaftar jatuh ke ID, seperti perilaku compose_prompt_localized sebelumnya
+    lang = lang if lang in COMPOSE_LANGS else "ID"
+    if lang not in _composers:
+        _composers[lang] = PromptComposer(lang)
+    return _composers[lang]
+
+
+def compose_prompt(fields: Dict[str, str], toggles: Dict[str, bool]) -> str:
+    return get_composer("EN").compose(fields, toggles)
+
+def compose_prompt_localized(fields: Dict[str, str], toggles: Dict[str, bool], lang: str) -> str:
+    return get_composer(lang).compose(fields, toggles)
+
+def compose_many(records: Iterable[Dict[str, str]], toggles: Dict[str, bool], lang: str = "EN") -> List[str]:
+    """Compose ribuan record sekaligus (batch/ekspor) dalam satu panggilan."""
+    return get_composer(lang).compose_many(records, toggles)
+
+# Instruksi yang lebih ketat dan spesifik
+TRANSLATE_RULES = (
+    "TRANSLATION TASK: Translate ONLY the content of this structured prompt to English. "
+    "DO NOT add any explanations, notes, or alternative translations. "
+    "DO NOT add any new sections or text outside the prompt structure. "
+    "DO NOT break the format. "
+    "PRESERVE the exact order of sections. "
+    "OUTPUT ONLY the translated prompt in the same format.\n\n"
+    "Convert section labels to EXACTLY these English equivalents:\n"
+    "- 'Latar Depan:' → 'Foreground:'\n"
+    "- 'Lapisan Tengah:' → 'Midground:'\n"
+    "- 'Latar Belakang:' → 'Background:'\n"
+    "- 'Elemen Mengambang:' → 'Floating Elements:'\n"
+    "- 'Papan Utama:' → 'Central Banner:'\n"
+    "- 'Teks & Efek:' → 'Text & Effects:'\n"
+    "- 'Gaya Latar:' → 'Background Style:'\n"
+    "- 'Gaya & Pencahayaan:' → 'Style & Lighting:'\n\n"
+)
+
+SECTION_INSTR_VERSION = "section-v1"
+PHRASE_SECTION_INSTR_VERSION = "section-phrase-v2"  # section dirakit dari tabel frasa + klausa Gemini
+
+def _section_version() -> str:
+    """Versi cache per bagian untuk jalur aktif, agar XPROMPT_PHRASE_TABLE=0 tidak menyajikan hasil tabel frasa."""
+    return PHRASE_SECTION_INSTR_VERSION if USE_PHRASE_TABLE else SECTION_INSTR_VERSION
+
+def translate_fields_to_english(fields: Dict[str, str], toggles: Dict[str, bool], api_key: str, model: str,
+                                warn: Optional[Callable[[str], None]] = None) -> str:
+    """
+    Terjemahkan per bagian: setiap field di-cache sendiri, hanya bagian yang
+    berubah yang dikirim ke Gemini. Baris toggle memakai teks Inggris tetap
+    dari compose_prompt sehingga tidak pernah dikirim ke API.
+    `warn` menerima pesan kegagalan (UI memakai st.warning / pengumpul pesan).
+    """
+    telemetry.TRANSLATE_CALLS.inc(fn="translate_fields_to_english")
+    id_fields = {k: (fields.get(k) or "").strip() for k in FIELD_KEYS}
+    if not api_key or not any(id_fields.values()):
+        return compose_prompt_localized(fields, toggles, lang="ID")
+
+    cache = get_translation_cache()
+    en_fields: Dict[str, str] = {}
+    pending: Dict[str, str] = {}
+    for key, val in id_fields.items():
+        if not val:
+            continue
+        cached = cache.get(make_key(val, model, _section_version()))
+        if cached is not None:
+            en_fields[key] = cached
+        else:
+            pending[key] = val
+
+    if pending and USE_PHRASE_TABLE:
+        translated = _translate_section_values(list(pending.values()), api_key, model, warn)
+        for key, val in pending.items():
+            en_fields[key] = translated.get(val) or val
+    elif pending:
+        try:
+            instr = (
+                "TRANSLATION TASK: Translate ONLY the content of each line to English. "
+                "DO NOT add any explanations, notes, or alternative translations. "
+                "Keep one line per section and convert the labels to EXACTLY these English equivalents: "
+                "Latar Depan → Foreground, Lapisan Tengah → Midground, Latar Belakang → Background, "
+                "Elemen Mengambang → Floating Elements, Papan Utama → Central Banner, "
+                "Teks & Efek → Text & Effects, Gaya Latar → Background Style, "
+                "Gaya & Pencahayaan → Style & Lighting.\n\n"
+                "Here is the prompt to translate:"
+            )
+            payload = f"{instr}\n{compose_prompt_localized(pending, {}, lang='ID')}"
+            translated = parse_sections(_call_gemini(payload, model, api_key, priority=PRIORITY_BACKGROUND))
+            for key, val in pending.items():
+                en = (translated.get(key) or "").strip()
+                if en:
+                    cache.put(make_key(val, model, SECTION_INSTR_VERSION), en)
+                    en_fields[key] = en
+                else:
+                    en_fields[key] = val  # Bagian gagal diparse: tampilkan teks asli
+        except Exception as e:
+            (warn or logger.warning)(f"Terjemahan gagal: {e}")
+            for key, val in pending.items():
+                en_fields[key] = val
+
+    return compose_prompt(en_fields, toggles)
+
+# -------------------------------
+# Terjemahan terpaket (banyak prompt dalam satu request)
+# -------------------------------
+PACK_SIZE = 20
+
+PACK_RULES = (
+    "You will receive several numbered prompts, each starting with a marker line like '### 1 ###'. "
+    "Translate every prompt independently. Repeat each marker line EXACTLY, followed by its translation. "
+    "DO NOT merge, skip or reorder prompts.\n\n"
+    "Here are the prompts to translate:"
+)
+
+_PACK_MARKER = re.compile(r"^\s*#{3}\s*(\d+)\s*#{3}\s*$", re.M)
+
+def _call_packed(items: List[str], api_key: str, model: str, rules: str = TRANSLATE_RULES) -> Dict[int, str]:
+    """
+    Satu request untuk banyak item; blok instruksi dikirim sekali. Kunci hasil =
+    indeks item (0-based). Penanda harus tepat 1..n berurutan — bila ada yang
+    hilang, ganda atau tertukar, potongan tidak bisa dipercaya dan hasilnya kosong
+    (semua item diulang sendiri oleh pemanggil).
+    """
+    body = "\n".join(f"### {i} ###\n{text}" for i, text in enumerate(items, 1))
+    response = _call_gemini(f"{rules}{PACK_RULES}\n{body}", model, api_key, priority=PRIORITY_BACKGROUND)
+    marks = list(_PACK_MARKER.finditer(response))
+    if [int(m.group(1)) for m in marks] != list(range(1, len(items) + 1)):
+        logger.warning("Respons paket tidak sesuai: %d penanda untuk %d item", len(marks), len(items))
+        return {}
+    return {i: response[m.end():nxt.start() if nxt else len(response)].strip()
+            for i, (m, nxt) in enumerate(zip(marks, marks[1:] + [None]))}
+
+def _packed_translate(items: List[str], api_key: str, model: str,
+                      validate: Callable[[str, str], Optional[str]],
+                      single: Callable[[str], Optional[str]],
+                      pack_size: int, warn: Optional[Callable[[str], None]],
+                      rules: str = TRANSLATE_RULES) -> List[Optional[str]]:
+    """Kirim item per paket; item yang tidak lolos `validate` diulang sendiri lewat `single`."""
+    results: List[Optional[str]] = [None] * len(items)
+    for start in range(0, len(items), max(1, pack_size)):
+        batch = items[start:start + pack_size]
+        try:
+            chunks = _call_packed(batch, api_key, model, rules) if len(batch) > 1 else {}
+        except Exception as e:
+            (warn or logger.warning)(f"Terjemahan paket gagal: {e}")
+            chunks = {}
+        for i, text in enumerate(batch):
+            out = validate(text, chunks[i]) if i in chunks else None
+            results[start + i] = out if out is not None else single(text)
+    return results
+
+def prewarm_section_cache(records: List[Dict[str, str]], api_key: str, model: str,
+                          pack_size: int = PACK_SIZE, warn: Optional[Callable[[str], None]] = None) -> int:
+    """
+    Isi cache per bagian (dipakai translate_fields_to_english) untuk banyak
+    record sekaligus dengan request berpaket. Kembalikan jumlah bagian yang diproses.
+    """
+    if not api_key:
+        return 0
+    if USE_PHRASE_TABLE:
+        vals = {(fields.get(k) or "").strip() for fields in records for k in FIELD_KEYS} - {""}
+        return len(_translate_section_values(sorted(vals), api_key, model, warn, pack_size=pack_size))
+    cache = get_translation_cache()
+    pending: Dict[str, str] = {}  # teks ID -> kunci field (untuk label)
+    for fields in records:
+        for key in FIELD_KEYS:
+            val = (fields.get(key) or "").strip()
+            if val and val not in pending and cache.get(make_key(val, model, SECTION_INSTR_VERSION)) is None:
+                pending[val] = key
+
+    vals = list(pending)
+    lines = compose_many([{pending[v]: v} for v in vals], {}, lang="ID")
+    by_line = dict(zip(lines, vals))
+
+    def validate(line: str, chunk: str) -> Optional[str]:
+        val = by_line[line]
+        parsed = parse_sections(chunk)
+        en = (parsed.get(pending[val]) or "").strip()
+        if not en or len(parsed) != 1:  # potongan harus tepat satu section milik item ini
+            return None
+        cache.put(make_key(val, model, SECTION_INSTR_VERSION), en)
+        return en
+
+    def single(line: str) -> Optional[str]:
+        val = by_line[line]
+        warnings: List[str] = []
+        translate_fields_to_english({pending[val]: val}, {}, api_key, model, warn=warnings.append)
+        return None if warnings else val
+
+    done = _packed_translate(lines, api_key, model, validate, single, pack_size, warn)
+    return sum(1 for d in done if d is not None)
+
+# -------------------------------
+# Tabel frasa lokal + Gemini hanya untuk klausa yang tidak dikenal
+# -------------------------------
+USE_PHRASE_TABLE = os.getenv("XPROMPT_PHRASE_TABLE", "1") != "0"
+CLAUSE_INSTR_VERSION = "clause-v1"
+
+CLAUSE_RULES = (
+    "TRANSLATION TASK: Translate Indonesian fragments of an image-generation prompt to English. "
+    "Each fragment is part of a longer description; translate it literally and keep it a fragment. "
+    "Keep text inside quotes in quotes. "
+    "DO NOT add any explanations, notes, or alternative translations.\n\n"
+)
+
+def _first_line(text: str) -> str:
+    return next((l.strip() for l in text.splitlines() if l.strip()), "")
+
+def _translate_section_values(values: List[str], api_key: str, model: str,
+                              warn: Optional[Callable[[str], None]] = None,
+                              pack_size: int = PACK_SIZE) -> Dict[str, str]:
+    """
+    Terjemahkan nilai section: klausa yang dikenal tabel frasa diterjemahkan
+    lokal, sisanya (yang belum ada di cache) dikirim berpaket ke Gemini.
+    Section yang seluruh klausanya terjemahkan disimpan di cache per bagian.
+    """
+    cache = get_translation_cache()
+    table = get_phrase_table()
+    split = {val: translate_offline(val, table) for val in values}
+    remote: Dict[str, str] = {}
+    need: List[str] = []
+    for _, unknown in split.values():
+        for clause in unknown:
+            if clause in remote or clause in need:
+                continue
+            cached = cache.get(make_key(clause, model, CLAUSE_INSTR_VERSION))
+            if cached is not None:
+                remote[clause] = cached
+            else:
+                need.append(clause)
+
+    def validate(clause: str, chunk: str) -> Optional[str]:
+        lines = [l.strip() for l in chunk.splitlines() if l.strip()]
+        if len(lines) != 1:  # klausa = satu potongan; lebih dari satu baris berarti tercampur/penjelasan
+            return None
+        cache.put(make_key(clause, model, CLAUSE_INSTR_VERSION), lines[0])
+        return lines[0]
+
+    def single(clause: str) -> Optional[str]:
+        try:
+            resp = _call_gemini(f"{CLAUSE_RULES}Here is the fragment to translate:\n{clause}", model, api_key,
+                                priority=PRIORITY_BACKGROUND)
+        except Exception as e:
+            (warn or logger.warning)(f"Terjemahan gagal: {e}")
+            return None
+        return validate(clause, _first_line(resp))  # satu item: ambil baris terjemahannya saja
+
+    if need:
+        for clause, en in zip(need, _packed_translate(need, api_key, model, validate, single,
+                                                      pack_size, warn, rules=CLAUSE_RULES)):
+            if en is not None:
+                remote[clause] = en
+
+    out: Dict[str, str] = {}
+    for val, (pieces, unknown) in split.items():
+        if all(c in remote for c in unknown):
+            out[val] = render(pieces, remote)
+            cache.put(make_key(val, model, PHRASE_SECTION_INSTR_VERSION), out[val])
+    return out
+
+# Label bagian (ID/EN, huruf kecil) ➜ kunci standar — satu tabel untuk parse_sections
+KEY_ALIASES = {
+    "foreground": "Foreground", "latar depan": "Foreground",
+    "midground": "Midground", "lapisan tengah": "Midground",
+    "background": "Background", "latar belakang": "Background",
+    "floating elements": "Floating Elements", "elemen mengambang": "Floating Elements",
+    "central banner": "Central Banner", "papan utama": "Central Banner",
+    "text & effects": "Text & Effects", "teks & efek": "Text & Effects",
+    "background style": "Background Style", "gaya latar": "Background Style",
+    "style & lighting": "Style & Lighting", "gaya & pencahayaan": "Style & Lighting",
+}
+
+def get_suggested_text_effects(style_lighting: str) -> str:
+    """
+    Berikan saran otomatis untuk Text & Effects berdasarkan Style & Lighting.
+    Kata kunci & bobot ada di data/style_suggestions.json (lihat style_suggest.py).
+    """
+    return get_style_suggester().suggest(style_lighting)["Text & Effects"]
+
+# Satu regex untuk semua baris: label (alias terpanjang dulu agar "Background
+# Style" tidak terbaca sebagai "Background"), **bold** opsional, titik dua
+# opsional. Baris tanpa label cocok sebagai lanjutan (grup `label` kosong).
+_SECTION_LINE = re.compile(
+    r"^\s*(?:\*\*)?\s*"
+    r"(?:(?P<label>" + "|".join(re.escape(a) for a in sorted(KEY_ALIASES, key=len, reverse=True)) + r")"
+    r"\s*(?:\*\*)?\s*(?::|(?=\s)|$)\s*(?:\*\*)?)?"
+    r"\s*(?P<value>.*)",
+    re.IGNORECASE,
+)
+
+
+class SectionParser:
+    """
+    Parser bagian berlabel yang bisa diumpan bertahap (mis. potongan stream).
+    Hanya baris lengkap yang diproses; sisa baris terakhir ditahan sampai
+    `close()` atau potongan berikutnya membawa baris baru.
+    """
+
+    def __init__(self):
+        self._parts: Dict[str, List[str]] = {}
+        self._current: Optional[str] = None
+        self._tail = ""
+
+    def _line(self, line: str) -> None:
+        m = _SECTION_LINE.match(line)
+        label, value = m.group("label"), m.group("value").rstrip()
+        if value.endswith("**"):
+            value = value[:-2].rstrip()
+        if label:
+            self._current = KEY_ALIASES[label.lower()]
+            self._parts[self._current] = [value] if value else []
+        elif value and self._current:
+            self._parts[self._current].append(value)
+
+    def feed(self, chunk: str) -> "SectionParser":
+        lines = (self._tail + chunk).split("\n")
+        self._tail = lines.pop()
+        for line in lines:
+            self._line(line)
+        return self
+
+    def close(self) -> Dict[str, str]:
+        if self._tail:
+            self._line(self._tail)
+            self._tail = ""
+        return self.sections
+
+    @property
+    def sections(self) -> Dict[str, str]:
+        """Bagian dari baris yang sudah lengkap sejauh ini."""
+        return {k: " ".join(v) for k, v in self._parts.items()}
+
+
+def parse_sections(text: str) -> Dict[str, str]:
+    """
+    Parse teks prompt (ID/EN) menjadi bagian-bagian struktur.
+    Mendukung format: "Foreground:", "Latar Depan:", "**Central Banner:**", dll.
+    """
+    parser = SectionParser()
+    for line in text.splitlines():
+        parser._line(line)
+    return parser.sections
+
+def build_theme_prompt(theme: str, bias: str) -> str:
+    """Prompt seniman konsep untuk 'Generate dari Tema Custom'."""
+    return f"""
+Anda adalah seniman konsep sangat berpengalaman dan bersertifikat international. Buat prompt scene rinci berdasarkan tema: {theme}.
+Gunakan STRUKTUR PERSIS BERIKUT (hanya gunakan label ini, satu per baris):
+
+Foreground: [deskripsi karakter utama]
+Midground: [elemen pendukung]
+Background: [lingkungan jauh]
+Floating Elements: [elemen mengambang seperti balon, neon]
+Central Banner: [judul utama + gaya]
+Text & Effects: [teks promosi + efek visual]
+Background Style: [gaya latar belakang]
+Style & Lighting: [gaya visual dan pencahayaan]
+
+Gunakan bahasa Indonesia. Jangan gunakan bold, jangan tambahkan komentar.
+Tambahkan detail visual yang menyenangkan anak-anak atau dewasa sesuai dengan tema yang di inginkan atau di tulis di tema custom.
+{bias}
+"""
+
+def one_line(text: str) -> str:
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+def build_export_payload(fields: Dict[str, str], toggles: Dict[str, bool], text_id: str, text_en: str,
+                         one_line_id: Optional[str] = None, one_line_en: Optional[str] = None,
+                         enhanced_en: str = "", variations_en: str = "",
+                         variations: Optional[List[Dict[str, str]]] = None) -> Dict:
+    """Bentuk payload "Export JSON" (juga dipakai sebagai baris output batch)."""
+    return {
+        "fields": fields,
+        "toggles": toggles,
+        "outputs": {
+            "id": text_id or "",
+            "en": text_en or "",
+            "one_line_id": (one_line(text_id) if one_line_id is None else one_line_id) or "",
+            "one_line_en": (one_line(text_en) if one_line_en is None else one_line_en) or "",
+            "enhanced_en": enhanced_en or "",
+            "variations_en": variations_en or "",
+            "variations": variations or [],  # record per variasi (kunci FIELD_KEYS)
+        }
+    }
@@ -0,0 +1,155 @@
+# prompt_history.py — riwayat hasil generate persisten (SQLite + indeks FTS5)
+#
+# Setiap hasil (tema custom, terjemahan, enhance, variasi) disimpan dalam bentuk
+# payload "Export JSON" sehingga bisa dimuat kembali ke builder tanpa panggilan
+# API. Teks ID dan EN diindeks FTS5 (external content, disinkronkan trigger);
+# halaman pencarian diurutkan dari yang terbaru lewat rowid, sehingga LIMIT
+# berhenti begitu satu halaman terkumpul meski tabel berisi ratusan ribu baris.
+#
+# Riwayat dipakai bersama semua sesi dalam satu instalasi, seperti cache
+# terjemahan. XPROMPT_HISTORY_PATH=:memory: untuk riwayat sementara.
+import json
+import os
+import re
+import threading
+import time
+import zlib
+from hashlib import sha256
+from typing import Dict, List, NamedTuple, Optional
+
+from prompt_core import one_line
+from shared_state import ProcessSingleton, open_sqlite
+
+DEFAULT_HISTORY_PATH = os.path.join(".cache", "history.sqlite3")
+DEFAULT_MAX_ENTRIES = 500000
+EVICT_EVERY = 1000  # cek batas jumlah entri setiap sekian insert, bukan tiap insert
+# Sudah ada di kolom text_id/text_en (atau turunannya): tidak disimpan lagi di payload
+_DERIVED_OUTPUTS = ("id", "en", "one_line_id", "one_line_en")
+
+_WORD = re.compile(r"\w+")
+
+_SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS history ("
+    " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+    " created REAL NOT NULL,"
+    " kind TEXT NOT NULL,"
+    " title TEXT NOT NULL,"
+    " text_id TEXT NOT NULL,"
+    " text_en TEXT NOT NULL,"
+    " payload BLOB NOT NULL,"
+    " digest TEXT NOT NULL UNIQUE)",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5("
+    " title, text_id, text_en, content='history', content_rowid='id',"
+    " tokenize='unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS history_ai AFTER INSERT ON history BEGIN"
+    " INSERT INTO history_fts(rowid, title, text_id, text_en) VALUES (new.id, new.title, new.text_id, new.text_en);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS history_ad AFTER DELETE ON history BEGIN"
+    " INSERT INTO history_fts(history_fts, rowid, title, text_id, text_en)"
+    " VALUES ('delete', old.id, old.title, old.text_id, old.text_en);"
+    " END",
+]
+
+
+class HistoryEntry(NamedTuple):
+    id: int
+    created: float
+    kind: str
+    title: str
+    preview: str
+
+
+def fts_query(query: str) -> str:
+    """Kata pencarian ➜ query FTS5 aman: setiap kata sebagai awalan, semua wajib ada."""
+    return " ".join(f'"{w}"*' for w in _WORD.findall(query.lower()))
+
+
+class PromptHistory:
+    """
+    Satu koneksi per proses, dilindungi lock (seperti TranslationCache).
+    Payload identik tidak disimpan dua kali: versi lama dihapus dan yang baru
+    menjadi entri terbaru.
+    """
+
+    def __init__(self, path: str = DEFAULT_HISTORY_PATH, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._inserts = 0
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path, synchronous="NORMAL")
+        for stmt in _SCHEMA:
+            self._conn.execute(stmt)
+
+    def record(self, kind: str, title: str, payload: Dict) -> int:
+        outputs = payload.get("outputs", {})
+        body = json.dumps(payload, ensure_ascii=False, sort_keys=True)
+        digest = sha256(f"{kind}\x00{body}".encode("utf-8")).hexdigest()
+        rest = dict(payload, outputs={k: v for k, v in outputs.items() if k not in _DERIVED_OUTPUTS})
+        blob = zlib.compress(json.dumps(rest, ensure_ascii=False).encode("utf-8"))
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute("DELETE FROM history WHERE digest = ?", (digest,))
+                cur = self._conn.execute(
+                    "INSERT INTO history (created, kind, title, text_id, text_en, payload, digest)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (time.time(), kind, title, outputs.get("id", ""), outputs.get("en", ""), blob, digest),
+                )
+                self._inserts += 1
+                if self.max_entries and self._inserts % EVICT_EVERY == 0:
+                    self._conn.execute(
+                        "DELETE FROM history WHERE id <= ("
+                        " SELECT id FROM history ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                        (self.max_entries,),
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            return cur.lastrowid
+
+    def search(self, query: str = "", limit: int = 10, offset: int = 0) -> List[HistoryEntry]:
+        """Entri terbaru dulu; `query` kosong = semua entri."""
+        match = fts_query(query)
+        columns = "h.id, h.created, h.kind, h.title, substr(h.text_id, 1, 160)"
+        with self._lock:
+            if match:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM history_fts JOIN history h ON h.id = history_fts.rowid"
+                    " WHERE history_fts MATCH ? ORDER BY history_fts.rowid DESC LIMIT ? OFFSET ?",
+                    (match, limit, offset),
+                ).fetchall()
+            else:
+                rows = self._conn.execute(
+                    f"SELECT {columns} FROM history h ORDER BY h.id DESC LIMIT ? OFFSET ?",
+                    (limit, offset),
+                ).fetchall()
+        return [HistoryEntry(*row) for row in rows]
+
+    def get(self, entry_id: int) -> Optional[Dict]:
+        """Payload lengkap (bentuk build_export_payload) atau None bila sudah tidak ada."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, text_id, text_en FROM history WHERE id = ?", (entry_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        payload = json.loads(zlib.decompress(row[0]))
+        outputs = payload.setdefault("outputs", {})
+        outputs.update(id=row[1], en=row[2], one_line_id=one_line(row[1]), one_line_en=one_line(row[2]))
+        return payload
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM history").fetchone()[0]
+        return {"entries": entries}
+
+
+_history = ProcessSingleton(lambda: PromptHistory(
+    os.getenv("XPROMPT_HISTORY_PATH", DEFAULT_HISTORY_PATH),
+    max_entries=int(os.getenv("XPROMPT_HISTORY_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+))
+
+
+def get_prompt_history() -> PromptHistory:
+    return _history.get()
@@ -0,0 +1,134 @@
+# rerun_profiler.py — stempel waktu per fase untuk setiap rerun Streamlit
+#
+# Aktif bila XPROMPT_PROFILE=1 atau URL memuat ?profile=1. Opsi:
+#   XPROMPT_PROFILE_WINDOW   jumlah rerun terakhir yang disimpan per sesi (default 20)
+#   XPROMPT_PROFILE_SLOW_MS  bila diset, rerun dijalankan di bawah cProfile dan yang lebih
+#                            lambat dari ambang ini di-dump ke XPROMPT_PROFILE_DIR (.prof)
+import cProfile
+import functools
+import html
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+DEFAULT_WINDOW = 20
+DEFAULT_DUMP_DIR = os.path.join(".cache", "profiles")
+
+_local = threading.local()  # profiler aktif untuk thread skrip sesi ini
+
+
+def is_enabled(query_value: Optional[str] = None) -> bool:
+    return os.getenv("XPROMPT_PROFILE", "") not in ("", "0") or query_value in ("1", "true")
+
+
+def current() -> Optional["RerunProfiler"]:
+    return getattr(_local, "profiler", None)
+
+
+def mark(phase: str) -> None:
+    """Tutup fase berjalan dan mulai `phase`; tanpa biaya bila profiling mati."""
+    profiler = current()
+    if profiler is not None:
+        profiler.mark(phase)
+
+
+class RerunProfiler:
+    """
+    Fase berurutan berbasis penanda: setiap mark() menutup fase sebelumnya,
+    sehingga skrip tidak perlu dibungkus blok `with` per bagian.
+    """
+
+    def __init__(self, label: str = "rerun", slow_ms: Optional[float] = None,
+                 dump_dir: str = DEFAULT_DUMP_DIR):
+        self.label = label
+        self.slow_ms = slow_ms
+        self.dump_dir = dump_dir
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._phases: List[Dict] = []
+        self._profile: Optional[cProfile.Profile] = None
+        stale = current()
+        if stale is not None and stale._profile is not None:
+            stale._profile.disable()  # rerun sebelumnya terputus (mis. st.rerun) sebelum finish()
+        if slow_ms is not None:
+            self._profile = cProfile.Profile()
+            try:
+                self._profile.enable()
+            except ValueError:  # profiler lain sedang aktif (mis. sesi lain di Python 3.12+)
+                self._profile = None
+        _local.profiler = self
+
+    @property
+    def running(self) -> bool:
+        return current() is self
+
+    def _close(self, now: float) -> None:
+        if self._phases and self._phases[-1]["duration"] is None:
+            self._phases[-1]["duration"] = now - self._t0 - self._phases[-1]["offset"]
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self._close(now)
+        self._phases.append({"name": phase, "offset": now - self._t0, "duration": None})
+
+    def finish(self) -> Dict:
+        now = time.perf_counter()
+        self._close(now)
+        if self.running:
+            _local.profiler = None
+        total = now - self._t0
+        record = {"label": self.label, "started": self.started, "total": total,
+                  "phases": self._phases, "dump": None}
+        if self._profile is not None:
+            self._profile.disable()
+            if total * 1000 >= self.slow_ms:
+                os.makedirs(self.dump_dir, exist_ok=True)
+                stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+                name = f"{self.label.replace(':', '-')}-{stamp}-{int(total * 1000)}ms.prof"
+                record["dump"] = os.path.join(self.dump_dir, name)
+                self._profile.dump_stats(record["dump"])
+        return record
+
+
+def profiled(phase: str, factory: Callable[[str], Optional[RerunProfiler]],
+             sink: Callable[[Dict], None]) -> Callable:
+    """
+    Dekorator untuk fungsi fragmen. Dalam rerun penuh, fragmen hanya menjadi
+    fase berikutnya; bila fragmen rerun sendiri, ia dicatat sebagai rerun
+    terpisah berlabel "fragment:<fase>".
+    """
+    def decorate(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if current() is not None:
+                mark(phase)
+                return fn(*args, **kwargs)
+            profiler = factory(f"fragment:{phase}")
+            if profiler is None:
+                return fn(*args, **kwargs)
+            profiler.mark(phase)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                sink(profiler.finish())
+        return wrapper
+    return decorate
+
+
+def waterfall_html(record: Dict) -> str:
+    """Baris waterfall (nama, offset, durasi, batang) sebagai HTML sederhana."""
+    total = max(record["total"], 1e-9)
+    rows = []
+    for p in record["phases"]:
+        left = 100 * p["offset"] / total
+        width = min(max(0.5, 100 * (p["duration"] or 0) / total), 100 - left)
+        rows.append(
+            "<div style='display:flex;align-items:center;font-size:12px;line-height:18px'>"
+            f"<div style='width:38%;overflow:hidden;white-space:nowrap'>{html.escape(p['name'])}</div>"
+            f"<div style='width:14%;text-align:right;padding-right:6px'>{(p['duration'] or 0) * 1000:.1f} ms</div>"
+            "<div style='width:48%;position:relative;height:10px;background:#eef1f8'>"
+            f"<div style='position:absolute;left:{left:.2f}%;width:{width:.2f}%;height:10px;background:#6c8cff'></div>"
+            "</div></div>"
+        )
+    return "".join(rows)
@@ -0,0 +1,109 @@
+# session_outputs.py — satu record hasil per sesi + unduhan yang dibangun saat diminta
+#
+# Sebelumnya setiap rerun menyalin teks hasil ke beberapa key session_state dan
+# mengirim isi ketujuh tombol unduh (termasuk JSON export ber-indent) ke browser,
+# diklik atau tidak. Kini teks kanonis disimpan sekali di SessionOutputs; versi
+# one-line, teks variasi dan payload export diturunkan hanya ketika pengguna
+# memilih unduhan tersebut.
+import json
+import sys
+from collections import deque
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from prompt_core import build_export_payload, compose_prompt_localized, one_line
+from variations import render_variations
+
+
+class SessionOutputs:
+    """
+    Hasil milik satu sesi. Field dan toggle tidak disimpan di sini: keduanya
+    sudah ada di session_state (key widget) dan diberikan saat unduhan dibangun.
+    """
+
+    __slots__ = ("text_id", "text_en", "enhanced_en", "variations")
+
+    def __init__(self):
+        self.text_id: Optional[str] = None     # None = ikuti komposisi field saat ini
+        self.text_en: str = ""
+        self.enhanced_en: str = ""
+        self.variations: List[Dict[str, str]] = []
+
+    def resolve_id(self, fields: Dict[str, str], toggles: Dict[str, bool]) -> str:
+        return self.text_id if self.text_id is not None else compose_prompt_localized(fields, toggles, lang="ID")
+
+    def export_payload(self, fields: Dict[str, str], toggles: Dict[str, bool]) -> Dict:
+        return build_export_payload(
+            fields, toggles, self.resolve_id(fields, toggles), self.text_en,
+            enhanced_en=self.enhanced_en,
+            variations_en=render_variations(self.variations, toggles),
+            variations=self.variations,
+        )
+
+
+class Download(NamedTuple):
+    label: str
+    file_name: str
+    mime: str
+    build: Callable[[SessionOutputs, Dict[str, str], Dict[str, bool]], str]
+    available: Callable[[SessionOutputs], bool]
+
+
+DOWNLOADS: Dict[str, Download] = {
+    "id": Download("ID.txt", "prompt_id.txt", "text/plain",
+                   lambda o, f, t: o.resolve_id(f, t), lambda o: True),
+    "id_one_line": Download("One-line ID.txt", "prompt_id_oneline.txt", "text/plain",
+                            lambda o, f, t: one_line(o.resolve_id(f, t)), lambda o: True),
+    "en": Download("EN.txt", "prompt_en.txt", "text/plain",
+                   lambda o, f, t: o.text_en, lambda o: bool(o.text_en.strip())),
+    "en_one_line": Download("One-line EN.txt", "prompt_en_oneline.txt", "text/plain",
+                            lambda o, f, t: one_line(o.text_en), lambda o: bool(o.text_en.strip())),
+    "enhanced": Download("Enhanced EN.txt", "prompt_enhanced.txt", "text/plain",
+                         lambda o, f, t: o.enhanced_en, lambda o: bool(o.enhanced_en.strip())),
+    "variations": Download("Variations EN.txt", "prompts_variations.txt", "text/plain",
+                           lambda o, f, t: render_variations(o.variations, t), lambda o: bool(o.variations)),
+    "export": Download("Export JSON", "prompt_export.json", "application/json",
+                       lambda o, f, t: json.dumps(o.export_payload(f, t), ensure_ascii=False, indent=2),
+                       lambda o: True),
+}
+
+
+def available_downloads(outputs: SessionOutputs) -> List[str]:
+    return [k for k, d in DOWNLOADS.items() if d.available(outputs)]
+
+
+def build_download(kind: str, outputs: SessionOutputs, fields: Dict[str, str], toggles: Dict[str, bool]) -> bytes:
+    return DOWNLOADS[kind].build(outputs, fields, toggles).encode("utf-8")
+
+
+# -------------------------------
+# Ukuran memori per sesi
+# -------------------------------
+_CONTAINERS = (dict, list, tuple, set, frozenset, deque)
+
+
+def deep_sizeof(obj: object, seen: Optional[set] = None) -> int:
+    """
+    Perkiraan byte yang ditahan `obj`: kontainer bawaan dan SessionOutputs
+    ditelusuri; objek yang sama (mis. string yang dibagi) dihitung sekali.
+    Objek lain (Future, lock) hanya dihitung ukuran dirinya.
+    """
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, _CONTAINERS):
+        size += sum(deep_sizeof(v, seen) for v in obj)
+    elif isinstance(obj, SessionOutputs):
+        size += sum(deep_sizeof(getattr(obj, s), seen) for s in obj.__slots__)
+    return size
+
+
+def session_memory(state: Dict[str, object]) -> Dict[str, int]:
+    """Byte per key session_state, terbesar dulu; string yang dibagi antar key dihitung di key pertama."""
+    seen: set = set()
+    sizes = {str(k): deep_sizeof(v, seen) for k, v in state.items()}
+    return dict(sorted(sizes.items(), key=lambda kv: -kv[1]))
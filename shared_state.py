@@ -0,0 +1,77 @@
+# shared_state.py — objek per proses yang dipakai bersama semua sesi
+#
+# Modul tidak dieksekusi ulang saat rerun Streamlit, jadi objek yang mahal
+# dibangun (koneksi SQLite, indeks, automaton) cukup dibuat sekali per proses
+# lalu dibagi semua sesi. Helper di sini dipakai cache terjemahan, cache tema,
+# riwayat, pack template dan tabel saran gaya.
+import os
+import sqlite3
+import threading
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def open_sqlite(path: str, synchronous: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Koneksi SQLite yang dibagi antar thread (akses dijaga lock pemanggil),
+    autocommit dan WAL; folder dibuat bila belum ada. ":memory:" untuk sementara.
+    """
+    if path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    if synchronous:
+        conn.execute(f"PRAGMA synchronous={synchronous}")
+    return conn
+
+
+class ProcessSingleton(Generic[T]):
+    """Satu instance per proses, dibuat malas oleh `factory` pada pemanggilan `get` pertama."""
+
+    def __init__(self, factory: Callable[[], T]):
+        self._factory = factory
+        self._value: Optional[T] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> T:
+        with self._lock:
+            if self._value is None:
+                self._value = self._factory()
+            return self._value
+
+
+class FileReloader(Generic[T]):
+    """
+    Objek yang dimuat dari satu file data dan dimuat ulang saat mtime berubah
+    (hot reload). Bila versi baru gagal dimuat (rusak/sedang ditulis), versi
+    terakhir yang valid tetap dipakai dan file yang sama tidak dicoba lagi
+    sampai berubah. Pemuatan pertama yang gagal diteruskan ke pemanggil.
+    """
+
+    def __init__(self, load: Callable[[str], T]):
+        self._load = load
+        self._value: Optional[T] = None
+        self._loaded: Optional[Tuple[str, float]] = None  # (path, mtime) versi yang dipakai
+        self._broken: Optional[Tuple[str, float]] = None  # (path, mtime) terakhir yang gagal
+        self._lock = threading.Lock()
+
+    def get(self, path: str) -> T:
+        with self._lock:
+            try:
+                mtime: Optional[float] = os.stat(path).st_mtime
+            except OSError:
+                mtime = None
+            if self._value is None:
+                changed = True
+            else:
+                changed = mtime is not None and (path, mtime) not in (self._loaded, self._broken)
+            if changed:
+                try:
+                    self._value = self._load(path)
+                    self._loaded, self._broken = (path, mtime), None
+                except Exception:
+                    if self._value is None:
+                        raise
+                    self._broken = (path, mtime)
+            return self._value
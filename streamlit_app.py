@@ -1,522 +1,69 @@
 # streamlit_app.py — v3.1 (final: fixed session_state, dynamic style, better UX)
-import os, json, re
-from streamlit.components.v1 import html as st_html
-import json as _json
-from typing import Dict, List
+import json
+import os
+import re
+import time
+from collections import deque
+from concurrent.futures import Future
+from functools import partial
+from hashlib import sha1
+from typing import Dict, List, Optional, Tuple
+
 import streamlit as st
 from dotenv import load_dotenv
-import re
-from uuid import uuid4
 
-FIELD_KEYS = [
-    "Foreground", "Midground", "Background", "Floating Elements",
-    "Central Banner", "Text & Effects", "Background Style", "Style & Lighting"
-]
+import rerun_profiler
+import telemetry
+import warmup
+from gemini_dispatch import CallResult, start_calls, stream_call, submit_background
+from gemini_router import router
+from preset_library import get_preset_library
+from prompt_history import get_prompt_history
+from prompt_core import (
+    FIELD_KEYS, STYLE_PRESETS, _call_gemini, build_theme_prompt,
+    compose_prompt, compose_prompt_localized, one_line,
+    SectionParser, parse_sections, stream_gemini, translate_fields_to_english,
+)
+from rerun_profiler import RerunProfiler, mark, profiled
+from session_outputs import DOWNLOADS, SessionOutputs, available_downloads, build_download, session_memory
+from style_suggest import get_style_suggester
+from theme_cache import get_theme_cache
+from translation_cache import get_translation_cache
+from variations import MAX_VARIATIONS, VARIATIONS_PER_REQUEST, generate_variations, render_variations
 
 # -------------------------------
-# Gemini API — robust import/fallback
-# -------------------------------
-def _call_gemini(prompt: str, model_name: str, api_key: str) -> str:
-    try:
-        from google import genai
-        client = genai.Client(api_key=api_key)
-        try:
-            resp = client.models.generate_content(model=model_name, contents=prompt)
-        except Exception:
-            alt = model_name if model_name.startswith("models/") else f"models/{model_name}"
-            resp = client.models.generate_content(model=alt, contents=prompt)
-        return getattr(resp, "text", getattr(resp, "output_text", str(resp)))
-    except Exception as e1:
-        try:
-            import google.generativeai as genai_old
-            genai_old.configure(api_key=api_key)
-            short = model_name.split("/", 1)[-1]
-            model = genai_old.GenerativeModel(short)
-            resp = model.generate_content(prompt)
-            return getattr(resp, "text", str(resp))
-        except Exception as e2:
-            # 🔽 Jangan pernah gunakan RuntimeError di sini!
-            error_msg = str(e2).lower()
-            if "429" in str(e2) or "quota" in error_msg or "resource_exhausted" in error_msg:
-                raise Exception(
-                    "❌ **Kuota harian terlampaui!**\n\n"
-                    "Anda telah melebihi batas permintaan gratis.\n\n"
-                    "🔹 Solusi:\n"
-                    "- Gunakan model `gemini-1.5-flash-8b` (kuota 500/hari)\n"
-                    "- Hubungkan billing di [Google AI Studio](https://aistudio.google.com/) untuk upgrade\n"
-                    "- Tunggu ~24 jam hingga kuota reset"
-                )
-            elif "401" in str(e2) or "unauthorized" in error_msg or "invalid key" in error_msg:
-                raise Exception("❌ **API Key tidak valid.** Periksa kembali GEMINI_API_KEY Anda.")
-            elif "network" in error_msg or "connection" in error_msg or "timeout" in error_msg:
-                raise Exception("❌ **Gagal koneksi ke Gemini.** Periksa internet atau coba lagi nanti.")
-            else:
-                raise Exception(f"❌ **Gagal memanggil Gemini:**\n\n`{str(e2)}`")
-                    
-# -------------------------------
-# Presets — pack besar
+# Streamlit UI
 # -------------------------------
-PRESETS: Dict[str, Dict[str, str]] = {
-    "Orang Asli Indonesia": {
-        "Foreground": "Seorang pria suku Asmat dari Papua, tubuhnya dihiasi lukisan tubuh tradisional merah-hitam, memegang tombak kayu, berdiri di hutan tropis. Ekspresi tenang, tatapan tajam.",
-        "Midground": "Rumah honai tradisional di kejauhan (kiri), wanita Dayak memakai hiasan kepala bulu (kanan), anak-anak bermain di sungai kecil.",
-        "Background": "Hutan hujan Papua yang lebat, kabut pagi, sungai berkelok, pegunungan Jayawijaya samar di langit.",
-        "Floating Elements": "Simbol budaya: 'ASMAT','DAYAK','HONAI','TATU','SIRIH'.",
-        "Central Banner": "Plakat kayu “WARISAN BUDAYA INDONESIA”.",
-        "Text & Effects": "‘BELAJAR BUDAYA LOKAL GRATIS!’ dengan font tradisional, bayangan lembut.",
-        "Background Style": "Lingkungan alam tropis, pencahayaan alami pagi hari.",
-        "Style & Lighting": "Photorealistic, DSLR f/1.8, natural lighting, hyper-detailed skin texture, cinematic composition."
-    },
-    "Pemandangan Alam Indonesia (Realistis)": {
-        "Foreground": "Danau Toba di pagi hari, air tenang memantulkan langit jingga, perahu nelayan kecil terapung perlahan di tengah danau, kabut tipis mengambang di permukaan.",
-        "Midground": "Pulau Samosir berdiri di tengah danau (kiri), perbukitan hijau dengan sawah berundak (kanan), jalan kecil berkelok di tepi danau.",
-        "Background": "Pegunungan Batak yang berkabut, langit senja dengan awan tipis, cahaya matahari menerobos dari balik puncak.",
-        "Floating Elements": "Ikon alam: 'LAKE','MOUNTAIN','MIST','SUNRISE','BOAT'.",
-        "Central Banner": "Plakat kayu natural “KEINDAHAN ALAM INDONESIA”.",
-        "Text & Effects": "‘JELAJAHI PESONA ALAM TANPA BATAS!’ dengan font serif halus, bayangan alami.",
-        "Background Style": "Lanskap alam tropis, udara segar, cahaya alami pagi hari, refleksi air yang jernih.",
-        "Style & Lighting": "Photorealistic, DSLR 8K, f/16 aperture, golden hour lighting, hyper-detailed water and rock texture, environmental realism."
-    },
-    "Petani Vietnam (Asia)": {
-        "Foreground": "Seorang petani wanita Vietnam memakai topi daun nangka, sedang menanam padi di sawah berundak, kakinya berlumpur, wajah berkeringat.",
-        "Midground": "Kerbau menarik bajak (kiri), rumah bambu di bukit (kanan), burung bangau terbang rendah.",
-        "Background": "Pegunungan Sapa berawan, sawah menghijau, sinar matahari pagi menerobos kabut.",
-        "Floating Elements": "Ikon: 'RICE','BAMBOO','HAT','WATER BUFFALO','TERRACE'.",
-        "Central Banner": "Neon kayu “KEHIDUPAN DI SAWAH VIETNAM”.",
-        "Text & Effects": "‘BELAJAR BUDAYA PETANI ASIA!’ dengan efek bayangan alami.",
-        "Background Style": "Pemandangan pedesaan Asia Tenggara, udara segar, embun pagi.",
-        "Style & Lighting": "Documentary Style, natural lighting, shallow depth of field, 8K resolution."
-    },
-    
-    "Penari Bharatanatyam (India)": {
-        "Foreground": "Seorang penari wanita India memakai sari emas dan perhiasan tradisional, pose tangan klasik, mata dilukis tebal, berdiri di panggung batu kuno.",
-        "Midground": "Penabuh tabla (kiri), guru musik duduk bersila (kanan), bunga teratai di lantai.",
-        "Background": "Kuil Hindu berukir, cahaya lilin, langit senja oranye.",
-        "Floating Elements": "Lambang: 'DANCE','TEMPLE','SARI','MUDRA','DEVI'.",
-        "Central Banner": "Papan kayu “SENI TARI BHARATANATYAM”.",
-        "Text & Effects": "‘BELAJAR SENI TRADISIONAL INDIA!’ dengan efek cahaya lilin.",
-        "Background Style": "Lingkungan kuil kuno, suasana sakral, pencahayaan dramatis.",
-        "Style & Lighting": "Cinematic Realism, soft spotlight, detailed facial expression, film grain."
-    },
-    
-    "Petualang Mongolia (Asia Tengah)": {
-        "Foreground": "Seorang pria Mongolia berjaket kulit tebal, duduk di atas kuda di padang rumput luas, memegang cangkir teh susu, angin menerbangkan rambutnya.",
-        "Midground": "Yurt tradisional (kiri), kawanan domba (kanan), elang terbang tinggi.",
-        "Background": "Padang stepa Mongolia yang luas, pegunungan jauh, langit biru tanpa awan.",
-        "Floating Elements": "Simbol: 'HORSE','YURT','STEPPE','EAGLE','MILK TEA'.",
-        "Central Banner": "Neon kayu “HIDUP DI PADANG RUMPUT MONGOLIA”.",
-        "Text & Effects": "‘BELAJAR BUDAYA NOMADIK!’ dengan efek angin halus.",
-        "Background Style": "Lanskap alam terbuka, cahaya alami siang hari.",
-        "Style & Lighting": "Environmental Realism, natural sunlight, wind motion blur, ultra-detailed fabric texture."
-    },
-    
-    "Petani Prancis (Eropa)": {
-        "Foreground": "Seorang petani tua Prancis memakai topi jerami dan kaus bergaris, memetik anggur di kebun anggur Provence, keriput di wajahnya terlihat jelas.",
-        "Midground": "Traktor tua (kiri), anjing peliharaan mengikutinya (kanan), baris tanaman anggur.",
-        "Background": "Bukit beranggur, rumah pedesaan berbatu, langit biru cerah.",
-        "Floating Elements": "Ikon: 'WINE','VINEYARD','HAT','DOG','SUN'.",
-        "Central Banner": "Papan kayu “KEBUN ANGGUR PROVENCE”.",
-        "Text & Effects": "‘BELAJAR BUDAYA PETANI EROPA!’ dengan font klasik.",
-        "Background Style": "Pedesaan Prancis, cuaca cerah, bau tanah dan anggur.",
-        "Style & Lighting": "Natural Lighting Portrait, soft golden hour, fine skin texture, DSLR quality."
-    },
-    
-    "Penenun Ghana (Afrika)": {
-        "Foreground": "Seorang wanita Ghana sedang menenun kain Kente warna-warni di alat tenun tradisional, rambutnya dikepang rapi, gelang kaki berdenting.",
-        "Midground": "Anak-anak bermain di tanah (kiri), pasar tradisional (kanan), kain jemuran.",
-        "Background": "Desa Afrika Barat, rumah lumpur, pohon kelapa, langit jingga senja.",
-        "Floating Elements": "Motif: 'KENTE','WEAVE','AFRICA','PATTERN','TRADITION'.",
-        "Central Banner": "Plakat kayu “WARISAN TENUN AFRIKA”.",
-        "Text & Effects": "‘BELAJAR SENI TENUN AFRIKA!’ dengan efek warna cerah.",
-        "Background Style": "Lingkungan desa Afrika, suasana hangat, pencahayaan alami.",
-        "Style & Lighting": "Ethnographic Realism, ambient daylight, detailed fabric weave, 8K resolution."
-    },
-    
-    "Penjaga Laut Aborigin (Australia)": {
-        "Foreground": "Seorang pria Aborigin tua, tubuhnya dihiasi lukisan suci, memegang boomerang, berdiri di tepi gurun merah, memandang ke arah matahari terbenam.",
-        "Midground": "Waratah (bunga nasional) (kiri), kanguru melintas (kanan), lukisan batu kuno.",
-        "Background": "Gurun Outback, formasi Uluru di kejauhan, langit ungu-merah.",
-        "Floating Elements": "Simbol: 'DREAMTIME','BOOMERANG','ULURU','KANGAROO','ART'.",
-        "Central Banner": "Neon batu “WARISAN SPIRITUAL ABORIGIN”.",
-        "Text & Effects": "‘BELAJAR BUDAYA PERTAMA DI DUNIA!’ dengan efek debu halus.",
-        "Background Style": "Gurun alami, tanah merah, langit dramatis.",
-        "Style & Lighting": "Fine Art Realism, oil painting texture, rim light senja, museum-grade detail."
-    },
-    "Petualangan Luar Angkasa": {
-        "Foreground": "Panda astronot berani melambaikan bendera di batu bulan (tengah-bawah), gurita alien kecil mengambang tanpa gravitasi di sampingnya.",
-        "Midground": "Anjing robot biru melompat lambat (kiri), pesawat ruang angkasa berbentuk komet melintas; burung alien merah melayang dengan jejak debu bintang.",
-        "Background": "Planet Saturnus bercincin bersinar (kiri-atas), UFO perak melayang (kanan-atas), sabuk asteroid berkilauan (bawah).",
-        "Floating Elements": "Lencana neon ruang angkasa: 'PANDA','ALIEN','ROBOT','UFO','PLANET'.",
-        "Central Banner": "Neon holografik “JELAJAHI GALAKSI!” di atas pita melayang.",
-        "Text & Effects": "‘PELAJARAN ANTARIKSA GRATIS!’ pada bintang biru (kanan-atas). Jejak meteor.",
-        "Background Style": "Angkasa gelap berbintang, awan kosmik seperti aurora.",
-        "Style & Lighting": "3D Pixar, ekspresi besar, outline neon, palet biru-ungu, rim light dramatis kiri-bawah."
-    },
-    "Pesta Bawah Laut": {
-        "Foreground": "Ikan badut ceria berputar dengan gelembung (tengah-bawah), bayi kura-kura menari membawa marakas karang.",
-        "Midground": "Kuda laut kuning melayang (kiri), ubur-ubur bergoyang; kepiting biru berdansa menyamping.",
-        "Background": "Ekor paus muncul (kiri-atas), lumba-lumba melompati cincin gelembung (kanan-atas), sinar matahari menembus permukaan.",
-        "Floating Elements": "Balon gelembung bertuliskan: 'FISH','TURTLE','SEAHORSE','DOLPHIN','CRAB'.",
-        "Central Banner": "Plakat karang neon “MENARI DI BAWAH LAUT!”.",
-        "Text & Effects": "‘PELAJARAN LAUT GRATIS!’ dengan jejak gelembung.",
-        "Background Style": "Laut biru jernih, terumbu karang, gerombolan ikan.",
-        "Style & Lighting": "3D Pixar, aksen neon, caustic lembut, palet turquoise-koral."
-    },
-    "Pekan Kerajaan (Medieval)": {
-        "Foreground": "Kucing ksatria gembul membawa piala emas (tengah-bawah), monyet badut menjuggling apel.",
-        "Midground": "Anak naga hijau mengintip dari balik tenda (kiri), tupai berzirah memegang pedang mini; rubah pemusik memetik kecapi.",
-        "Background": "Menara kastel berbanner (kiri-atas), roda putar kayu (kanan-atas), kembang api di langit.",
-        "Floating Elements": "Perisai bertuliskan: 'KNIGHT','DRAGON','JESTER','FOX','CASTLE'.",
-        "Central Banner": "Pita emas “SELAMAT DATANG DI PESTA KERAJAAN!”.",
-        "Text & Effects": "‘PELAJARAN SEJARAH GRATIS!’ gaya gulungan.",
-        "Background Style": "Padang hijau, tenda festival, tembok kastel.",
-        "Style & Lighting": "3D Pixar, senja hangat kiri-bawah, aksen emas-merah."
-    },
-    "Festival Musik Rimba": {
-        "Foreground": "Gorila DJ di turntable bambu (tengah-bawah), tukan bernyanyi di mikrofon.",
-        "Midground": "Cheetah menari berkacamata neon (kiri), lemur berputar di ekor; kuda nil memantul mengikuti irama.",
-        "Background": "Air terjun (kiri-atas), pelangi (kanan-atas), kawanan nuri terbang.",
-        "Floating Elements": "Piringan vinyl neon: 'DJ','GORILLA','TOUCAN','HIPPO','CHEETAH'.",
-        "Central Banner": "Papan berpijar “JUNGLE JAM!”.",
-        "Text & Effects": "‘PELAJARAN MUSIK GRATIS!’ ikon nada neon.",
-        "Background Style": "Kanopi rimba lebat berbunga warna-warni.",
-        "Style & Lighting": "3D Pixar, tropis cerah, outline glow, spotlight panggung."
-    },
-    "Hari Seru Arktik": {
-        "Foreground": "Beruang kutub meluncur di es (tengah-bawah), penguin melempar bola salju.",
-        "Midground": "Narwhal berputar dengan kilau es (kiri), burung hantu salju melayang; anjing laut menyeimbangkan bola.",
-        "Background": "Gunung es & iglo (kiri-atas), aurora (kanan-atas), pegunungan salju jauh.",
-        "Floating Elements": "Lambang serpihan salju: 'BEAR','PENGUIN','SEAL','OWL','NARWHAL'.",
-        "Central Banner": "Neon beku “AYO MAIN SALJU!”.",
-        "Text & Effects": "‘PELAJARAN ARKTIK GRATIS!’ font kristal es.",
-        "Background Style": "Bentang es berkilau, refleksi halus.",
-        "Style & Lighting": "3D Pixar, palet biru-putih, soft sunlight."
-    },
-    "Kendaraan Kota Ceria": {
-        "Foreground": "Bus sekolah tersenyum melaju (tengah-bawah), mobil pemadam melambai dengan tangga.",
-        "Midground": "Ambulans menyalakan lampu hati (kiri), taksi kuning berputar; sepeda biru berkedip lampu.",
-        "Background": "Gedung kota, lampu lalu lintas, jembatan jauh.",
-        "Floating Elements": "Rambu lucu: 'BUS','FIRETRUCK','AMBULANCE','TAXI','BIKE'.",
-        "Central Banner": "Neon “BELAJAR NAMA KENDARAAN!”.",
-        "Text & Effects": "‘PELAJARAN KOTA GRATIS!’ bintang kuning.",
-        "Background Style": "Kota cerah, awan lembut, jalan ramah anak.",
-        "Style & Lighting": "3D Pixar, palet cerah, cahaya diagonal."
-    },
-    "Kebun Binatang Mini": {
-        "Foreground": "Jerapah kuning meregangkan leher (kiri), penguin meluncur di perut ke arah jerapah.",
-        "Midground": "Monyet hijau bergelayut di leher jerapah, zebra berjingkrak, rubah oranye melambai.",
-        "Background": "Gajah teal menyemprot air (kiri-atas), burung hantu ungu di bulan sabit (kanan-atas), kanguru merah memantul; kupu pelangi, kura-kura mengintip (kanan-bawah).",
-        "Floating Elements": "Balon huruf: 'LION','DOLPHIN','PENGUIN','GIRAFFE','MONKEY','ELEPHANT','OWL','KANGAROO','ZEBRA','TURTLE','FOX','BUTTERFLY'.",
-        "Central Banner": "Neon “BELAJAR NAMA HEWAN!” + balok alfabet.",
-        "Text & Effects": "‘PELAJARAN BAHASA INGGRIS GRATIS!’ bintang kuning, konfeti pelangi.",
-        "Background Style": "Bokeh lembut: daun rimba, savana, ombak laut.",
-        "Style & Lighting": "3D Pixar, ekspresi besar, outline neon, palet pelangi."
-    },
-    "Taman Dino Ramah": {
-        "Foreground": "T-Rex kecil tersenyum (tengah-bawah) memegang balon tulang, Triceratops bayi melambai.",
-        "Midground": "Pterodactyl warna pastel terbang rendah (kiri), Stegosaurus menari pelan.",
-        "Background": "Gunung vulkanik damai (kiri-atas), hutan pakis (kanan-atas), jejak kaki dinosaurus.",
-        "Floating Elements": "Balon: 'T-REX','TRI','PTERO','STEG','DINO'.",
-        "Central Banner": "Papan kayu “SAHABAT DINO!”.",
-        "Text & Effects": "‘PELAJARAN ZAMAN PURBA GRATIS!’ kilau oranye.",
-        "Background Style": "Padang subur pastel, langit senja lembut.",
-        "Style & Lighting": "Low-poly 3D pastel, shadow lembut."
-    },
-    "Kereta Api Ceria": {
-        "Foreground": "Lokomotif tersenyum mengeluarkan asap hati (tengah-bawah), gerbong warna-warni bergoyang.",
-        "Midground": "Kondektur beruang kecil melambaikan bendera (kiri), sinyal naik turun.",
-        "Background": "Jembatan besi, bukit hijau, terowongan jauh.",
-        "Floating Elements": "Plakat: 'TRAIN','ENGINE','CARRIAGE','STATION'.",
-        "Central Banner": "Papan neon “ALL ABOARD!”.",
-        "Text & Effects": "‘PELAJARAN TRANSPORTASI GRATIS!’ starburst kuning.",
-        "Background Style": "Lembah cerah, awan kapas.",
-        "Style & Lighting": "3D Pixar, rim light tipis, warna cerah."
-    },
-    "Karnaval Sirkus": {
-        "Foreground": "Badut kucing melempar bola (tengah-bawah), singa ramah melompat melalui cincin.",
-        "Midground": "Akrobat monyet di trapeze (kiri), gajah menari.",
-        "Background": "Tenda sirkus merah-putih, roda bianglala mini.",
-        "Floating Elements": "Balon huruf: 'CLOWN','LION','ELEPHANT','ACROBAT'.",
-        "Central Banner": "Banner “CIRCUS CARNIVAL!”.",
-        "Text & Effects": "‘FREE FUN LESSON!’ konfeti pelangi.",
-        "Background Style": "Lampu panggung, bendera kecil warna-warni.",
-        "Style & Lighting": "Neon playful, glitter halus."
-    },
-    "Pertanian Pagi": {
-        "Foreground": "Sapi lucu menyapa (tengah-bawah), ayam jago bernyanyi di pagar.",
-        "Midground": "Domba melompat (kiri), bebek berbaris; kelinci memegang wortel.",
-        "Background": "Lumbung merah, kincir angin, matahari terbit.",
-        "Floating Elements": "Papan: 'COW','CHICKEN','SHEEP','DUCK','RABBIT'.",
-        "Central Banner": "Papan kayu “MORNING ON THE FARM!”.",
-        "Text & Effects": "‘FREE FARM LESSON!’ bintang kuning.",
-        "Background Style": "Padang rumput, bunga liar, awan lembut.",
-        "Style & Lighting": "Gaya buku cerita pastel, cahaya pagi."
-    },
-    "Pesta Buah 3D (Hitam)": {
-        "Foreground": "Apel tersenyum melompat (tengah-bawah), pisang meluncur spiral, jeruk berputar.",
-        "Midground": "Stroberi jungkir balik (kiri), anggur memantul; semangka bergulir lucu.",
-        "Background": "Latar hitam total untuk fokus karakter.",
-        "Floating Elements": "Kata neon: 'JUMP','DANCE','BOUNCE','SPIN'.",
-        "Central Banner": "Neon ‘DANCE & SENSORY FUN!’.",
-        "Text & Effects": "Konfeti pelangi, jejak neon, bokeh halus.",
-        "Background Style": "Hitam pekat, tanpa kabut.",
-        "Style & Lighting": "3D Pixar, outline glow kuat, motion trails."
-    },
-    "Lab Sains Seru": {
-        "Foreground": "Anak ilmuwan rubah memakai kacamata lab (tengah-bawah) memegang tabung reaksi berkilau.",
-        "Midground": "Robot kecil membawa beaker (kiri), monster gelembung ramah melayang.",
-        "Background": "Papan tulis rumus (kiri-atas), rak bahan kimia (kanan-atas), plasma globe mini.",
-        "Floating Elements": "Ikon atom: 'ATOM','LAB','ROBOT','CHEM'.",
-        "Central Banner": "Neon “SCIENCE IS FUN!”.",
-        "Text & Effects": "Percikan neon hijau, asap lembut biru.",
-        "Background Style": "Lab cerah ramah anak, permukaan putih bersih.",
-        "Style & Lighting": "Plastic toy render, HDRI studio soft."
-    },
-    "Safari Malam": {
-        "Foreground": "Singa kecil memakai senter kepala (tengah-bawah), hyena ramah tersenyum.",
-        "Midground": "Zebra reflektif (kiri), jerapah melihat bintang.",
-        "Background": "Langit malam, rasi bintang hewan, pohon akasia siluet.",
-        "Floating Elements": "Ikon bintang: 'LION','ZEBRA','GIRAFFE','STARS'.",
-        "Central Banner": "Papan kayu “NIGHT SAFARI!”.",
-        "Text & Effects": "Fireflies, glow lembut kuning.",
-        "Background Style": "Savana gelap biru, kabut tipis.",
-        "Style & Lighting": "Neon rim subtle, moonlight cool."
-    },
-    "Festival Musim Dingin": {
-        "Foreground": "Anak-anakan beruang dan rubah bermain salju (tengah-bawah), manusia salju tersenyum.",
-        "Midground": "Rusa menarik kereta kecil (kiri), pinguin berseluncur.",
-        "Background": "Pohon pinus bersalju, lampu string hangat.",
-        "Floating Elements": "Keping salju: 'SNOW','FUN','WINTER','LIGHTS'.",
-        "Central Banner": "Neon “WINTER FEST!”.",
-        "Text & Effects": "Sparkle biru, nafas uap dingin.",
-        "Background Style": "Lapangan salju berkilau.",
-        "Style & Lighting": "Watercolor cartoon + glow putih."
-    },
-    "Pantai Tropis": {
-        "Foreground": "Kepiting ceria melambai (tengah-bawah), anak penyu menuju laut.",
-        "Midground": "Burung camar menukik (kiri), kelapa jatuh pelan.",
-        "Background": "Matahari terbenam oranye, perahu kecil, ombak lembut.",
-        "Floating Elements": "Cangkang & papan: 'SUN','SEA','SAND','FUN'.",
-        "Central Banner": "Papan kayu “TROPICAL BEACH!”.",
-        "Text & Effects": "Confetti daun, semburat pasir.",
-        "Background Style": "Palem, payung warna-warni.",
-        "Style & Lighting": "Gouache hangat, backlight lembut."
-    },
-    "Toko Mainan Ajaib": {
-        "Foreground": "Beruang boneka hidup melambaikan pita (tengah-bawah), robot timah menari.",
-        "Midground": "Kereta mini di rel (kiri), balok huruf melompat.",
-        "Background": "Rak mainan tinggi, lampu peri.",
-        "Floating Elements": "Tag: 'TOY','ROBOT','TRAIN','BLOCKS'.",
-        "Central Banner": "Neon “MAGIC TOY SHOP!”.",
-        "Text & Effects": "Glitter pastel, bokeh lampu.",
-        "Background Style": "Interior kayu hangat.",
-        "Style & Lighting": "Kawaii chibi + plastic toy."
-    },
-    "Taman Lalu Lintas Mini": {
-        "Foreground": "Anak panda menyeberang zebra cross (tengah-bawah), polisi kucing memberi salam.",
-        "Midground": "Lampu merah-kuning-hijau (kiri), rambu belok.",
-        "Background": "Gedung rendah, taman kota mini.",
-        "Floating Elements": "Rambu: 'STOP','GO','SLOW'.",
-        "Central Banner": "Papan “LEARN TRAFFIC SIGNS!”.",
-        "Text & Effects": "Arrow neon, icon klakson.",
-        "Background Style": "Kota pastel aman.",
-        "Style & Lighting": "Flat long-shadow, warna cerah."
-    },
-    "Kota Robot": {
-        "Foreground": "Robot kubus lucu menyapa (tengah-bawah), drone kecil membawa paket.",
-        "Midground": "Robot anjing (kiri), papan digital berkedip.",
-        "Background": "Gedung futuristik, monorail.",
-        "Floating Elements": "Badge: 'ROBO','DRONE','CITY'.",
-        "Central Banner": "Hologram “ROBOT CITY!”.",
-        "Text & Effects": "Glitch lembut, scanline tipis.",
-        "Background Style": "Isometric city grid.",
-        "Style & Lighting": "Isometric 3D, neon cyan-magenta."
-    },
-    "Pasar Buah Ceria": {
-        "Foreground": "Pedagang apel dan jeruk berkedip (tengah-bawah), pisang menari.",
-        "Midground": "Semangka bergulir (kiri), anggur jingkrak.",
-        "Background": "Kios warna-warni, lampu gantung.",
-        "Floating Elements": "Label: 'APPLE','ORANGE','BANANA','GRAPE','WATERMELON'.",
-        "Central Banner": "Plakat “FRUIT MARKET!”.",
-        "Text & Effects": "Konfeti warna buah.",
-        "Background Style": "Jalan pasar pastel.",
-        "Style & Lighting": "Papercraft 3D + rim light."
-    },
-    "Hari Olahraga Sekolah": {
-        "Foreground": "Anak berlari membawa bendera (tengah-bawah), kucing kecil lompat jauh.",
-        "Midground": "Tim bola mini latihan (kiri), peluit berbunyi.",
-        "Background": "Lapangan sekolah, podium hadiah.",
-        "Floating Elements": "Badge: 'RUN','JUMP','TEAM','WIN'.",
-        "Central Banner": "Spanduk “SCHOOL SPORTS DAY!”.",
-        "Text & Effects": "Konfeti warna tim.",
-        "Background Style": "Rumput hijau, langit cerah.",
-        "Style & Lighting": "Halftone comic + clean edges."
-    },
-    "Kelas Musik Ceria": {
-        "Foreground": "Kelinci bermain piano mini (tengah-bawah), kucing meniup saksofon.",
-        "Midground": "Bebek mengetuk drum (kiri), burung biru bernyanyi.",
-        "Background": "Papan not musik, tirai panggung.",
-        "Floating Elements": "Ikon nada: 'DO','RE','MI','FA'.",
-        "Central Banner": "Neon “LET’S MAKE MUSIC!”.",
-        "Text & Effects": "Sparkle emas, bokeh warna.",
-        "Background Style": "Panggung kayu hangat.",
-        "Style & Lighting": "Ghibli-soft + spotlight."
-    }
-}
+st.set_page_config(page_title="Gemini Prompt Builder", page_icon="✨", layout="wide")
 
-STYLE_PRESETS: List[str] = [
-    # --- Gaya Kartun & Ilustrasi ---
-    "3D Pixar (ekspresi besar, outline neon, ultra tajam)",
-    "Claymation 3D (tekstur tanah liat, lighting studio)",
-    "Low-poly 3D pastel (bentuk sederhana)",
-    "Watercolor cartoon (aquarel lembut)",
-    "Neon playful (glow rim light, warna cerah)",
-    "Ghibli-soft (warna natural, ambient warm)",
-    "Halftone comic (tekstur titik komik)",
-    "Kawaii chibi (proporsi imut)",
-    "Line-art minimal (clean strokes)",
-    "Papercraft layered 3D (kertas berlapis)",
-
-    # --- Gaya Realistis & Natural ---
-    "Photorealistic (ultra-detailed, natural skin texture, cinematic lighting)",
-    "DSLR Photography (f/1.8 aperture, shallow depth of field, ambient daylight)",
-    "Hyperrealistic (8K resolution, micro-details, realistic pores and hair)",
-    "Natural Lighting Portrait (soft window light, no flash, warm tone)",
-    "Cinematic Realism (film grain, 35mm, dramatic shadows, realistic atmosphere)",
-    "Documentary Style (on-location, natural expressions, candid moment)",
-    "Studio Portrait (professional lighting, softbox, clean background)",
-    "Environmental Realism (orang asli di habitat alami, pencahayaan alami)",
-    "Ethnographic Realism (detail budaya, pakaian tradisional, ekspresi wajar)",
-    "Fine Art Realism (oil painting style, brush texture, museum-grade detail)",
-
-    # --- Gaya Material & Render ---
-    "Plastic toy render (material mengkilap, HDRI studio)",
-    "Isometric 3D city (geometri rapi)",
-    "Voxel art (blok piksel 3D)",
-    "Gouache illustration (kuas tebal)",
-    "Chalkboard school (tulisan kapur)",
-    "Pastel gradient minimal (soft blend)",
-    "Holographic chrome (reflective, iridescent)",
-    "Retro vaporwave (grid, neon sunset)",
-    "PBR realistic toy (material realistis)"
-]
+# Profil per rerun (XPROMPT_PROFILE=1 atau ?profile=1) — lihat rerun_profiler.py
+PROFILING = rerun_profiler.is_enabled(st.query_params.get("profile"))
+PROFILE_SLOW_MS = float(os.environ["XPROMPT_PROFILE_SLOW_MS"]) if os.getenv("XPROMPT_PROFILE_SLOW_MS") else None
 
-# -------------------------------
-# Utilities
-# -------------------------------
-def compose_prompt(fields: Dict[str, str], toggles: Dict[str, bool]) -> str:
-    order = [
-        "Foreground", "Midground", "Background", "Floating Elements",
-        "Central Banner", "Text & Effects", "Background Style", "Style & Lighting"
-    ]
-    parts = []
-    for key in order:
-        val = (fields.get(key) or "").strip()
-        if val:
-            parts.append(f"{key}: {val}")
-    if toggles.get("static_camera"):
-        parts.append("Camera: perfectly static tripod; no pan, no zoom.")
-    if toggles.get("black_bg"):
-        parts.append("Background: pure solid black to isolate subjects; avoid ambient fog.")
-    if toggles.get("ultra_sharp"):
-        parts.append("Rendering: cinematic composition, ultra-sharp focus, clean edges, no blur.")
-    if toggles.get("diag_lighting"):
-        parts.append("Lighting: dramatic diagonal from bottom-left to top-right.")
-    return " \n".join(parts)
-
-def compose_prompt_localized(fields: Dict[str, str], toggles: Dict[str, bool], lang: str) -> str:
-    map_id = {
-        "Foreground": "Latar Depan",
-        "Midground": "Lapisan Tengah",
-        "Background": "Latar Belakang",
-        "Floating Elements": "Elemen Mengambang",
-        "Central Banner": "Papan Utama",
-        "Text & Effects": "Teks & Efek",
-        "Background Style": "Gaya Latar",
-        "Style & Lighting": "Gaya & Pencahayaan"
-    }
-    order = [
-        "Foreground", "Midground", "Background", "Floating Elements",
-        "Central Banner", "Text & Effects", "Background Style", "Style & Lighting"
-    ]
-    parts = []
-    for key in order:
-        val = (fields.get(key) or "").strip()
-        if not val:
-            continue
-        label = key if lang == "EN" else map_id[key]
-        parts.append(f"{label}: {val}")
-    if lang == "EN":
-        if toggles.get("static_camera"): parts.append("Camera: perfectly static tripod; no pan, no zoom.")
-        if toggles.get("black_bg"): parts.append("Background: pure solid black to isolate subjects; avoid ambient fog.")
-        if toggles.get("ultra_sharp"): parts.append("Rendering: cinematic composition, ultra-sharp focus, clean edges, no blur.")
-        if toggles.get("diag_lighting"): parts.append("Lighting: dramatic diagonal from bottom-left to top-right.")
-    else:
-        if toggles.get("static_camera"): parts.append("Kamera: statis sempurna dengan tripod; tanpa pan, tanpa zoom.")
-        if toggles.get("black_bg"): parts.append("Latar: hitam pekat untuk fokus karakter; hindari kabut ambient.")
-        if toggles.get("ultra_sharp"): parts.append("Rendering: komposisi sinematik, fokus sangat tajam, tepi bersih, tanpa blur.")
-        if toggles.get("diag_lighting"): parts.append("Pencahayaan: diagonal dramatis dari kiri-bawah ke kanan-atas.")
-    return " \n".join(parts)
 
-def translate_to_english(text_id: str, api_key: str, model: str) -> str:
-    try:
-        if not api_key or not text_id.strip():
-            return text_id
-        
-        # Instruksi yang lebih ketat dan spesifik
-        instr = (
-            "TRANSLATION TASK: Translate ONLY the content of this structured prompt to English. "
-            "DO NOT add any explanations, notes, or alternative translations. "
-            "DO NOT add any new sections or text outside the prompt structure. "
-            "DO NOT break the format. "
-            "PRESERVE the exact order of sections. "
-            "OUTPUT ONLY the translated prompt in the same format.\n\n"
-            "Convert section labels to EXACTLY these English equivalents:\n"
-            "- 'Latar Depan:' → 'Foreground:'\n"
-            "- 'Lapisan Tengah:' → 'Midground:'\n"
-            "- 'Latar Belakang:' → 'Background:'\n"
-            "- 'Elemen Mengambang:' → 'Floating Elements:'\n"
-            "- 'Papan Utama:' → 'Central Banner:'\n"
-            "- 'Teks & Efek:' → 'Text & Effects:'\n"
-            "- 'Gaya Latar:' → 'Background Style:'\n"
-            "- 'Gaya & Pencahayaan:' → 'Style & Lighting:'\n\n"
-            "Here is the prompt to translate:"
-        )
-        
-        payload = f"{instr}\n{text_id}"
-        response = _call_gemini(payload, model, api_key)
-        
-        # Bersihkan respons dari penjelasan tambahan
-        # Ambil hanya bagian yang sesuai dengan struktur prompt
-        lines = response.split('\n')
-        valid_sections = [
-            "Foreground:", "Midground:", "Background:", 
-            "Floating Elements:", "Central Banner:", 
-            "Text & Effects:", "Background Style:", 
-            "Style & Lighting:", "Camera:", "Rendering:", "Lighting:"
-        ]
-        
-        cleaned_lines = []
-        for line in lines:
-            # Hanya ambil baris yang merupakan bagian dari prompt
-            if any(line.startswith(section) for section in valid_sections):
-                cleaned_lines.append(line)
-            # Hentikan jika menemukan penjelasan tambahan
-            elif line.strip().startswith("**") or "Option" in line:
-                break
-        
-        return "\n".join(cleaned_lines)
-        
-    except Exception as e:
-        st.warning(f"Terjemahan gagal: {e}")
-        return text_id
-        
-# -------------------------------
-# Streamlit UI
-# -------------------------------
-st.set_page_config(page_title="Gemini Prompt Builder", page_icon="✨", layout="wide")
+def new_profiler(label: str) -> Optional[RerunProfiler]:
+    if not PROFILING:
+        return None
+    return RerunProfiler(label, slow_ms=PROFILE_SLOW_MS,
+                         dump_dir=os.getenv("XPROMPT_PROFILE_DIR", rerun_profiler.DEFAULT_DUMP_DIR))
+
+
+def keep_profile(record: dict) -> None:
+    window = int(os.getenv("XPROMPT_PROFILE_WINDOW", rerun_profiler.DEFAULT_WINDOW))
+    if st.session_state.get("profile_runs") is None or st.session_state["profile_runs"].maxlen != window:
+        st.session_state["profile_runs"] = deque(st.session_state.get("profile_runs") or [], maxlen=window)
+    st.session_state["profile_runs"].append(record)
+
+
+rerun_profile = new_profiler("rerun")
+mark("setup")
 load_dotenv()
-default_key = os.getenv("GEMINI_API_KEY", "")
+default_key = os.getenv("GEMINI_API_KEYS") or os.getenv("GEMINI_API_KEY", "")
+metrics_port = telemetry.start_metrics_server()  # hanya bila XPROMPT_METRICS_PORT diset; sekali per proses
+telemetry.RERUNS.inc()
+# Import SDK Gemini, client, cache & tabel disiapkan di latar sekali per proses,
+# sehingga klik pertama tidak menanggung biaya import google.genai
+warmup.start_background_warmup(default_key)
 
 st.markdown("""
 <style>
@@ -535,6 +82,18 @@ h1 + * { border: none !important; margin-top: 0.5rem; }
 st.title("✨ Build XPrompt (ID ➜ EN)")
 st.caption("Bangun prompt terstruktur dengan UI Indonesia, otomatis hasilkan versi Inggris.")
 
+mark("presets")
+# Pack template dimuat sekali per proses; dimuat ulang otomatis bila file berubah
+preset_library = get_preset_library()
+PRESETS = preset_library.presets
+
+HISTORY_PAGE_SIZE = 8
+HISTORY_KINDS = {"theme": "🎨", "translation": "🇬🇧", "enhance": "🌟", "variations": "🔀"}
+
+# Kode tingkat atas hanya jalan pada run penuh, yang juga menghapus semua interval run_every
+st.session_state["translate_poller"] = False
+
+mark("sidebar")
 with st.sidebar:
     st.header("⚙️ Settings")
     model = st.selectbox(
@@ -547,18 +106,56 @@ with st.sidebar:
     index=0,  # Default ke flash-8b
     help="gemini-1.5-flash-8b punya kuota lebih besar (500/hari) di tier gratis."
 )
-    api_key = st.text_input("GEMINI_API_KEY", type="password", value=default_key, help="isi dengan API dari https://aistudio.google.com/apikey")
+    api_key = st.text_input("GEMINI_API_KEY", type="password", value=default_key,
+                            help="isi dengan API dari https://aistudio.google.com/apikey — beberapa key dipisah "
+                                 "koma (opsional bobot `key:2`) dibagi rata dan saling menggantikan saat kuota habis")
 
     st.subheader("🎨 Tema Custom")
     custom_theme = st.text_input("Tema (contoh: Kartun buah 3D)")
+    fresh_theme = st.checkbox("Paksa generate baru", value=False,
+                              help="Abaikan hasil tersimpan untuk tema yang mirip dan panggil Gemini lagi.")
     gen_custom_clicked = st.button("Generate dari Tema Custom", use_container_width=True)
 
     st.divider()
     st.subheader("Template")
-    preset_options = ["— None (kosong) —"] + list(PRESETS.keys())
+    preset_query = st.text_input("Cari template", key="preset_query", placeholder="mis. laut, dino, neon")
+    preset_matches = preset_library.search(preset_query)
+    st.caption(f"Pack v{preset_library.version} • {len(preset_matches)}/{len(PRESETS)} template")
+    preset_options = ["— None (kosong) —"] + preset_matches
     preset_choice = st.selectbox("Pilih template", preset_options, index=0)
     apply_sidebar_template = st.button("Muat template", use_container_width=True)
 
+    st.divider()
+    st.subheader("Riwayat")
+    history_query = st.text_input("Cari riwayat", key="history_query", placeholder="mis. pixar, hutan, banner")
+    if st.session_state.get("history_page_query") != history_query:
+        st.session_state["history_page_query"] = history_query
+        st.session_state["history_page"] = 0
+    history_page = st.session_state.get("history_page", 0)
+    # Satu baris ekstra hanya untuk tahu ada halaman berikutnya (tanpa COUNT atas seluruh tabel)
+    history_rows = get_prompt_history().search(history_query, limit=HISTORY_PAGE_SIZE + 1,
+                                               offset=history_page * HISTORY_PAGE_SIZE)
+    if not history_rows:
+        st.caption("Belum ada riwayat." if not history_query else "Tidak ada riwayat yang cocok.")
+    for entry in history_rows[:HISTORY_PAGE_SIZE]:
+        stamp = time.strftime("%d/%m %H:%M", time.localtime(entry.created))
+        if st.button(f"{HISTORY_KINDS.get(entry.kind, '•')} {entry.title}", key=f"history_{entry.id}",
+                     help=f"{stamp} • {entry.preview}", use_container_width=True):
+            st.session_state["history_load"] = entry.id
+            st.rerun()
+    h1, h2, h3 = st.columns([1, 1, 1])
+    with h1:
+        if st.button("◀", key="history_prev", disabled=history_page == 0, use_container_width=True):
+            st.session_state["history_page"] = history_page - 1
+            st.rerun()
+    with h2:
+        st.caption(f"Hal. {history_page + 1}")
+    with h3:
+        if st.button("▶", key="history_next", disabled=len(history_rows) <= HISTORY_PAGE_SIZE,
+                     use_container_width=True):
+            st.session_state["history_page"] = history_page + 1
+            st.rerun()
+
     st.divider()
     st.subheader("Pengaturan Global")
     static_camera = st.checkbox("Kunci kamera (statis)", value=True)
@@ -567,167 +164,115 @@ with st.sidebar:
     diag_lighting = st.checkbox("Pencahayaan diagonal dramatis (BL → TR)", value=True)
 
     st.divider()
-    n_variations = st.number_input("Variasi (Gemini)", min_value=1, max_value=10, value=3, step=1)
+    n_variations = st.number_input("Variasi (Gemini)", min_value=1, max_value=MAX_VARIATIONS, value=3, step=1,
+                                   help=f"Dipecah menjadi request paralel berisi {VARIATIONS_PER_REQUEST} variasi.")
     style_bias = st.selectbox("Bias gaya", STYLE_PRESETS, index=0)
-
-# Handle custom theme generation
-KEY_ALIASES = {
-    "foreground": "Foreground", "latar depan": "Foreground",
-    "midground": "Midground", "lapisan tengah": "Midground",
-    "background": "Background", "latar belakang": "Background",
-    "floating elements": "Floating Elements", "elemen mengambang": "Floating Elements",
-    "central banner": "Central Banner", "papan utama": "Central Banner",
-    "text & effects": "Text & Effects", "teks & efek": "Text & Effects",
-    "background style": "Background Style", "gaya latar": "Background Style",
-    "style & lighting": "Style & Lighting", "gaya & pencahayaan": "Style & Lighting",
+    stream_output = st.checkbox("Tampilkan hasil bertahap (streaming)", value=True,
+                                help="Teks muncul sedikit demi sedikit, tidak menunggu respons lengkap.")
+
+    routes = router.status(api_key or default_key, model)
+    active = [r for r in routes if not r["cooldown"]]
+    st.caption(f"Sisa anggaran: {sum(r['rpm'] for r in active)}/menit • {sum(r['rpd'] for r in active)}/hari • "
+               f"{len(active)}/{len(routes)} key×model aktif (proses ini)")
+    if len(routes) > 1:
+        with st.expander("Rute Gemini"):
+            for r in routes:
+                state = f"jeda {r['cooldown'] / 60:.0f} mnt ({r['last_error']})" if r["cooldown"] else "aktif"
+                st.caption(f"`{r['key']}` • {r['model']} • {state} • {r['rpm']}/mnt • {r['calls']} panggilan")
+    cache_stats = get_translation_cache().stats()
+    st.caption(f"Cache terjemahan: {cache_stats['hits']} hit • {cache_stats['misses']} miss • {cache_stats['entries']} entri")
+
+gemini_key = api_key or default_key
+toggles = {
+    "static_camera": static_camera,
+    "black_bg": black_bg,
+    "ultra_sharp": ultra_sharp,
+    "diag_lighting": diag_lighting
 }
 
-def get_suggested_text_effects(style_lighting: str) -> str:
-    """
-    Berikan saran otomatis untuk Text & Effects berdasarkan Style & Lighting.
-    Menyertakan kata kunci umum seperti Starburst, konfeti, bokeh, glow.
-    """
-    style = style_lighting.lower()
-
-    # Gaya Realistis / Natural / Fotografi
-    if any(k in style for k in ["photorealistic", "dslr", "8k", "natural", "realistic", "documentary", "portrait", "cinematic", "environmental", "fine art", "ethnographic"]):
-        return "Tidak ada efek tambahan. Fokus pada subjek dan lingkungan. (Contoh: bayangan alami, watermark halus)"
 
-    # Gaya Kartun / Anak-Anak / 3D
-    elif any(k in style for k in ["3d pixar", "claymation", "kawaii", "chibi", "neon", "playful", "watercolor", "gouache", "papercraft", "halftone", "comic"]):
-        return "Starburst, konfeti pelangi, bintang berkedip, neon glow, bokeh lembut, efek ledakan kecil"
+def current_fields() -> Dict[str, str]:
+    return {k: st.session_state.get(k, "") for k in FIELD_KEYS}
 
-    # Gaya Malam / Sci-Fi / Futuristik
-    elif any(k in style for k in ["holographic", "vaporwave", "isometric", "glitch", "scanline", "rim light", "moonlight", "neon rim"]):
-        return "Neon biru dan ungu, glitch ringan, scanline tipis, glow kuat, efek hologram, bokeh digital"
 
-    # Gaya Tradisional / Budaya
-    elif any(k in style for k in ["traditional", "wood", "carved", "calligraphy", "ethnic", "folk"]):
-        return "Teks terukir di batu atau kayu, tekstur alami, warna tanah atau emas pudar. (Contoh: efek goresan, bayangan dalam)"
+def session_outputs() -> SessionOutputs:
+    """Satu record hasil per sesi (lihat session_outputs.py) — teks tidak disalin ke key lain."""
+    return st.session_state.setdefault("outputs", SessionOutputs())
 
-    # Gaya Minimalis / Bersih
-    elif any(k in style for k in ["minimal", "line-art", "gradient", "clean", "soft blend", "pastel"]):
-        return "Font minimalis, opacity 30%, tanpa outline. (Contoh: bokeh halus, glow sangat lemah)"
 
-    # Default jika tidak cocok
-    return "Starburst, konfeti, bokeh, glow — sesuaikan dengan gaya visual. (Contoh: neon untuk kartun, alami untuk realistis)"
+def remember(kind: str, title: str = "", outputs: Optional[SessionOutputs] = None) -> None:
+    """Simpan hasil (default: hasil sesi saat ini) ke riwayat persisten (lihat prompt_history.py)."""
+    fields = current_fields()
+    title = title or one_line(fields["Central Banner"] or fields["Foreground"])[:80] or "(tanpa judul)"
+    try:
+        get_prompt_history().record(kind, title, (outputs or session_outputs()).export_payload(fields, toggles))
+    except Exception as e:
+        st.toast(f"Riwayat tidak tersimpan: {e}")
 
-def parse_sections(text: str) -> Dict[str, str]:
-    """
-    Parse teks prompt (ID/EN) menjadi bagian-bagian struktur.
-    Mendukung format: "Foreground:", "Latar Depan:", "**Central Banner:**", dll.
-    """
-    # Mapping dari berbagai kemungkinan label ke kunci standar
-    KEY_ALIASES = {
-        "foreground": "Foreground",
-        "latar depan": "Foreground",
-        "latar depan:": "Foreground",
-        "midground": "Midground",
-        "lapisan tengah": "Midground",
-        "lapisan tengah:": "Midground",
-        "background": "Background",
-        "latar belakang": "Background",
-        "latar belakang:": "Background",
-        "floating elements": "Floating Elements",
-        "elemen mengambang": "Floating Elements",
-        "elemen mengambang:": "Floating Elements",
-        "central banner": "Central Banner",
-        "papan utama": "Central Banner",
-        "papan utama:": "Central Banner",
-        "text & effects": "Text & Effects",
-        "teks & efek": "Text & Effects",
-        "teks & efek:": "Text & Effects",
-        "background style": "Background Style",
-        "gaya latar": "Background Style",
-        "gaya latar:": "Background Style",
-        "style & lighting": "Style & Lighting",
-        "gaya & pencahayaan": "Style & Lighting",
-        "gaya & pencahayaan:": "Style & Lighting",
-    }
-
-    parts = {}
-    current_key = None
-
-    for line in text.splitlines():
-        line = line.strip()
-
-        # Hilangkan **bold** atau format lain
-        line = re.sub(r"^\*\*|\*\*$", "", line).strip()
-
-        if not line:
-            continue
-
-        # Cek apakah baris mengandung kunci (dengan : atau tanpa)
-        matched = False
-        for alias, std_key in KEY_ALIASES.items():
-            if line.lower().startswith(alias) and (len(alias) == len(line) or line[len(alias):len(alias)+1] in [":", " "]):
-                # Ekstrak nilai setelah alias
-                if ":" in line:
-                    _, value = line.split(":", 1)
-                    value = value.strip()
-                else:
-                    value = ""
-                current_key = std_key
-                parts[current_key] = value
-                matched = True
-                break
-
-        # Jika tidak ada kunci baru, tambahkan ke bagian terakhir
-        if not matched and current_key:
-            parts[current_key] += " " + line
-
-    # Bersihkan spasi awal/akhir
-    for k in parts:
-        parts[k] = parts[k].strip()
-
-    return parts
 
+mark("custom_theme")
+# Handle custom theme generation
 if gen_custom_clicked:
     # Set flag bahwa tombol ditekan
     st.session_state["run_custom"] = True
     st.session_state["custom_theme_input"] = custom_theme
     st.session_state["style_bias_at_run"] = style_bias
+    st.session_state["fresh_theme_at_run"] = fresh_theme
     st.rerun()
 
 # Cek apakah perlu generate (hanya sekali)
 if st.session_state.get("run_custom", False):
     theme = st.session_state.get("custom_theme_input", "")
     bias = st.session_state.get("style_bias_at_run", STYLE_PRESETS[0])
+    # Tema yang sama/mirip (urutan kata, huruf besar, tanda baca) dengan bias yang sama: pakai hasil tersimpan
+    theme_hit = None
+    if theme and not st.session_state.get("fresh_theme_at_run"):
+        theme_hit = get_theme_cache().lookup(theme, bias)
+        telemetry.THEME_CACHE.inc(result="hit" if theme_hit else "miss")
+    elif theme:
+        telemetry.THEME_CACHE.inc(result="bypass")
     if not theme:
         st.error("Masukkan tema terlebih dahulu.")
-    elif not (api_key or os.getenv("GEMINI_API_KEY")):
+    elif theme_hit is not None:
+        for key, value in theme_hit.fields.items():
+            st.session_state[key] = value
+        st.success(f"⚡ Template dari tema serupa: “{theme_hit.theme}” (kemiripan {theme_hit.similarity:.0%}). "
+                   "Centang 'Paksa generate baru' untuk hasil segar.")
+    elif not gemini_key:
         st.error("Harap isi GEMINI_API_KEY.")
     else:
         try:
-            prompt = f"""
-Anda adalah seniman konsep sangat berpengalaman dan bersertifikat international. Buat prompt scene rinci berdasarkan tema: {theme}.
-Gunakan STRUKTUR PERSIS BERIKUT (hanya gunakan label ini, satu per baris):
-
-Foreground: [deskripsi karakter utama]
-Midground: [elemen pendukung]
-Background: [lingkungan jauh]
-Floating Elements: [elemen mengambang seperti balon, neon]
-Central Banner: [judul utama + gaya]
-Text & Effects: [teks promosi + efek visual]
-Background Style: [gaya latar belakang]
-Style & Lighting: [gaya visual dan pencahayaan]
-
-Gunakan bahasa Indonesia. Jangan gunakan bold, jangan tambahkan komentar.
-Tambahkan detail visual yang menyenangkan anak-anak atau dewasa sesuai dengan tema yang di inginkan atau di tulis di tema custom.
-{bias}
-"""
-            generated = _call_gemini(prompt, model, api_key or os.getenv("GEMINI_API_KEY"))
+            prompt = build_theme_prompt(theme, bias)
+            if stream_output:
+                # Isi field segera setelah baris section-nya lengkap
+                timings: Dict[str, float] = {}
+                preview = st.empty()
+                generated = ""
+                section_feed = SectionParser()
+                for chunk in stream_call(partial(stream_gemini, prompt, model, gemini_key, timings=timings)):
+                    generated += chunk
+                    sec = section_feed.feed(chunk).sections  # hanya baris lengkap, tanpa parse ulang
+                    preview.markdown("\n".join(f"- **{k}:** {sec[k]}" for k in FIELD_KEYS if k in sec) or "⏳ …")
+                preview.empty()
+                st.caption(f"Token pertama {timings.get('ttft', 0):.2f} s • total {timings.get('total', 0):.2f} s")
+            else:
+                generated = _call_gemini(prompt, model, gemini_key)
             sec = parse_sections(generated)
             for key in FIELD_KEYS:
                 if key in sec:
                     st.session_state[key] = sec[key]
+            if any(sec.get(k) for k in FIELD_KEYS):
+                get_theme_cache().put(theme, bias, {k: sec[k] for k in FIELD_KEYS if k in sec})
+                remember("theme", theme, SessionOutputs())  # field baru; hasil lama sesi tidak ikut
             st.success(f"✨ Template berhasil dibuat dari tema: {theme}")
         except Exception as e:
             st.error(str(e))  # Hanya tampilkan pesan yang sudah dibuat rapi
     st.session_state.pop("run_custom", None)
     st.session_state.pop("custom_theme_input", None)
     st.session_state.pop("style_bias_at_run", None)
+    st.session_state.pop("fresh_theme_at_run", None)
 
+mark("template")
 # Apply template when clicked
 if apply_sidebar_template:
     st.session_state["run_apply"] = True
@@ -737,7 +282,7 @@ if apply_sidebar_template:
 if st.session_state.get("run_apply", False):
     choice = st.session_state.get("preset_choice", "")
     if choice == "— None (kosong) —":
-        for key in ["Foreground","Midground","Background","Floating Elements","Central Banner","Text & Effects","Background Style","Style & Lighting"]:
+        for key in FIELD_KEYS:
             st.session_state[key] = ""
         st.toast("Template kosong dimuat.")
     elif choice in PRESETS:
@@ -748,191 +293,390 @@ if st.session_state.get("run_apply", False):
     st.session_state.pop("run_apply", None)
     st.session_state.pop("preset_choice", None)
 
+mark("init_fields")
 # Initialize fields as empty by default (CRITICAL: before any st.text_area)
-FIELD_KEYS = [
-    "Foreground", "Midground", "Background", "Floating Elements",
-    "Central Banner", "Text & Effects", "Background Style", "Style & Lighting"
-]
 for key in FIELD_KEYS:
     if key not in st.session_state:
         st.session_state[key] = ""
 
-# Builder (compact)
-st.subheader("🧱 Builder Detail")
-# Ambil nilai terbaru dari session_state
-current_style = st.session_state["Style & Lighting"]
-
-# Dapatkan saran
-suggested_te = get_suggested_text_effects(current_style)
-c1, c2 = st.columns(2)
-with c1:
-    fg = st.text_area("Foreground", value=st.session_state["Foreground"], height=110, help="Karakter/objek utama + pose + posisi.")
-    mg = st.text_area("Midground", value=st.session_state["Midground"], height=110, help="Elemen pendukung + gerak.")
-    bg = st.text_area("Background", value=st.session_state["Background"], height=110, help="Lingkungan jauh / langit.")
-with c2:
-    fl = st.text_area("Floating Elements", value=st.session_state["Floating Elements"], height=90, help="Balon, tulisan, ikon, gelembung.")
-    cb = st.text_area("Central Banner", value=st.session_state["Central Banner"], height=80, help="Pesan utama + gaya.")
-    te = st.text_area("Text & Effects", value=st.session_state["Text & Effects"], height=80, help="Starburst, konfeti, bokeh, glow.")
-    bs = st.text_area("Background Style", value=st.session_state["Background Style"], height=80, help="Bokeh, gradien, pola.")
-    sl = st.text_area("Style & Lighting", value=st.session_state["Style & Lighting"], height=110, placeholder=style_bias)
-
-fields = {k: st.session_state[k] for k in FIELD_KEYS}
-toggles = {
-    "static_camera": static_camera,
-    "black_bg": black_bg,
-    "ultra_sharp": ultra_sharp,
-    "diag_lighting": diag_lighting
-}
+# Halaman dipecah menjadi fragmen yang rerun sendiri-sendiri: mengetik di
+# builder hanya merender ulang builder + hasil, klik enhance/variasi hanya
+# panelnya, dan navigasi grid template hanya grid. Sidebar tetap memicu
+# rerun penuh karena pengaturannya dipakai semua fragmen.
+PRESET_PAGE_SIZE = 12  # 4 baris × 3 kolom per halaman grid
 
-# Compose
-base_prompt_en = compose_prompt(fields, toggles)
-base_prompt_id = compose_prompt_localized(fields, toggles, lang="ID")
 
-# Buttons
-st.divider()
-b1, b2, b3 = st.columns(3)
-with b1:
-    gen_clicked = st.button("🧱 Buat Prompt", use_container_width=True, key="generate")
-with b2:
-    enh_clicked = st.button("✨ Tingkatkan Prompt", use_container_width=True, key="enhance")
-with b3:
-    var_clicked = st.button("🔁 Variasi Prompt", use_container_width=True, key="variations")
-
-if gen_clicked:
-    st.session_state["base_prompt_id"] = base_prompt_id
-    st.session_state["base_prompt_en"] = base_prompt_en
-    st.session_state["auto_translated_en"] = ""  # Reset terjemahan lama
-    st.success("Prompt dibuat.")
-
-if enh_clicked:
-    if not (api_key or os.getenv("GEMINI_API_KEY")):
-        st.error("Isi GEMINI_API_KEY terlebih dahulu.")
-    else:
-        try:
-            enhanced = _call_gemini(
-                f"Act as a senior prompt engineer. Polish the following prompt without changing structure:\n{base_prompt_en}",
-                model,
-                api_key or os.getenv("GEMINI_API_KEY"),
-            )
-            st.session_state["enhanced_prompt_en"] = enhanced
-            st.success("✅ Enhanced EN siap.")
-        except Exception as e:
-            st.error(str(e))
+def translation_job_id(fields: Dict[str, str]) -> str:
+    # Digest, bukan JSON field utuh: session_state tidak menyimpan salinan teks kedua
+    return sha1(json.dumps([fields, toggles, model, bool(gemini_key)], sort_keys=True).encode("utf-8")).hexdigest()
 
-if var_clicked:
-    if not (api_key or os.getenv("GEMINI_API_KEY")):
-        st.error("Isi GEMINI_API_KEY terlebih dahulu.")
-    else:
-        try:
-            variations = _call_gemini(
-                f"Produce {n_variations} alternative prompts following the same structure and kid-safe tone:\n{base_prompt_en}",
-                model,
-                api_key or os.getenv("GEMINI_API_KEY"),
-            )
-            st.session_state["variations_en"] = variations
-            st.success("✅ Variasi EN dibuat.")
-        except Exception as e:
-            st.error(str(e))
 
-# Auto English translation
-auto_en = translate_to_english(base_prompt_id, api_key or os.getenv("GEMINI_API_KEY",""), model)
+def ensure_translation_job(fields: Dict[str, str]) -> dict:
+    """
+    Terjemahan Inggris otomatis — job latar belakang per sesi (per bagian,
+    hanya bagian yang berubah dikirim). Job lama dibatalkan bila input berubah.
+    """
+    translate_job_id = translation_job_id(fields)
+    translate_job = st.session_state.get("translate_job")
+    if translate_job is None or translate_job["id"] != translate_job_id:
+        if translate_job is not None:
+            translate_job["future"].cancel()  # Job lama tergantikan; bila sudah jalan, hasilnya diabaikan
+        job_warnings: List[str] = []
+        translate_job = {
+            "id": translate_job_id,
+            "warnings": job_warnings,
+            # partial mengikat nilai saat ini; variabel skrip bisa berganti saat rerun berikutnya
+            "future": submit_background(partial(translate_fields_to_english, dict(fields), dict(toggles), gemini_key, model,
+                                          warn=job_warnings.append)),
+        }
+        st.session_state["translate_job"] = translate_job
+    try:
+        # Hit cache selesai dalam milidetik — tunggu sebentar agar tidak berkedip "usang"
+        translate_job["future"].result(timeout=0.05)
+    except Exception:
+        pass
+    return translate_job
 
-# Output
-st.subheader("📄 Hasil Prompt ")
-co1, co2 = st.columns(2)
-with co1:
-    st.markdown("#### 🇮🇩 Versi Indonesia")
-    st.markdown('<div class="dialog-card">', unsafe_allow_html=True)
-    text_id = st.session_state.get("base_prompt_id", base_prompt_id)
-    st.code(text_id or "(kosong)", language="text")
-    one_line_id = re.sub(r'\s+', ' ', text_id or '').strip()
-    st.markdown("**One-line (ID):**")
-    st.code(one_line_id or "(kosong)", language="text")
-    st.markdown('</div>', unsafe_allow_html=True)
 
-with co2:
+def translation_poller() -> None:
+    """
+    Didaftarkan sekali (run_every) selama terjemahan berjalan. Begitu job terbaru
+    selesai, satu rerun penuh menampilkan hasilnya sekaligus menghapus interval
+    polling di browser — interval run_every hanya dibersihkan oleh run penuh.
+    """
+    translate_job = st.session_state.get("translate_job")
+    if translate_job is None or translate_job["future"].done():
+        st.rerun()
+
+
+def english_panel(fallback: str) -> None:
+    """Panel EN; selama job berjalan, teks terakhir ditampilkan dengan tanda "usang"."""
+    translate_job = st.session_state["translate_job"]
+    outputs = session_outputs()
+    translate_stale = not translate_job["future"].done()
+    if not translate_stale and not translate_job.get("applied"):
+        translate_job["applied"] = True
+        for msg in translate_job["warnings"]:
+            st.warning(msg)
+        try:
+            outputs.text_en = translate_job["future"].result()
+            translate_job["ok"] = bool(gemini_key and outputs.text_en.strip())
+        except Exception as e:
+            st.warning(f"Terjemahan gagal: {e}")
+            outputs.text_en = fallback
+    # Riwayat hanya untuk "Buat Prompt" yang eksplisit, bukan setiap draf saat mengetik;
+    # bila terjemahan belum selesai, pencatatan menunggu hasilnya
+    if not translate_stale and st.session_state.pop("remember_translation", False) and translate_job.get("ok"):
+        remember("translation")
+    auto_en = outputs.text_en
+
     st.markdown("#### 🇬🇧 Versi Inggris")
     st.markdown('<div class="dialog-card">', unsafe_allow_html=True)
     text_en = auto_en.strip()
     if not text_en:  # Jika belum pernah dibuat
-        if api_key or os.getenv("GEMINI_API_KEY"):
-            text_en = translate_to_english(base_prompt_id, api_key or "", model)
-        else:
+        if translate_stale:
+            text_en = "(Menerjemahkan…)"
+        elif not gemini_key:
             text_en = "(Inggris: API Key diperlukan untuk terjemahan)"
+    if translate_stale:
+        st.caption("⏳ Terjemahan sedang diperbarui — teks di bawah versi sebelumnya.")
     st.code(text_en or "(empty)", language="text")
     one_line_en = re.sub(r'\s+', ' ', auto_en or '').strip()
     st.markdown("**One-line (EN):**")
     st.code(one_line_en or "(empty)", language="text")
     st.markdown('</div>', unsafe_allow_html=True)
 
-# Enhanced & Variations
-st.subheader("🌟 Enhanced Prompt (English)")
-st.markdown('<div class="dialog-card">', unsafe_allow_html=True)
-st.code(st.session_state.get("enhanced_prompt_en", "(Klik ‘Tingkatkan’ untuk menyempurnakan versi Inggris.)"), language="text")
-st.markdown('</div>', unsafe_allow_html=True)
-
-st.subheader("🔀 Variations (English)")
-st.markdown('<div class="dialog-card">', unsafe_allow_html=True)
-st.code(st.session_state.get("variations_en", "(Klik ‘Variasi’ untuk menghasilkan alternatif.)"), language="text")
-st.markdown('</div>', unsafe_allow_html=True)
-
-# Downloads
-from io import StringIO
-id_stream = StringIO(text_id or "")
-en_stream = StringIO(auto_en or "")
-one_id_stream = StringIO(one_line_id or "")
-one_en_stream = StringIO(one_line_en or "")
-enh_stream = StringIO(st.session_state.get("enhanced_prompt_en", ""))
-var_stream = StringIO(st.session_state.get("variations_en", ""))
-
-d1, d2, d3, d4, d5, d6 = st.columns(6)
-with d1: st.download_button("⬇️ ID.txt", data=id_stream.getvalue(), file_name="prompt_id.txt", use_container_width=True)
-with d2: st.download_button("⬇️ EN.txt", data=en_stream.getvalue(), file_name="prompt_en.txt", use_container_width=True)
-with d3: st.download_button("⬇️ One-line ID.txt", data=one_id_stream.getvalue(), file_name="prompt_id_oneline.txt", use_container_width=True)
-with d4: st.download_button("⬇️ One-line EN.txt", data=one_en_stream.getvalue(), file_name="prompt_en_oneline.txt", use_container_width=True)
-with d5:
-    if enh_stream.getvalue().strip():
-        st.download_button("⬇️ Enhanced EN.txt", data=enh_stream.getvalue(), file_name="prompt_enhanced.txt", use_container_width=True)
-with d6:
-    if var_stream.getvalue().strip():
-        st.download_button("⬇️ Variations EN.txt", data=var_stream.getvalue(), file_name="prompts_variations.txt", use_container_width=True)
-
-# Export JSON
-export_payload = {
-    "fields": fields,
-    "toggles": toggles,
-    "outputs": {
-        "id": text_id or "",
-        "en": text_en or "",
-        "one_line_id": one_line_id or "",
-        "one_line_en": one_line_en or "",
-        "enhanced_en": st.session_state.get("enhanced_prompt_en", "") or "",
-        "variations_en": st.session_state.get("variations_en", "") or "",
-    }
-}
-st.download_button("⬇️ Export JSON", data=json.dumps(export_payload, ensure_ascii=False, indent=2), file_name="prompt_export.json", use_container_width=True, mime="application/json")
 
-# Compact preset grid
-st.divider()
-st.subheader("🎨 Pilihan Template")
-with st.container(height=400, border=True):
-    keys = list(PRESETS.keys())
-    for i in range(0, len(keys), 3):
-        cols = st.columns(3)
-        for j in range(3):
-            idx = i + j
-            if idx < len(keys):
+@st.fragment
+@profiled("builder", new_profiler, keep_profile)
+def builder_section() -> None:
+    st.subheader("🧱 Builder Detail")
+    c1, c2 = st.columns(2)
+    with c1:
+        st.text_area("Foreground", key="Foreground", height=110, help="Karakter/objek utama + pose + posisi.")
+        st.text_area("Midground", key="Midground", height=110, help="Elemen pendukung + gerak.")
+        st.text_area("Background", key="Background", height=110, help="Lingkungan jauh / langit.")
+    # Saran dari gaya saat ini (tabel kata kunci, dimemo) — hanya placeholder, nilai tidak diubah
+    suggested = get_style_suggester().suggest(st.session_state.get("Style & Lighting") or style_bias)
+    with c2:
+        st.text_area("Floating Elements", key="Floating Elements", height=90, help="Balon, tulisan, ikon, gelembung.",
+                     placeholder=suggested.get("Floating Elements"))
+        st.text_area("Central Banner", key="Central Banner", height=80, help="Pesan utama + gaya.")
+        st.text_area("Text & Effects", key="Text & Effects", height=80, help="Starburst, konfeti, bokeh, glow.",
+                     placeholder=suggested.get("Text & Effects"))
+        st.text_area("Background Style", key="Background Style", height=80, help="Bokeh, gradien, pola.",
+                     placeholder=suggested.get("Background Style"))
+        st.text_area("Style & Lighting", key="Style & Lighting", height=110, placeholder=style_bias)
+
+    mark("builder:compose")
+    fields = current_fields()
+    base_prompt_id = compose_prompt_localized(fields, toggles, lang="ID")
+
+    st.divider()
+    if st.button("🧱 Buat Prompt", use_container_width=True, key="generate"):
+        session_outputs().text_id = base_prompt_id
+        st.session_state["remember_translation"] = True
+        st.success("Prompt dibuat.")
+
+    mark("builder:translation")
+    translate_job = ensure_translation_job(fields)
+
+    # Output
+    mark("builder:output")
+    st.subheader("📄 Hasil Prompt ")
+    co1, co2 = st.columns(2)
+    with co1:
+        st.markdown("#### 🇮🇩 Versi Indonesia")
+        st.markdown('<div class="dialog-card">', unsafe_allow_html=True)
+        text_id = session_outputs().resolve_id(fields, toggles)
+        st.code(text_id or "(kosong)", language="text")
+        one_line_id = re.sub(r'\s+', ' ', text_id or '').strip()
+        st.markdown("**One-line (ID):**")
+        st.code(one_line_id or "(kosong)", language="text")
+        st.markdown('</div>', unsafe_allow_html=True)
+
+    with co2:
+        english_panel(base_prompt_id)
+        # Satu poller per run penuh: rerun builder berikutnya tidak menambah interval baru
+        if not translate_job["future"].done() and not st.session_state.get("translate_poller"):
+            st.session_state["translate_poller"] = True
+            st.fragment(translation_poller, run_every=0.5)()
+
+
+@st.fragment
+@profiled("generators", new_profiler, keep_profile)
+def generator_section() -> None:
+    fields = current_fields()
+    base_prompt_en = compose_prompt(fields, toggles)
+    # Pesan dari klik sebelumnya, ditampilkan ulang setelah rerun seluruh halaman (lihat bawah)
+    notices: List[Tuple[str, str]] = []
+
+    def notify(level: str, text: str) -> None:
+        notices.append((level, text))
+        getattr(st, level)(text)
+
+    for level, text in st.session_state.pop("generator_notices", []):
+        getattr(st, level)(text)
+
+    b1, b2 = st.columns(2)
+    with b1:
+        enh_clicked = st.button("✨ Tingkatkan Prompt", use_container_width=True, key="enhance")
+    with b2:
+        var_clicked = st.button("🔁 Variasi Prompt", use_container_width=True, key="variations")
+    if (enh_clicked or var_clicked) and not gemini_key:
+        st.error("Isi GEMINI_API_KEY terlebih dahulu.")
+
+    # Enhance dan variasi saling lepas: kirim bersamaan sehingga waktu
+    # tunggu ≈ panggilan paling lambat, bukan jumlah semuanya.
+    mark("generators:calls")
+    jobs = {}
+    clicked_prompts = {}
+    if enh_clicked and gemini_key:
+        clicked_prompts["enhance"] = f"Act as a senior prompt engineer. Polish the following prompt without changing structure:\n{base_prompt_en}"
+    if not stream_output:
+        for name, prompt in clicked_prompts.items():
+            jobs[name] = lambda prompt=prompt: _call_gemini(prompt, model, gemini_key)
+    pending = start_calls(jobs)
+
+    # Mode streaming: enhance/variasi dirender bertahap di thread skrip
+    streamed = {}
+    for name, prompt in (clicked_prompts.items() if stream_output else []):
+        timings: Dict[str, float] = {}
+        live = st.empty()
+        text = ""
+        try:
+            for chunk in stream_call(partial(stream_gemini, prompt, model, gemini_key, timings=timings)):
+                text += chunk
+                live.code(text, language="text")
+            streamed[name] = (text, None)
+        except Exception as e:
+            streamed[name] = (text, e)
+        live.empty()
+        st.session_state[f"stream_timings_{name}"] = timings
+
+    # Variasi: request paralel (lihat variations.py); panel diperbarui setiap satu respons masuk
+    if var_clicked and gemini_key:
+        var_live = st.empty()
+
+        def show_progress(records: List[Dict[str, str]]) -> None:
+            var_live.code(render_variations(records, toggles) or "…", language="text")
+
+        # Tanpa baris toggle: render_variations menambahkannya ke setiap variasi
+        var = generate_variations(compose_prompt(fields, {}), int(n_variations), gemini_key, model,
+                                  base_fields=fields, on_batch=show_progress)
+        var_live.empty()
+        if var.records:
+            session_outputs().variations = var.records
+            remember("variations")
+            st.session_state["variations_info"] = (
+                f"{len(var.records)} varian unik dari {var.requests} request "
+                f"({var.duplicates} duplikat dibuang) • {var.elapsed:.2f} s"
+            )
+            notify("success", "✅ Variasi EN dibuat.")
+            if var.errors:
+                notify("warning", f"{len(var.errors)} request variasi gagal: {var.errors[0]}")
+        else:
+            notify("error", str(var.errors[0]) if var.errors else "Gemini tidak mengembalikan variasi yang bisa dibaca.")
+
+    results = pending.results() if jobs else {}
+    for name, (text, err) in streamed.items():
+        results[name] = CallResult(text, err, st.session_state[f"stream_timings_{name}"].get("total", 0.0))
+
+    if "enhance" in results:
+        if results["enhance"].error:
+            notify("error", str(results["enhance"].error))
+        else:
+            session_outputs().enhanced_en = results["enhance"].value
+            remember("enhance")
+            notify("success", "✅ Enhanced EN siap.")
+
+    # Hasil baru mengubah daftar unduhan, yang ada di fragmen lain: rerun seluruh
+    # halaman agar downloads_section ikut diperbarui; pesan di atas dibawa lewat state.
+    if any(level == "success" for level, _ in notices):
+        st.session_state["generator_notices"] = notices
+        st.rerun(scope="app")
+
+    # Enhanced & Variations
+    mark("generators:panels")
+    st.subheader("🌟 Enhanced Prompt (English)")
+    st.markdown('<div class="dialog-card">', unsafe_allow_html=True)
+    outputs = session_outputs()
+    st.code(outputs.enhanced_en or "(Klik ‘Tingkatkan’ untuk menyempurnakan versi Inggris.)", language="text")
+    st.markdown('</div>', unsafe_allow_html=True)
+    if "stream_timings_enhance" in st.session_state:
+        t = st.session_state["stream_timings_enhance"]
+        st.caption(f"Token pertama {t.get('ttft', 0):.2f} s • total {t.get('total', 0):.2f} s")
+
+    st.subheader("🔀 Variations (English)")
+    st.markdown('<div class="dialog-card">', unsafe_allow_html=True)
+    st.code(render_variations(outputs.variations, toggles) or "(Klik ‘Variasi’ untuk menghasilkan alternatif.)", language="text")
+    st.markdown('</div>', unsafe_allow_html=True)
+    if "variations_info" in st.session_state:
+        st.caption(st.session_state["variations_info"])
+
+
+@st.fragment
+@profiled("downloads", new_profiler, keep_profile)
+def downloads_section() -> None:
+    # Isi berkas dibangun hanya pada rerun saat "Siapkan" diklik; rerun lain
+    # tidak mengirim data unduhan apa pun ke browser.
+    st.subheader("⬇️ Unduhan")
+    outputs = session_outputs()
+    kinds = available_downloads(outputs)
+    u1, u2 = st.columns([3, 1])
+    with u1:
+        kind = st.selectbox("Berkas", kinds, key="download_kind", format_func=lambda k: DOWNLOADS[k].label,
+                            label_visibility="collapsed")
+    with u2:
+        prepare = st.button("Siapkan", key="download_prepare", use_container_width=True)
+    if prepare and kind:
+        d = DOWNLOADS[kind]
+        st.download_button(f"⬇️ {d.label}", data=build_download(kind, outputs, current_fields(), toggles),
+                           file_name=d.file_name, mime=d.mime, use_container_width=True, key="download_ready")
+
+
+def apply_preset(title: str) -> None:
+    # Callback berjalan sebelum rerun, jadi aman mengisi key milik text_area builder
+    for k, v in PRESETS[title].items():
+        st.session_state[k] = v
+
+
+@st.fragment
+@profiled("preset_grid", new_profiler, keep_profile)
+def preset_grid() -> None:
+    st.subheader("🎨 Pilihan Template")
+    keys = preset_matches
+    pages = max(1, -(-len(keys) // PRESET_PAGE_SIZE))
+    page = min(st.session_state.get("preset_page", 0), pages - 1)
+    p1, p2, p3 = st.columns([1, 2, 1])
+    with p1:
+        if st.button("◀ Sebelumnya", key="preset_prev", disabled=page == 0, use_container_width=True):
+            page -= 1
+    with p3:
+        if st.button("Berikutnya ▶", key="preset_next", disabled=page >= pages - 1, use_container_width=True):
+            page += 1
+    st.session_state["preset_page"] = page
+    with p2:
+        st.caption(f"Halaman {page + 1}/{pages} • {len(keys)} template")
+
+    # Hanya kartu di halaman aktif yang dirender
+    visible = keys[page * PRESET_PAGE_SIZE:(page + 1) * PRESET_PAGE_SIZE]
+    with st.container(height=400, border=True):
+        if not visible:
+            st.caption("Tidak ada template yang cocok dengan pencarian.")
+        for i in range(0, len(visible), 3):
+            cols = st.columns(3)
+            for j, title in enumerate(visible[i:i + 3]):
                 with cols[j]:
                     st.markdown('<div class="thin-outline" style="padding:10px;">', unsafe_allow_html=True)
-                    st.markdown(f"**{keys[idx]}**")
-                    st.caption(PRESETS[keys[idx]]['Foreground'][:110] + "…")
-                    if st.button("Pilih", key=f"preset_{idx}", use_container_width=True):
-                        for k,v in PRESETS[keys[idx]].items():
-                            st.session_state[k] = v
-                        st.toast(f"Template dimuat: {keys[idx]}")
-                        st.rerun()
+                    st.markdown(f"**{title}**")
+                    st.caption(PRESETS[title]['Foreground'][:110] + "…")
+                    if st.button("Pilih", key=f"preset_{title}", use_container_width=True,
+                                 on_click=apply_preset, args=(title,)):
+                        st.toast(f"Template dimuat: {title}")
+                        st.rerun()  # Builder & hasil ada di fragmen lain: rerun seluruh halaman
                     st.markdown('</div>', unsafe_allow_html=True)
 
+
+mark("history")
+# Muat entri riwayat (klik di sidebar) sebelum text_area builder dibuat — tanpa panggilan API
+if st.session_state.get("history_load") is not None:
+    payload = get_prompt_history().get(st.session_state.pop("history_load"))
+    if payload is None:
+        st.toast("Entri riwayat sudah tidak ada.")
+    else:
+        past = payload["outputs"]
+        loaded_fields = {k: payload["fields"].get(k, "") for k in FIELD_KEYS}
+        for key, value in loaded_fields.items():
+            st.session_state[key] = value
+        outputs = session_outputs()
+        # text_id tetap None: field yang dipulihkan menyusun teks yang sama, dan panel ID
+        # serta unduhan tetap mengikuti suntingan berikutnya (seperti sebelum "Buat Prompt")
+        outputs.text_id = None
+        outputs.text_en = past.get("en", "")
+        outputs.enhanced_en = past.get("enhanced_en", "")
+        outputs.variations = past.get("variations", [])
+        st.session_state.pop("variations_info", None)
+        if outputs.text_en and payload.get("toggles") == toggles:
+            # Terjemahan tersimpan berlaku untuk field + toggle ini: job dianggap sudah selesai
+            done: Future = Future()
+            done.set_result(outputs.text_en)
+            st.session_state["translate_job"] = {"id": translation_job_id(loaded_fields), "warnings": [],
+                                                 "future": done, "applied": True, "ok": True}
+        st.toast("Riwayat dimuat ke builder.")
+
+builder_section()
+st.divider()
+generator_section()
+st.divider()
+downloads_section()
+st.divider()
+preset_grid()
+
+mark("footer")
 st.caption("v3.1 • All fixes created @effands ft Ai | create August 2025  |  wa 0856 4990 5055")
 st.caption("🙏 Terima Kasih")
 st.caption("Dibuat dengan ❤️ untuk kreator Indonesia")
+
+# Memori per sesi: diukur hanya bila ada yang membaca (endpoint metrik atau panel profil)
+session_bytes = {}
+if metrics_port or rerun_profile is not None:
+    session_bytes = session_memory({k: st.session_state[k] for k in st.session_state.keys()})
+    telemetry.SESSION_BYTES.observe(sum(session_bytes.values()))
+
+if rerun_profile is not None:
+    keep_profile(rerun_profile.finish())
+    runs = list(st.session_state["profile_runs"])
+    with st.expander(f"🛠 Profil rerun ({len(runs)} terakhir)", expanded=False):
+        pick = st.selectbox("Rerun", range(len(runs) - 1, -1, -1), key="profile_pick",
+                            format_func=lambda i: f"#{i + 1} {runs[i]['label']} — {runs[i]['total'] * 1000:.0f} ms")
+        chosen = runs[pick if pick is not None and pick < len(runs) else -1]
+        st.markdown(rerun_profiler.waterfall_html(chosen), unsafe_allow_html=True)
+        if chosen["dump"]:
+            st.caption(f"cProfile: `{chosen['dump']}` (buka dengan snakeviz / pstats)")
+        st.caption(" • ".join(f"{r['label']} {r['total'] * 1000:.0f} ms" for r in runs[-10:]))
+        st.caption(f"session_state ≈ {sum(session_bytes.values()) / 1024:.1f} KiB: "
+                   + " • ".join(f"{k} {v / 1024:.1f}" for k, v in list(session_bytes.items())[:8]))
+        warm = warmup.last_report()
+        if warm:
+            st.caption("Warm-up proses: " + " • ".join(f"{k} {v * 1000:.0f} ms" for k, v in warm.items()))
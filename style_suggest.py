@@ -0,0 +1,139 @@
+# style_suggest.py — saran field dari teks "Style & Lighting" (data/style_suggestions.json)
+#
+# Semua kata kunci semua bucket dikompilasi sekali menjadi satu automaton
+# Aho-Corasick; satu lintasan atas teks gaya menghasilkan skor berbobot per
+# bucket. Biaya per pencarian sebanding panjang teks gaya, bukan jumlah kata
+# kunci, sehingga taksonomi bisa tumbuh ke ribuan kata kunci.
+import json
+import os
+import threading
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
+
+from shared_state import FileReloader
+
+DEFAULT_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "style_suggestions.json")
+SUPPORTED_VERSIONS = {1}
+MEMO_SIZE = 4096  # teks gaya yang sama muncul di setiap rerun; hasilnya cukup dihitung sekali
+
+
+class KeywordAutomaton:
+    """
+    Automaton Aho-Corasick atas kata kunci (huruf kecil, cocok sebagai
+    substring seperti `k in style`). `find` mengembalikan indeks kata kunci
+    yang muncul, masing-masing sekali.
+    """
+
+    def __init__(self, keywords: List[str]):
+        goto: List[Dict[str, int]] = [{}]
+        out: List[Tuple[int, ...]] = [()]
+        for idx, word in enumerate(keywords):
+            state = 0
+            for ch in word:
+                nxt = goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto[state][ch] = nxt
+                    goto.append({})
+                    out.append(())
+                state = nxt
+            out[state] += (idx,)
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                fail[nxt] = goto[f].get(ch, 0)
+                out[nxt] += out[fail[nxt]]  # BFS: output state gagal sudah lengkap
+        self._goto = goto
+        self._fail = fail
+        self._out = out
+
+    def find(self, text: str) -> Set[int]:
+        goto, fail, out = self._goto, self._fail, self._out
+        found: Set[int] = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class StyleSuggester:
+    """
+    Tabel bucket (nama, kata kunci berbobot, saran per field) dimuat sekali.
+    Bucket dengan skor tertinggi menang; seri dimenangkan urutan tabel. Field
+    yang tidak diisi bucket pemenang diambil dari bucket berikutnya yang cocok,
+    lalu dari `default`.
+    """
+
+    def __init__(self, path: str = DEFAULT_TABLE_PATH):
+        self.path = path
+        with open(path, encoding="utf-8") as f:
+            table = json.load(f)
+        self.version = table.get("version")
+        if self.version not in SUPPORTED_VERSIONS:
+            raise ValueError(f"Versi tabel saran gaya tidak didukung: {self.version!r}")
+        self.fields: List[str] = table["fields"]
+        self.buckets: List[str] = [b["name"] for b in table["buckets"]]
+        self.suggestions: List[Dict[str, str]] = [b["suggestions"] for b in table["buckets"]]
+        self.default: Dict[str, str] = table["default"]
+        # Kata kunci yang sama boleh ada di beberapa bucket: satu entri automaton, banyak bobot
+        weights: Dict[str, List[Tuple[int, float]]] = {}
+        for i, bucket in enumerate(table["buckets"]):
+            for word, weight in bucket["keywords"].items():
+                weights.setdefault(word.lower(), []).append((i, float(weight)))
+        self.keywords = list(weights)
+        self._weights = [weights[k] for k in self.keywords]
+        self._automaton = KeywordAutomaton(self.keywords)
+        self._memo: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _totals(self, style: str) -> List[float]:
+        totals = [0.0] * len(self.buckets)
+        for idx in self._automaton.find(style.lower()):
+            for bucket, weight in self._weights[idx]:
+                totals[bucket] += weight
+        return totals
+
+    def scores(self, style: str) -> Dict[str, float]:
+        """Skor per bucket (hanya yang > 0) untuk satu teks gaya — tanpa memo."""
+        return {self.buckets[i]: s for i, s in enumerate(self._totals(style)) if s > 0}
+
+    def _ranked(self, style: str) -> List[int]:
+        totals = self._totals(style)
+        return sorted((i for i, s in enumerate(totals) if s > 0), key=lambda i: (-totals[i], i))
+
+    def rank(self, style: str) -> List[str]:
+        return [self.buckets[i] for i in self._ranked(style)]
+
+    def suggest(self, style: str) -> Dict[str, str]:
+        """Saran untuk setiap field di tabel; hasil per teks gaya dimemo."""
+        with self._lock:
+            hit = self._memo.get(style)
+        if hit is not None:
+            return hit
+        ranked = [self.suggestions[i] for i in self._ranked(style)]
+        result = {}
+        for field in self.fields:
+            result[field] = next((s[field] for s in ranked if s.get(field)), self.default.get(field, ""))
+        with self._lock:
+            if len(self._memo) >= MEMO_SIZE:
+                self._memo.clear()
+            self._memo[style] = result
+        return result
+
+
+_suggester = FileReloader(StyleSuggester)
+
+
+def get_style_suggester(path: Optional[str] = None) -> StyleSuggester:
+    """Tabel aktif; dimuat ulang bila file tabel berubah, seperti pack template di preset_library."""
+    return _suggester.get(path or os.getenv("XPROMPT_STYLE_TABLE", DEFAULT_TABLE_PATH))
@@ -0,0 +1,244 @@
+# telemetry.py — metrik Prometheus (format teks) + span OpenTelemetry opsional
+#
+# XPROMPT_METRICS_PORT=9464  : endpoint http://127.0.0.1:9464/metrics (satu per proses)
+# XPROMPT_OTEL=1             : buat span bila paket opentelemetry terpasang; exporter/provider
+#                              diatur seperti biasa (mis. `opentelemetry-instrument streamlit run ...`)
+import os
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+SIZE_BUCKETS = (100, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+MEMORY_BUCKETS = (1e3, 5e3, 1e4, 5e4, 1e5, 5e5, 1e6, 5e6, 1e7)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: LabelKey, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"] + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}{_labels(self.labelnames, k)} {v:g}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[LabelKey, List[float]] = {}  # hitungan per bucket + [+Inf, sum]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            row = self._values.setdefault(key, [0.0] * (len(self.buckets) + 2))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    row[i] += 1
+                    break
+            else:
+                row[len(self.buckets)] += 1
+            row[-1] += value
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, row in sorted(self._values.items()):
+                cumulative = 0.0
+                for bound, n in zip(self.buckets + (float("inf"),), row):
+                    cumulative += n
+                    le = 'le="+Inf"' if bound == float("inf") else f'le="{bound:g}"'
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative:g}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {row[-1]:g}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative:g}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def _add(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for m in self._metrics for line in m.render()) + "\n"
+
+
+registry = Registry()
+
+# -------------------------------
+# Metrik yang dipakai modul lain
+# -------------------------------
+GEMINI_SECONDS = registry.histogram(
+    "xprompt_gemini_request_seconds", "Durasi panggilan Gemini termasuk antre scheduler dan retry.",
+    ["model", "kind", "outcome"])
+GEMINI_TTFT = registry.histogram(
+    "xprompt_gemini_ttft_seconds", "Waktu hingga chunk pertama pada panggilan streaming.", ["model"])
+GEMINI_REQUEST_BYTES = registry.histogram(
+    "xprompt_gemini_request_bytes", "Ukuran prompt (byte UTF-8).", ["model", "kind"], SIZE_BUCKETS)
+GEMINI_RESPONSE_BYTES = registry.histogram(
+    "xprompt_gemini_response_bytes", "Ukuran respons (byte UTF-8).", ["model", "kind"], SIZE_BUCKETS)
+GEMINI_ERRORS = registry.counter(
+    "xprompt_gemini_errors_total", "Panggilan gagal per kategori (quota, rate_limit_wait, auth, network, other).",
+    ["model", "category"])
+GEMINI_RETRIES = registry.counter(
+    "xprompt_gemini_retries_total", "Pengulangan setelah 429 oleh scheduler.", ["model"])
+GEMINI_PATH = registry.counter(
+    "xprompt_gemini_path_total", "Jalur SDK yang melayani panggilan (genai, genai_models_prefix, legacy).",
+    ["model", "path"])
+SCHEDULER_REMAINING = registry.gauge(
+    "xprompt_scheduler_remaining", "Sisa token bucket scheduler setelah giliran terakhir.",
+    ["model", "key", "window"])
+GEMINI_FAILOVERS = registry.counter(
+    "xprompt_gemini_failovers_total", "Panggilan dialihkan ke key/model lain (quota, auth, rate_limit_wait).",
+    ["model", "key", "category"])
+TRANSLATE_CALLS = registry.counter(
+    "xprompt_translate_calls_total", "Pemanggilan fungsi terjemahan.", ["fn"])
+RERUNS = registry.counter("xprompt_reruns_total", "Rerun skrip Streamlit (penuh).")
+SESSION_BYTES = registry.histogram(
+    "xprompt_session_state_bytes", "Perkiraan memori session_state per sesi, diukur di akhir rerun penuh.",
+    buckets=MEMORY_BUCKETS)
+THEME_CACHE = registry.counter(
+    "xprompt_theme_cache_total", "Pencarian cache tema custom (hit/miss/bypass).", ["result"])
+
+
+def model_label(model_name: str) -> str:
+    return model_name.split("/", 1)[-1]
+
+
+def utf8_len(text: Optional[str]) -> int:
+    return len(text.encode("utf-8")) if text else 0
+
+
+# -------------------------------
+# OpenTelemetry (opsional)
+# -------------------------------
+_tracer = None
+_tracer_checked = False
+
+
+def _get_tracer():
+    global _tracer, _tracer_checked
+    if not _tracer_checked:
+        _tracer_checked = True
+        if os.getenv("XPROMPT_OTEL", "") not in ("", "0"):
+            try:
+                from opentelemetry import trace
+                _tracer = trace.get_tracer("xprompt")
+            except ImportError:
+                _tracer = None
+    return _tracer
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[None]:
+    """Span OpenTelemetry bila XPROMPT_OTEL aktif dan paketnya ada; selain itu tanpa biaya."""
+    tracer = _get_tracer()
+    cm = tracer.start_as_current_span(name, attributes=attributes) if tracer else nullcontext()
+    with cm:
+        yield
+
+
+# -------------------------------
+# Endpoint /metrics
+# -------------------------------
+_server = None  # ThreadingHTTPServer; http.server baru diimpor bila endpoint dipakai
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port: Optional[int] = None, host: str = "127.0.0.1") -> Optional[int]:
+    """
+    Jalankan endpoint /metrics di thread latar (sekali per proses; rerun
+    berikutnya tidak membuka port baru). Port dari argumen atau
+    XPROMPT_METRICS_PORT; tanpa keduanya tidak ada yang dijalankan.
+    """
+    global _server
+    if port is None:
+        port = int(os.getenv("XPROMPT_METRICS_PORT", "0") or 0)
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+            class MetricsHandler(BaseHTTPRequestHandler):
+                def do_GET(self) -> None:
+                    if self.path.split("?", 1)[0] != "/metrics":
+                        self.send_error(404)
+                        return
+                    body = registry.render().encode("utf-8")
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+                def log_message(self, format, *args) -> None:
+                    pass  # jangan membanjiri log Streamlit setiap scrape
+
+            _server = ThreadingHTTPServer((host, port), MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        return _server.server_address[1]
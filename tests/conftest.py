@@ -0,0 +1,9 @@
+# conftest.py — modul aplikasi ada di root repo (tanpa paket), seperti benchmarks/
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Cache & riwayat proses test di memori, bukan di .cache/ repo
+for _var in ("XPROMPT_CACHE_PATH", "XPROMPT_THEME_CACHE_PATH", "XPROMPT_HISTORY_PATH"):
+    os.environ.setdefault(_var, ":memory:")
@@ -0,0 +1,51 @@
+# test_gemini_dispatch.py — pool bersama, pool latar belakang & tenggat stream
+#
+#   python -m pytest -q tests
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import gemini_dispatch
+from gemini_dispatch import stream_call, submit_background, submit_call
+
+
+@pytest.fixture
+def one_worker(monkeypatch):
+    """Pool utama dengan satu worker agar antrean mudah dibuat."""
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(gemini_dispatch, "_executor", pool)
+    yield pool
+    pool.shutdown(wait=True)
+
+
+def test_stream_deadline_starts_when_producer_runs(one_worker):
+    release = threading.Event()
+    one_worker.submit(release.wait)          # worker satu-satunya sedang sibuk
+    threading.Timer(0.3, release.set).start()
+    chunks = list(stream_call(lambda: iter(["a", "b"]), timeout=0.2))
+    assert chunks == ["a", "b"]              # antre 0.3 s tidak dihitung sebagai waktu habis
+
+
+def test_stream_times_out_when_producer_stalls(one_worker):
+    def stalled():
+        yield "a"
+        time.sleep(0.5)
+        yield "b"
+
+    got = []
+    with pytest.raises(Exception, match="Waktu habis"):
+        for chunk in stream_call(stalled, timeout=0.2):
+            got.append(chunk)
+    assert got == ["a"]
+
+
+def test_background_jobs_do_not_hold_user_workers(one_worker):
+    release = threading.Event()
+    blockers = [submit_background(release.wait) for _ in range(gemini_dispatch.BACKGROUND_WORKERS)]
+    try:
+        assert submit_call(lambda: "user").result(timeout=1) == "user"
+    finally:
+        release.set()
+    assert all(f.result(timeout=1) for f in blockers)
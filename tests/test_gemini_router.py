@@ -0,0 +1,124 @@
+# test_gemini_router.py — failover & urutan rute router (backend stub)
+#
+#   python -m pytest -q tests
+import pytest
+
+import gemini_router
+import gemini_scheduler
+from gemini_router import AUTH_COOLDOWN, QUOTA_COOLDOWN, Router, parse_keys
+from gemini_scheduler import RateLimitTimeout, Scheduler
+
+MODEL = "stub-model"
+FALLBACK = "stub-fallback"
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    """Scheduler baru per test (anggaran longgar), dipakai juga oleh router."""
+    sched = Scheduler({MODEL: (1000, 10 ** 6), FALLBACK: (1000, 10 ** 6)})
+    sched.max_wait = 2.0
+    monkeypatch.setattr(gemini_router, "scheduler", sched)
+    monkeypatch.setattr(gemini_scheduler, "BACKOFF_BASE", 0.0)
+    return sched
+
+
+@pytest.fixture
+def router(scheduler):
+    return Router("lru")
+
+
+class StubBackend:
+    """Mencatat (key, model) setiap panggilan; key atau (key, model) tertentu bisa diset gagal."""
+
+    def __init__(self, errors=None):
+        self.errors = dict(errors or {})
+        self.calls = []
+
+    def __call__(self, route):
+        self.calls.append((route.api_key, route.model))
+        err = self.errors.get((route.api_key, route.model), self.errors.get(route.api_key))
+        if err is not None:
+            raise Exception(err)
+        return f"{route.api_key}@{route.model}"
+
+def test_parse_keys_weights_and_duplicates():
+    assert parse_keys("k1, k2:2 k1;k3") == [("k1", 1.0), ("k2", 2.0), ("k3", 1.0)]
+
+
+def test_quota_error_fails_over_and_cools_down(router):
+    backend = StubBackend({"bad": "429 RESOURCE_EXHAUSTED"})
+    assert router.run(backend, "bad,good", MODEL) == f"good@{MODEL}"
+    assert backend.calls == [("bad", MODEL), ("good", MODEL)]
+
+    status = {r["key"]: r for r in router.status("bad,good", MODEL)}
+    bad = status[gemini_scheduler.key_id("bad")]
+    assert bad["last_error"] == "quota"
+    assert 0 < bad["cooldown"] <= QUOTA_COOLDOWN
+
+    backend.calls.clear()
+    router.run(backend, "bad,good", MODEL)
+    assert backend.calls == [("good", MODEL)]  # rute yang jeda tidak dicoba lagi
+
+
+def test_auth_error_fails_over_with_long_cooldown(router):
+    backend = StubBackend({"revoked": "400 API key not valid. Please pass a valid API key."})
+    assert router.run(backend, "revoked,good", MODEL) == f"good@{MODEL}"
+    revoked = router.status("revoked,good", MODEL)[0]
+    assert revoked["last_error"] == "auth"
+    assert revoked["cooldown"] > QUOTA_COOLDOWN and revoked["cooldown"] <= AUTH_COOLDOWN
+
+
+def test_other_errors_are_not_failed_over(router):
+    backend = StubBackend({"a": "500 internal error", "b": "500 internal error"})
+    with pytest.raises(Exception, match="500"):
+        router.run(backend, "a,b", MODEL)
+    assert len(backend.calls) == 1
+
+
+def test_all_routes_cooling_down_raises_without_calling(router):
+    backend = StubBackend({"a": "429 quota", "b": "429 quota"})
+    with pytest.raises(Exception, match="429"):
+        router.run(backend, "a,b", MODEL)
+    backend.calls.clear()
+    with pytest.raises(RateLimitTimeout):
+        router.run(backend, "a,b", MODEL)
+    assert backend.calls == []
+
+
+def test_lru_spreads_calls_across_keys(router):
+    backend = StubBackend()
+    for _ in range(6):
+        router.run(backend, "a,b,c", MODEL)
+    assert [k for k, _ in backend.calls] == ["a", "b", "c", "a", "b", "c"]
+
+
+def test_fallback_model_only_after_primary_keys_are_down(router):
+    router.fallback_models = [FALLBACK]
+    backend = StubBackend()
+    for _ in range(4):
+        router.run(backend, "a,b", MODEL)
+    assert {m for _, m in backend.calls} == {MODEL}
+
+    backend.errors = {("a", MODEL): "429 quota", ("b", MODEL): "429 quota"}
+    backend.calls.clear()
+    assert router.run(backend, "a,b", MODEL).endswith(f"@{FALLBACK}")
+    assert [m for _, m in backend.calls] == [MODEL, MODEL, FALLBACK]
+
+    backend.errors = {}
+    backend.calls.clear()
+    router.run(backend, "a,b", MODEL)
+    assert backend.calls == [("b", FALLBACK)]  # key MODEL masih jeda; "a" baru saja dipakai (LRU)
+
+
+def test_single_route_keeps_scheduler_retries(router):
+    attempts = []
+
+    def flaky(route):
+        attempts.append(route)
+        if len(attempts) == 1:
+            raise Exception("429 RESOURCE_EXHAUSTED")
+        return "ok"
+
+    assert router.run(flaky, "only", MODEL) == "ok"
+    assert len(attempts) == 2
+    assert router.status("only", MODEL)[0]["cooldown"] == 0
@@ -0,0 +1,65 @@
+# test_gemini_scheduler.py — antrean prioritas, tenggat dan bucket per key pada scheduler
+import threading
+import time
+
+import pytest
+
+import gemini_scheduler
+from gemini_scheduler import PRIORITY_BACKGROUND, PRIORITY_USER, RateLimitTimeout, Scheduler
+
+MODEL = "stub-model"
+
+
+def test_acquire_serves_higher_priority_first():
+    sched = Scheduler({MODEL: (60, 10 ** 6)})  # 1 token/detik setelah bucket dikosongkan
+    sched.max_wait = 5.0
+    sched.penalize(MODEL)
+    order = []
+
+    def wait(priority, name):
+        sched.acquire(MODEL, priority)
+        order.append(name)
+
+    low = threading.Thread(target=wait, args=(PRIORITY_BACKGROUND, "background"))
+    low.start()
+    time.sleep(0.1)  # background mengantre lebih dulu
+    high = threading.Thread(target=wait, args=(PRIORITY_USER, "user"))
+    high.start()
+    low.join(5)
+    high.join(5)
+    assert order == ["user", "background"]
+
+
+def test_acquire_times_out_when_budget_is_exhausted():
+    sched = Scheduler({MODEL: (1, 10 ** 6)})  # token berikutnya baru ~60 detik lagi
+    sched.max_wait = 0.2
+    sched.acquire(MODEL)
+    start = time.monotonic()
+    with pytest.raises(RateLimitTimeout):
+        sched.acquire(MODEL)
+    assert time.monotonic() - start < 1.0
+
+
+def test_buckets_are_per_key():
+    sched = Scheduler({MODEL: (1, 10 ** 6)})
+    sched.max_wait = 0.2
+    sched.acquire(MODEL, key="a")
+    sched.acquire(MODEL, key="b")  # key lain tidak ikut menunggu
+    assert sched.remaining(MODEL, "a")["rpm"] == 0
+    with pytest.raises(RateLimitTimeout):
+        sched.acquire(MODEL, key="a")
+
+
+def test_run_retries_quota_errors(monkeypatch):
+    monkeypatch.setattr(gemini_scheduler, "BACKOFF_BASE", 0.0)
+    scheduler = Scheduler({MODEL: (1000, 10 ** 6)})
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise Exception("429 RESOURCE_EXHAUSTED")
+        return "ok"
+
+    assert scheduler.run(flaky, MODEL) == "ok"
+    assert len(attempts) == 2
@@ -0,0 +1,61 @@
+# test_packed_translation.py — validasi respons terjemahan berpaket (Gemini di-stub)
+import re
+
+import pytest
+
+import prompt_core
+from prompt_core import _packed_translate
+
+MARKER = re.compile(r"^### (\d+) ###$", re.M)
+
+
+@pytest.fixture
+def gemini(monkeypatch):
+    """Stub _call_gemini: `reply(items)` membentuk respons dari item dalam prompt paket."""
+    calls = []
+
+    class Stub:
+        reply = staticmethod(lambda items: "\n".join(f"### {i} ###\nEN {t}" for i, t in enumerate(items, 1)))
+
+    def fake(prompt, model, api_key, priority=None):
+        body = prompt.split("Here are the prompts to translate:\n", 1)[1]
+        items = [chunk.strip() for chunk in MARKER.split(body)[2::2]]
+        calls.append(items)
+        return Stub.reply(items)
+
+    monkeypatch.setattr(prompt_core, "_call_gemini", fake)
+    Stub.calls = calls
+    return Stub
+
+
+def run(items, validate=lambda src, chunk: chunk or None):
+    singles = []
+
+    def single(src):
+        singles.append(src)
+        return f"single {src}"
+
+    return _packed_translate(items, "key", "stub-model", validate, single, pack_size=10, warn=None), singles
+
+
+def test_well_formed_pack_is_used_as_is(gemini):
+    out, singles = run(["satu", "dua", "tiga"])
+    assert out == ["EN satu", "EN dua", "EN tiga"]
+    assert singles == [] and len(gemini.calls) == 1
+
+
+@pytest.mark.parametrize("markers", [[1, 2], [1, 3, 2], [1, 2, 2, 3], [2, 3, 4]])
+def test_mismatched_markers_fall_back_to_single_calls(gemini, markers):
+    gemini.reply = staticmethod(lambda items: "\n".join(f"### {m} ###\nEN {m}" for m in markers))
+    out, singles = run(["satu", "dua", "tiga"])
+    assert singles == ["satu", "dua", "tiga"]
+    assert out == ["single satu", "single dua", "single tiga"]
+
+
+def test_item_failing_validation_is_retried_alone(gemini):
+    gemini.reply = staticmethod(lambda items: "### 1 ###\nEN satu\n### 2 ###\nEN dua\nNote: alternatif\n"
+                                              "### 3 ###\nEN tiga")
+    one_line = lambda src, chunk: chunk if len(chunk.splitlines()) == 1 else None  # noqa: E731
+    out, singles = run(["satu", "dua", "tiga"], validate=one_line)
+    assert out == ["EN satu", "single dua", "EN tiga"]
+    assert singles == ["dua"]
@@ -0,0 +1,42 @@
+# test_phrase_translator.py — terjemahan lokal per klausa & daftar label berkutip
+#
+#   python -m pytest -q tests
+import pytest
+
+from phrase_translator import GLOSSARY, PhraseTable, render, translate_offline
+
+
+@pytest.fixture
+def table():
+    return PhraseTable(GLOSSARY)
+
+
+def test_whole_clause_entries_are_translated(table):
+    assert table.translate_clause("bokeh lembut") == "soft bokeh"
+    assert table.translate_clause("Cahaya pagi") == "Morning light"
+
+
+def test_clause_combining_entries_goes_to_gemini(table):
+    # "papan" dan "neon" ada di tabel, tetapi urutan kata Inggris tidak bisa dirakit lokal
+    assert table.translate_clause("papan neon") is None
+    assert table.translate_clause("bokeh lembut kuning") is None
+
+
+def test_english_vocabulary_passes_through(table):
+    assert table.translate_clause("soft studio lighting") == "soft studio lighting"
+
+
+@pytest.mark.parametrize("labels", ["'PANDA','ALIEN','UFO'", "'T-REX','DINO'", "'MILK TEA'", "'RUN'"])
+def test_known_english_labels_pass_through(table, labels):
+    assert table.translate_clause(labels) == labels
+
+
+@pytest.mark.parametrize("labels", ["'APEL','JERUK','PISANG'", "‘SELAMAT DATANG’", "'PANDA','KUCING'"])
+def test_unknown_quoted_labels_go_to_gemini(table, labels):
+    assert table.translate_clause(labels) is None
+
+
+def test_translate_offline_merges_remote_clauses(table):
+    pieces, unknown = translate_offline("bokeh lembut, papan neon (konfeti).", table)
+    assert unknown == ["papan neon"]
+    assert render(pieces, {"papan neon": "neon signs"}) == "soft bokeh, neon signs (confetti)."
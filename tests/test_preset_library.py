@@ -0,0 +1,55 @@
+# test_preset_library.py — pencarian template & hot reload pack
+#
+#   python -m pytest -q tests
+import json
+import os
+
+import pytest
+
+import preset_library
+from preset_library import PresetLibrary, get_preset_library
+from shared_state import FileReloader
+
+FIELDS = {"Foreground": "Panda merah", "Background": "Hutan bambu"}
+
+
+def write_pack(path, presets, mtime):
+    path.write_text(json.dumps({"version": 1, "presets": presets}), encoding="utf-8")
+    os.utime(path, (mtime, mtime))
+
+
+@pytest.fixture
+def pack(tmp_path, monkeypatch):
+    monkeypatch.setattr(preset_library, "_library", FileReloader(PresetLibrary))
+    path = tmp_path / "presets.json"
+    write_pack(path, {"Hutan": FIELDS, "Laut": {"Foreground": "Ikan badut"}}, 1000)
+    return path
+
+
+def test_search_matches_all_keyword_prefixes(pack):
+    lib = PresetLibrary(str(pack))
+    assert lib.search("pand hut") == ["Hutan"]
+    assert lib.search("") == ["Hutan", "Laut"]
+    assert lib.search("panda ikan") == []
+
+
+def test_hot_reload_on_mtime_change(pack):
+    assert list(get_preset_library(str(pack)).presets) == ["Hutan", "Laut"]
+    write_pack(pack, {"Gurun": FIELDS}, 2000)
+    assert list(get_preset_library(str(pack)).presets) == ["Gurun"]
+
+
+def test_broken_pack_keeps_last_valid_and_is_not_reparsed(pack, monkeypatch):
+    loads = []
+    monkeypatch.setattr(preset_library, "_library",
+                        FileReloader(lambda p: loads.append(p) or PresetLibrary(p)))
+    first = get_preset_library(str(pack))
+    pack.write_text("{ rusak", encoding="utf-8")
+    os.utime(pack, (2000, 2000))
+
+    assert get_preset_library(str(pack)) is first
+    assert get_preset_library(str(pack)) is first
+    assert len(loads) == 2  # pemuatan awal + satu percobaan atas file rusak
+
+    write_pack(pack, {"Gurun": FIELDS}, 3000)
+    assert list(get_preset_library(str(pack)).presets) == ["Gurun"]
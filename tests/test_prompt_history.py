@@ -0,0 +1,70 @@
+# test_prompt_history.py — simpan, cari (FTS5) & muat ulang riwayat
+#
+#   python -m pytest -q tests
+import pytest
+
+import prompt_history
+from prompt_core import build_export_payload
+from prompt_history import PromptHistory, fts_query
+
+FIELDS = {"Foreground": "Panda merah", "Central Banner": "'PANDA'"}
+
+
+def payload(text_id, text_en=""):
+    return build_export_payload(FIELDS, {}, text_id, text_en)
+
+
+@pytest.fixture
+def history():
+    return PromptHistory(":memory:")
+
+
+def test_fts_query_quotes_words_as_prefixes():
+    assert fts_query('Panda "merah" OR') == '"panda"* "merah"* "or"*'
+    assert fts_query("  !! ") == ""
+
+
+def test_search_is_newest_first_and_pages(history):
+    ids = [history.record("theme", f"Tema {i}", payload(f"teks {i}")) for i in range(5)]
+    assert [e.id for e in history.search(limit=2)] == ids[:-3:-1]
+    assert [e.id for e in history.search(limit=2, offset=2)] == [ids[2], ids[1]]
+
+
+def test_search_matches_prefixes_in_title_and_both_languages(history):
+    a = history.record("theme", "Hutan bambu", payload("Latar Depan: panda merah", "Foreground: red panda"))
+    b = history.record("translation", "Laut", payload("Latar Depan: ikan badut", "Foreground: clownfish"))
+    assert [e.id for e in history.search("bamb")] == [a]
+    assert [e.id for e in history.search("clown")] == [b]
+    assert [e.id for e in history.search("latar depan")] == [b, a]
+    assert history.search("panda ikan") == []
+
+
+def test_search_ignores_diacritics(history):
+    entry = history.record("theme", "Café kota", payload("teks"))
+    assert [e.id for e in history.search("cafe")] == [entry]
+
+
+def test_identical_payload_moves_to_the_top(history):
+    first = history.record("theme", "A", payload("sama"))
+    history.record("theme", "B", payload("lain"))
+    again = history.record("theme", "A", payload("sama"))
+    assert again != first
+    assert [e.title for e in history.search()] == ["A", "B"]
+    assert history.stats() == {"entries": 2}
+
+
+def test_get_restores_derived_outputs(history):
+    entry = history.record("translation", "Panda", payload("Latar Depan: panda\nmerah", "Foreground: red panda"))
+    loaded = history.get(entry)
+    assert loaded["fields"] == FIELDS
+    assert loaded["outputs"]["en"] == "Foreground: red panda"
+    assert loaded["outputs"]["one_line_id"] == "Latar Depan: panda merah"
+    assert history.get(entry + 100) is None
+
+
+def test_old_entries_are_evicted_in_batches(history, monkeypatch):
+    monkeypatch.setattr(prompt_history, "EVICT_EVERY", 2)
+    history.max_entries = 3
+    for i in range(6):
+        history.record("theme", f"T{i}", payload(f"teks {i}"))
+    assert [e.title for e in history.search()] == ["T5", "T4", "T3"]
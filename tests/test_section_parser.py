@@ -0,0 +1,57 @@
+# test_section_parser.py — parse_sections & SectionParser (label ID/EN, bold, stream)
+#
+#   python -m pytest -q tests
+import pytest
+
+from prompt_core import FIELD_KEYS, SectionParser, compose_prompt, parse_sections
+
+TEXT = """**Foreground:** Panda merah memegang balon
+Latar Belakang: Hutan bambu
+  berkabut pagi
+Background Style: cat air lembut
+**Central Banner**: 'PANDA'
+Style & Lighting: pastel, soft light**
+"""
+
+
+def test_labels_aliases_and_bold():
+    assert parse_sections(TEXT) == {
+        "Foreground": "Panda merah memegang balon",
+        "Background": "Hutan bambu berkabut pagi",
+        "Background Style": "cat air lembut",
+        "Central Banner": "'PANDA'",
+        "Style & Lighting": "pastel, soft light",
+    }
+
+
+def test_longest_alias_wins():
+    # "Background Style" tidak boleh terbaca sebagai "Background" + "Style ..."
+    assert parse_sections("background style: flat") == {"Background Style": "flat"}
+
+
+def test_text_before_first_label_is_ignored():
+    assert parse_sections("Here you go!\nMidground: pohon") == {"Midground": "pohon"}
+
+
+def test_empty_label_then_continuation():
+    assert parse_sections("Foreground:\n  kucing oranye") == {"Foreground": "kucing oranye"}
+
+
+@pytest.mark.parametrize("size", [1, 3, 7, 64])
+def test_streamed_chunks_match_whole_text(size):
+    parser = SectionParser()
+    for i in range(0, len(TEXT), size):
+        parser.feed(TEXT[i:i + size])
+    assert parser.close() == parse_sections(TEXT)
+
+
+def test_partial_line_is_held_until_complete():
+    parser = SectionParser().feed("Foreground: Panda\nMidground: po")
+    assert parser.sections == {"Foreground": "Panda"}
+    parser.feed("hon\n")
+    assert parser.sections == {"Foreground": "Panda", "Midground": "pohon"}
+
+
+def test_round_trips_composed_prompt():
+    fields = {k: f"isi {i}" for i, k in enumerate(FIELD_KEYS)}
+    assert parse_sections(compose_prompt(fields, {})) == fields
@@ -0,0 +1,60 @@
+# test_shared_state.py — koneksi SQLite, singleton per proses & hot reload file
+#
+#   python -m pytest -q tests
+import os
+import threading
+
+import pytest
+
+from shared_state import FileReloader, ProcessSingleton, open_sqlite
+
+
+def test_open_sqlite_creates_folder_and_uses_wal(tmp_path):
+    conn = open_sqlite(str(tmp_path / "baru" / "db.sqlite3"), synchronous="NORMAL")
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert (tmp_path / "baru").is_dir()
+
+
+def test_singleton_is_built_once_across_threads():
+    built = []
+    single = ProcessSingleton(lambda: built.append(1) or object())
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(single.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(built) == 1 and len({id(v) for v in seen}) == 1
+
+
+def test_reloader_retries_broken_file_only_after_it_changes(tmp_path):
+    path = tmp_path / "data.txt"
+    loads = []
+
+    def load(p):
+        loads.append(p)
+        text = open(p, encoding="utf-8").read()
+        if text == "rusak":
+            raise ValueError(text)
+        return text
+
+    def write(text, mtime):
+        path.write_text(text, encoding="utf-8")
+        os.utime(path, (mtime, mtime))
+
+    write("v1", 1000)
+    reloader = FileReloader(load)
+    assert reloader.get(str(path)) == "v1"
+    assert reloader.get(str(path)) == "v1" and len(loads) == 1
+
+    write("rusak", 2000)
+    assert reloader.get(str(path)) == "v1"
+    assert reloader.get(str(path)) == "v1" and len(loads) == 2
+
+    write("v2", 3000)
+    assert reloader.get(str(path)) == "v2"
+
+
+def test_reloader_raises_when_first_load_fails(tmp_path):
+    with pytest.raises(OSError):
+        FileReloader(lambda p: open(p).read()).get(str(tmp_path / "tidak-ada.json"))
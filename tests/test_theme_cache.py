@@ -0,0 +1,64 @@
+# test_theme_cache.py — pencocokan tema (urutan kata, salah ketik, bias) & penggantian entri
+#
+#   python -m pytest -q tests
+import pytest
+
+from theme_cache import ThemeCache, normalize_theme, same_theme
+
+OLD = {"Foreground": "lama"}
+NEW = {"Foreground": "baru"}
+
+
+@pytest.fixture
+def cache():
+    return ThemeCache(":memory:")
+
+
+def test_normalize_drops_stopwords_and_sorts():
+    assert normalize_theme("Tema Kartun, Buah 3D!") == "3d buah kartun"
+
+
+@pytest.mark.parametrize("query", ["kartun buah 3D", "buah kartun 3D", "Kartun Buah 3D!", "kartun buahh 3D"])
+def test_equivalent_themes_hit(cache, query):
+    cache.put("kartun buah 3D", "pastel", OLD)
+    hit = cache.lookup(query, " Pastel ")
+    assert hit is not None and hit.fields == OLD
+
+
+@pytest.mark.parametrize("query", ["kartun buah 2D", "dinosaurus lucu laut", "kartun buah"])
+def test_different_themes_miss(cache, query):
+    cache.put("kartun buah 3D", "pastel", OLD)
+    assert cache.lookup(query, "pastel") is None
+
+
+def test_bias_is_part_of_the_key(cache):
+    cache.put("kartun buah 3D", "pastel", OLD)
+    assert cache.lookup("kartun buah 3D", "neon") is None
+
+
+def test_typos_only_on_long_words():
+    assert same_theme("buah kartun", "buahh kartun")
+    assert not same_theme("2d buah", "3d buah")
+    assert not same_theme("api laut", "apo laut")
+
+
+def test_regenerated_theme_replaces_old_entry(cache):
+    cache.put("kartun buah 3D", "pastel", OLD)
+    cache.put("Buah kartun 3D", "pastel", NEW)
+    assert cache.lookup("kartun buah 3D", "pastel").fields == NEW
+    assert cache.stats()["entries"] == 1
+
+
+def test_stopword_only_themes_skip_the_cache(cache):
+    cache.put("tema yang dan", "pastel", OLD)
+    cache.put("buatkan tema", "pastel", NEW)
+    assert cache.lookup("the theme", "pastel") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_oldest_entries_are_evicted():
+    cache = ThemeCache(":memory:", max_entries=2)
+    for theme in ("gajah terbang", "paus biru", "robot dapur"):
+        cache.put(theme, "", {"Foreground": theme})
+    assert cache.lookup("gajah terbang", "") is None
+    assert cache.lookup("robot dapur", "").fields == {"Foreground": "robot dapur"}
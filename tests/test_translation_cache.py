@@ -0,0 +1,40 @@
+# test_translation_cache.py — kunci konten, hit/miss, eviksi LRU & umur
+import time
+
+from translation_cache import TranslationCache, make_key
+
+
+def test_key_depends_on_text_model_and_instruction_version():
+    base = make_key("kucing lucu", "gemini-1.5-flash", "v1")
+    assert base == make_key("kucing lucu", "models/gemini-1.5-flash", "v1")  # prefiks models/ diabaikan
+    assert base != make_key("kucing lucu", "gemini-1.5-pro", "v1")
+    assert base != make_key("kucing lucu", "gemini-1.5-flash", "v2")
+    assert base != make_key("kucing imut", "gemini-1.5-flash", "v1")
+
+
+def test_get_put_counts_hits_and_misses():
+    cache = TranslationCache(":memory:")
+    assert cache.get("k") is None
+    cache.put("k", "cute cat")
+    assert cache.get("k") == "cute cat"
+    assert cache.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_evicts_least_recently_used_beyond_max_entries():
+    cache = TranslationCache(":memory:", max_entries=2, max_age=0)
+    cache.put("a", "A")
+    time.sleep(0.01)
+    cache.put("b", "B")
+    time.sleep(0.01)
+    assert cache.get("a") == "A"  # "a" kini lebih baru dipakai daripada "b"
+    time.sleep(0.01)
+    cache.put("c", "C")
+    assert cache.get("b") is None
+    assert cache.get("a") == "A" and cache.get("c") == "C"
+
+
+def test_entries_older_than_max_age_are_misses():
+    cache = TranslationCache(":memory:", max_age=0.05)
+    cache.put("k", "v")
+    time.sleep(0.1)
+    assert cache.get("k") is None
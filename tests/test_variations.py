@@ -0,0 +1,45 @@
+# test_variations.py — parse respons variasi, baris toggle yang digemakan & dedupe
+#
+#   python -m pytest -q tests
+from prompt_core import FIELD_KEYS, compose_prompt
+from variations import VariantDeduper, parse_variants, render_variations
+
+TOGGLES = {"static_camera": True, "black_bg": True, "ultra_sharp": True, "diag_lighting": True}
+
+
+def variant(n):
+    return {k: f"{k.lower()} variant {n}" for k in FIELD_KEYS}
+
+
+def test_marked_variants_are_parsed():
+    response = "\n".join(f"### {n} ###\n{compose_prompt(variant(n), {})}" for n in (1, 2))
+    assert parse_variants(response) == [variant(1), variant(2)]
+
+
+def test_repeated_first_label_splits_unmarked_variants():
+    response = "\n\n".join(compose_prompt(variant(n), {}) for n in (1, 2, 3))
+    assert parse_variants(response) == [variant(1), variant(2), variant(3)]
+
+
+def test_echoed_toggle_lines_are_ignored():
+    # Gemini menyalin baris toggle dari prompt asli ke setiap variasi
+    response = "\n".join(f"### {n} ###\n{compose_prompt(variant(n), TOGGLES)}" for n in (1, 2))
+    response += "\n**Camera: perfectly static tripod; no pan, no zoom.**"
+    records = parse_variants(response)
+    assert records == [variant(1), variant(2)]
+
+    rendered = render_variations(records, TOGGLES)
+    assert rendered.count("Background: pure solid black") == 2  # sekali per variasi, dari toggle
+    assert rendered.count("Camera: perfectly static tripod") == 2
+
+
+def test_blocks_with_too_few_sections_are_dropped():
+    assert parse_variants("### 1 ###\nForeground: kucing\nNo other labels here.") == []
+
+
+def test_deduper_rejects_near_duplicates():
+    deduper = VariantDeduper()
+    base = variant(1)
+    assert deduper.add(base)
+    assert not deduper.add(dict(base))
+    assert deduper.add({k: f"completely different {k} text about dragons {i}" for i, k in enumerate(FIELD_KEYS)})
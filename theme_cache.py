@@ -0,0 +1,228 @@
+# theme_cache.py — cache kemiripan untuk "Generate dari Tema Custom"
+#
+# Tema dinormalisasi (huruf kecil, tanpa tanda baca & stopword, token diurutkan)
+# lalu diindeks dengan MinHash/LSH atas n-gram karakter. LSH hanya mencari
+# kandidat; sebuah kandidat dipakai bila token ternormalisasinya sama persis,
+# dengan toleransi salah ketik satu huruf pada kata panjang. "kartun buah 3D",
+# "buah kartun 3D", "Kartun Buah 3D!" dan "kartun buahh 3D" jatuh ke entri yang
+# sama; "kartun buah 2D" atau "dinosaurus lucu laut" tidak. Kunci selalu
+# berpasangan dengan bias gaya.
+import json
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from shared_state import ProcessSingleton, open_sqlite
+
+DEFAULT_THEME_CACHE_PATH = os.path.join(".cache", "themes.sqlite3")
+DEFAULT_MAX_ENTRIES = 5000
+
+NUM_PERM = 64
+BANDS = 16           # 16 band × 4 baris: peluang kandidat tinggi mulai Jaccard ≈ 0.5
+ROWS = NUM_PERM // BANDS
+SHINGLE = 3
+SIMILARITY = 0.6     # ambang estimasi Jaccard untuk kandidat; kecocokan diputuskan same_theme
+TYPO_MIN_LEN = 4     # kata sependek ini (mis. "2d", "api") harus sama persis
+
+STOPWORDS = set("""
+yang dan di ke dari untuk dengan atau pada dalam ini itu para sebuah seorang sang si
+tema bertema nuansa ala gaya buat buatkan bikin tolong
+the a an of and with for in on theme style
+""".split())
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20250801)  # seed tetap: signature tersimpan tetap valid antar proses
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD = re.compile(r"\w+")
+
+
+def normalize_theme(theme: str) -> str:
+    tokens = [t for t in _WORD.findall(theme.lower().replace("_", " ")) if t not in STOPWORDS]
+    return " ".join(sorted(tokens))
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    if abs(len(a) - len(b)) > 1:
+        return False
+    if len(a) > len(b):
+        a, b = b, a
+    i = next((k for k, (x, y) in enumerate(zip(a, b)) if x != y), len(a))
+    return a[i + (len(a) == len(b)):] == b[i + 1:]
+
+
+def _typo_ok(a: str, b: str) -> bool:
+    return (min(len(a), len(b)) >= TYPO_MIN_LEN and not any(c.isdigit() for c in a + b)
+            and _within_one_edit(a, b))
+
+
+def same_theme(norm_a: str, norm_b: str) -> bool:
+    """Token (ternormalisasi) sama satu-satu; tiap pasangan boleh berbeda satu huruf bila katanya panjang."""
+    a, b = norm_a.split(), norm_b.split()
+    if len(a) != len(b):
+        return False
+    rest, left = list(b), []
+    for tok in a:
+        if tok in rest:
+            rest.remove(tok)
+        else:
+            left.append(tok)
+    for tok in left:
+        match = next((r for r in rest if _typo_ok(tok, r)), None)
+        if match is None:
+            return False
+        rest.remove(match)
+    return True
+
+
+def _shingles(norm: str) -> Set[int]:
+    padded = f" {norm} "
+    if len(padded) <= SHINGLE:
+        return {zlib.crc32(padded.encode("utf-8"))}
+    return {zlib.crc32(padded[i:i + SHINGLE].encode("utf-8")) for i in range(len(padded) - SHINGLE + 1)}
+
+
+def signature(shingles: Set[int]) -> Tuple[int, ...]:
+    """Signature MinHash dari himpunan hash shingle (dipakai juga oleh dedupe variasi)."""
+    return tuple(min((a * x + b) % _PRIME for x in shingles) for a, b in _PERMS)
+
+
+def minhash(norm: str) -> Tuple[int, ...]:
+    return signature(_shingles(norm))
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimasi Jaccard: proporsi posisi signature yang sama."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / NUM_PERM
+
+
+def _bias_key(bias: str) -> str:
+    return " ".join((bias or "").lower().split())
+
+
+class ThemeHit(NamedTuple):
+    fields: Dict[str, str]
+    similarity: float
+    theme: str   # tema asli yang tersimpan
+
+
+class ThemeCache:
+    """
+    Hasil parse_sections per (tema, bias) di SQLite, dengan indeks LSH di
+    memori yang dibangun ulang dari disk saat proses mulai.
+    """
+
+    def __init__(self, path: str = DEFAULT_THEME_CACHE_PATH, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 threshold: float = SIMILARITY):
+        self.path = path
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: Dict[int, Tuple[str, Tuple[int, ...], str, Dict[str, str]]] = {}
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[int]] = {}
+        self._conn = open_sqlite(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS themes ("
+            " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+            " bias TEXT NOT NULL,"
+            " theme TEXT NOT NULL,"
+            " fields TEXT NOT NULL,"
+            " created REAL NOT NULL)"
+        )
+        for row_id, bias, theme, fields in self._conn.execute("SELECT id, bias, theme, fields FROM themes"):
+            self._index(row_id, bias, theme, json.loads(fields))
+
+    def _bands(self, bias: str, sig: Tuple[int, ...]) -> List[Tuple[str, int, Tuple[int, ...]]]:
+        return [(bias, b, sig[b * ROWS:(b + 1) * ROWS]) for b in range(BANDS)]
+
+    def _index(self, row_id: int, bias: str, theme: str, fields: Dict[str, str]) -> None:
+        sig = minhash(normalize_theme(theme))
+        self._entries[row_id] = (bias, sig, theme, fields)
+        for band in self._bands(bias, sig):
+            self._buckets.setdefault(band, set()).add(row_id)
+
+    def _unindex(self, row_id: int) -> None:
+        bias, sig, _, _ = self._entries.pop(row_id)
+        for band in self._bands(bias, sig):
+            ids = self._buckets.get(band)
+            if ids is not None:
+                ids.discard(row_id)
+                if not ids:
+                    del self._buckets[band]
+
+    def _candidates(self, bias: str, sig: Tuple[int, ...]) -> Set[int]:
+        candidates: Set[int] = set()
+        for band in self._bands(bias, sig):
+            candidates |= self._buckets.get(band, set())
+        return candidates
+
+    def lookup(self, theme: str, bias: str) -> Optional[ThemeHit]:
+        """
+        Entri paling mirip yang lolos same_theme, atau None. Skor sama ➜ entri
+        terbaru (hasil "Paksa generate baru" menggantikan yang lama). Tema yang
+        habis oleh normalisasi (hanya stopword) tidak pernah dicocokkan.
+        """
+        bias = _bias_key(bias)
+        norm = normalize_theme(theme)
+        if not norm:
+            return None
+        sig = minhash(norm)
+        best: Optional[ThemeHit] = None
+        best_id = -1
+        with self._lock:
+            for row_id in self._candidates(bias, sig):
+                _, cand_sig, cand_theme, fields = self._entries[row_id]
+                score = similarity(sig, cand_sig)
+                if score < self.threshold or not same_theme(norm, normalize_theme(cand_theme)):
+                    continue
+                if best is None or (score, row_id) > (best.similarity, best_id):
+                    best, best_id = ThemeHit(dict(fields), score, cand_theme), row_id
+            if best is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return best
+
+    def put(self, theme: str, bias: str, fields: Dict[str, str]) -> None:
+        """Simpan hasil; entri lama dengan tema ternormalisasi & bias yang sama diganti."""
+        bias = _bias_key(bias)
+        norm = normalize_theme(theme)
+        if not norm:
+            return
+        with self._lock:
+            stale = [i for i in self._candidates(bias, minhash(norm))
+                     if normalize_theme(self._entries[i][2]) == norm]
+            if stale:
+                self._conn.executemany("DELETE FROM themes WHERE id = ?", [(i,) for i in stale])
+                for row_id in stale:
+                    self._unindex(row_id)
+            cur = self._conn.execute(
+                "INSERT INTO themes (bias, theme, fields, created) VALUES (?, ?, ?, ?)",
+                (bias, theme, json.dumps(fields, ensure_ascii=False), time.time()),
+            )
+            self._index(cur.lastrowid, bias, theme, fields)
+            if self.max_entries and len(self._entries) > self.max_entries:
+                oldest = sorted(self._entries)[:len(self._entries) - self.max_entries]
+                self._conn.executemany("DELETE FROM themes WHERE id = ?", [(i,) for i in oldest])
+                for row_id in oldest:
+                    self._unindex(row_id)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+
+_cache = ProcessSingleton(lambda: ThemeCache(
+    os.getenv("XPROMPT_THEME_CACHE_PATH", DEFAULT_THEME_CACHE_PATH),
+    max_entries=int(os.getenv("XPROMPT_THEME_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    threshold=float(os.getenv("XPROMPT_THEME_SIMILARITY", SIMILARITY)),
+))
+
+
+def get_theme_cache() -> ThemeCache:
+    return _cache.get()
@@ -0,0 +1,92 @@
+# translation_cache.py — cache terjemahan ID ➜ EN persisten (SQLite)
+import os
+import threading
+import time
+from hashlib import sha256
+from typing import Dict, Optional
+
+from shared_state import ProcessSingleton, open_sqlite
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "translations.sqlite3")
+DEFAULT_MAX_ENTRIES = 20000
+DEFAULT_MAX_AGE = 30 * 24 * 3600  # 30 hari
+
+
+def make_key(text_id: str, model: str, instr_version: str) -> str:
+    """Kunci konten: hash dari teks Indonesia + nama model + versi instruksi."""
+    raw = "\x00".join([instr_version, model.split("/", 1)[-1], text_id])
+    return sha256(raw.encode("utf-8")).hexdigest()
+
+
+class TranslationCache:
+    """
+    Cache terjemahan di disk, dipakai bersama oleh semua sesi dan bertahan
+    setelah server restart. Eviksi LRU berdasarkan jumlah entri dan umur.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH,
+                 max_entries: int = DEFAULT_MAX_ENTRIES,
+                 max_age: float = DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = open_sqlite(path, synchronous="NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " key TEXT PRIMARY KEY,"
+            " value TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_used ON translations(last_used)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM translations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (self.max_age and now - row[1] > self.max_age):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE translations SET last_used = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations (key, value, created, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        if self.max_age:
+            self._conn.execute("DELETE FROM translations WHERE created < ?", (now - self.max_age,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN ("
+                " SELECT key FROM translations ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+
+_cache = ProcessSingleton(lambda: TranslationCache(
+    os.getenv("XPROMPT_CACHE_PATH", DEFAULT_CACHE_PATH),
+    max_entries=int(os.getenv("XPROMPT_CACHE_MAX_ENTRIES", DEFAULT_MAX_ENTRIES)),
+    max_age=float(os.getenv("XPROMPT_CACHE_MAX_AGE", DEFAULT_MAX_AGE)),
+))
+
+
+def get_translation_cache() -> TranslationCache:
+    return _cache.get()
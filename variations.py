@@ -0,0 +1,197 @@
+# variations.py — variasi prompt: fan-out paralel + respons terstruktur
+#
+# N variasi tidak lagi diminta dalam satu respons teks bebas. Permintaan dipecah
+# menjadi beberapa request kecil (VARIATIONS_PER_REQUEST variasi per request,
+# masing-masing dengan arahan keragaman berbeda) yang dikirim bersamaan lewat
+# pool gemini_dispatch. Setiap respons memakai penanda "### n ###" lalu label
+# struktur yang sama, sehingga tiap variasi bisa di-parse parse_sections menjadi
+# record sendiri. Variasi yang nyaris sama (MinHash atas bigram kata) dibuang.
+#
+# Latensi ≈ ceil(request / MAX_WORKERS) × satu request, bukan N × panjang
+# respons; anggaran RPM scheduler tetap menjadi batas atas throughput.
+import math
+import re
+import time
+import zlib
+from concurrent.futures import TimeoutError as FutureTimeout, as_completed
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from gemini_dispatch import BACKGROUND_WORKERS, DEFAULT_TIMEOUT, MAX_WORKERS, submit_background, submit_call
+from gemini_scheduler import PRIORITY_BACKGROUND, PRIORITY_USER
+from prompt_core import COMPOSE_LANGS, FIELD_KEYS, _PACK_MARKER, _call_gemini, compose_many, parse_sections
+from theme_cache import signature, similarity
+
+MAX_VARIATIONS = 100
+VARIATIONS_PER_REQUEST = 5
+DEDUPE_SIMILARITY = 0.8   # estimasi Jaccard bigram kata; di atas ini dianggap duplikat
+MIN_SECTIONS = 3          # blok dengan label lebih sedikit dianggap bukan variasi
+
+# Arahan bergiliran per request agar request paralel tidak menghasilkan variasi yang sama
+DIVERSITY_HINTS = [
+    "Vary the color palette and time of day.",
+    "Vary the camera angle and composition.",
+    "Vary the lighting mood and atmosphere.",
+    "Vary the supporting characters and props.",
+    "Vary the setting and weather.",
+    "Vary the banner text style and visual effects.",
+    "Vary the art style while keeping it kid-safe.",
+    "Vary the season and decorative elements.",
+]
+
+_WORD = re.compile(r"\w+")
+# Awal kalimat toggle (4 kata pertama) semua bahasa. Baris toggle yang digemakan
+# Gemini dibuang sebelum parse: "Background: pure solid black…" akan menimpa
+# Background dan "Camera: …" tersambung ke bagian sebelumnya, padahal
+# render_variations menambahkan toggle sendiri.
+_TOGGLE_HEADS = tuple(sorted({" ".join(line.lower().split()[:4])
+                              for table in COMPOSE_LANGS.values() for line in table["toggles"].values()}))
+_FIRST_LABEL = re.compile(r"^\s*(?:\*\*)?\s*" + re.escape(FIELD_KEYS[0]) + r"\b", re.I | re.M)
+
+
+class VariationResult(NamedTuple):
+    records: List[Dict[str, str]]
+    duplicates: int               # variasi yang dibuang karena nyaris sama
+    errors: List[Exception]       # request yang gagal (variasi lain tetap dipakai)
+    requests: int
+    elapsed: float
+
+
+def build_variations_prompt(base_prompt_en: str, count: int, hint: str) -> str:
+    """`base_prompt_en` tanpa baris toggle (compose_prompt(fields, {})); toggle ditambahkan saat render."""
+    labels = "\n".join(f"{k}: ..." for k in FIELD_KEYS)
+    return (
+        f"Act as a senior prompt engineer. Produce {count} alternative prompts based on the prompt below, "
+        "following the same structure and kid-safe tone. Each alternative must be clearly different "
+        f"from the original and from the others. {hint}\n"
+        "Start each alternative with a marker line like '### 1 ###', then use EXACTLY these labels, one per line:\n"
+        f"{labels}\n"
+        "No bold, no commentary.\n\n"
+        f"Original prompt:\n{base_prompt_en}"
+    )
+
+
+def split_variants(response: str) -> List[str]:
+    """Pecah respons menjadi blok per variasi: penanda ### n ###, atau label pertama yang berulang."""
+    marks = list(_PACK_MARKER.finditer(response))
+    if marks:
+        bounds = [m.end() for m in marks] + [len(response)]
+        starts = [m.start() for m in marks[1:]] + [len(response)]
+        return [response[a:b] for a, b in zip(bounds, starts)]
+    heads = [m.start() for m in _FIRST_LABEL.finditer(response)]
+    if len(heads) > 1:
+        return [response[a:b] for a, b in zip(heads, heads[1:] + [len(response)])]
+    return [response]
+
+
+def strip_toggle_lines(text: str) -> str:
+    return "\n".join(line for line in text.splitlines()
+                     if not " ".join(line.replace("**", "").lower().split()).startswith(_TOGGLE_HEADS))
+
+
+def parse_variants(response: str) -> List[Dict[str, str]]:
+    records = []
+    for block in split_variants(strip_toggle_lines(response)):
+        sec = parse_sections(block)
+        fields = {k: sec.get(k, "").strip() for k in FIELD_KEYS}
+        if sum(1 for v in fields.values() if v) >= MIN_SECTIONS:
+            records.append(fields)
+    return records
+
+
+def fingerprint(fields: Dict[str, str]) -> Tuple[int, ...]:
+    """Signature MinHash atas bigram kata semua bagian (urutan bagian tetap)."""
+    words = _WORD.findall(" ".join(fields.get(k, "") for k in FIELD_KEYS).lower())
+    if len(words) < 2:
+        shingles: Set[int] = {zlib.crc32(" ".join(words).encode("utf-8"))}
+    else:
+        shingles = {zlib.crc32(f"{a} {b}".encode("utf-8")) for a, b in zip(words, words[1:])}
+    return signature(shingles)
+
+
+class VariantDeduper:
+    """Simpan signature variasi yang diterima; `add` menolak yang terlalu mirip dengan salah satunya."""
+
+    def __init__(self, threshold: float = DEDUPE_SIMILARITY):
+        self.threshold = threshold
+        self._sigs: List[Tuple[int, ...]] = []
+
+    def add(self, fields: Dict[str, str]) -> bool:
+        sig = fingerprint(fields)
+        if any(similarity(sig, s) >= self.threshold for s in self._sigs):
+            return False
+        self._sigs.append(sig)
+        return True
+
+
+def _chunks(n: int, per_request: int) -> List[int]:
+    count = max(1, math.ceil(n / per_request))
+    base, extra = divmod(n, count)
+    return [base + (1 if i < extra else 0) for i in range(count)]
+
+
+def generate_variations(base_prompt_en: str, n: int, api_key: str, model: str,
+                        base_fields: Optional[Dict[str, str]] = None,
+                        per_request: int = VARIATIONS_PER_REQUEST,
+                        priority: int = PRIORITY_USER, top_up: bool = True,
+                        on_batch: Optional[Callable[[List[Dict[str, str]]], None]] = None) -> VariationResult:
+    """
+    Hasilkan hingga `n` variasi unik sebagai record FIELD_KEYS. Request dikirim
+    bersamaan; `on_batch` dipanggil (di thread pemanggil) setiap satu respons
+    selesai diproses, dengan seluruh variasi unik sejauh ini. Bila dedupe atau
+    request gagal menyisakan kurang dari `n`, satu putaran susulan diminta.
+    """
+    n = max(1, min(int(n), MAX_VARIATIONS))
+    start = time.perf_counter()
+    deduper = VariantDeduper()
+    if base_fields:
+        deduper.add(base_fields)  # variasi yang sama dengan aslinya juga dibuang
+    records: List[Dict[str, str]] = []
+    errors: List[Exception] = []
+    duplicates = 0
+    sent = 0
+    # Batch berjalan di pool latar belakang agar tidak menahan panggilan pengguna
+    background = priority >= PRIORITY_BACKGROUND
+    submit, workers = (submit_background, BACKGROUND_WORKERS) if background else (submit_call, MAX_WORKERS)
+
+    for _ in range(2 if top_up else 1):
+        want = n - len(records)
+        if want <= 0:
+            break
+        sizes = _chunks(want, per_request)
+        futures = {}
+        for i, size in enumerate(sizes):
+            prompt = build_variations_prompt(base_prompt_en, size, DIVERSITY_HINTS[(sent + i) % len(DIVERSITY_HINTS)])
+            futures[submit(lambda p=prompt: _call_gemini(p, model, api_key, priority=priority))] = size
+        sent += len(sizes)
+        # Batas waktu per putaran: request di atas jumlah worker menunggu giliran di pool
+        deadline = DEFAULT_TIMEOUT * math.ceil(len(sizes) / workers)
+        try:
+            for fut in as_completed(futures, timeout=deadline):
+                try:
+                    variants = parse_variants(fut.result())
+                except Exception as e:
+                    errors.append(e)
+                    continue
+                for fields in variants[:futures[fut]]:
+                    if len(records) >= n:
+                        break
+                    if deduper.add(fields):
+                        records.append(fields)
+                    else:
+                        duplicates += 1
+                if on_batch is not None:
+                    on_batch(records)
+        except FutureTimeout:
+            for fut in futures:
+                fut.cancel()  # yang sudah berjalan tetap selesai; hasilnya diabaikan
+            errors.append(Exception(f"❌ **Waktu habis** setelah {deadline:g} detik. Sebagian variasi tidak diterima."))
+            break
+        if errors and not records:
+            break  # semua gagal (mis. kunci salah): jangan ulangi putaran
+    return VariationResult(records, duplicates, errors, sent, time.perf_counter() - start)
+
+
+def render_variations(records: List[Dict[str, str]], toggles: Dict[str, bool]) -> str:
+    """Teks gabungan untuk panel/unduhan: satu blok compose_prompt per variasi."""
+    texts = compose_many(records, toggles, lang="EN")
+    return "\n\n".join(f"### Variation {i} ###\n{text}" for i, text in enumerate(texts, 1))
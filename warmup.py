@@ -0,0 +1,162 @@
+# warmup.py — pekerjaan mahal sekali per proses, sebelum request pengguna pertama
+#
+# streamlit_app.py memanggil start_background_warmup() pada rerun pertama proses:
+# import SDK Gemini, pack template, cache terjemahan, tabel frasa dan composer
+# disiapkan di thread latar sehingga render pertama tidak menunggu, dan klik
+# pertama tidak menanggung import google.genai.
+#
+#   python warmup.py                 # jalankan warm-up dan cetak waktu tiap langkah
+#   python warmup.py --importtime    # rincian ala `python -X importtime` per paket
+import argparse
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+_lock = threading.Lock()
+_thread: Optional[threading.Thread] = None
+_report: Dict[str, float] = {}
+
+
+def _steps(api_key: str) -> List[Tuple[str, Callable[[], object]]]:
+    # Import di dalam fungsi: yang diukur justru biaya import modul-modul ini
+    def sdk():
+        import gemini_client
+        return gemini_client.detect_backend()
+
+    def client():
+        import gemini_client
+        from gemini_router import parse_keys
+        if api_key and gemini_client.detect_backend() == "genai":
+            for key, _ in parse_keys(api_key):
+                gemini_client.get_client(key)
+
+    def presets():
+        from preset_library import get_preset_library
+        return get_preset_library()
+
+    def cache():
+        from translation_cache import get_translation_cache
+        return get_translation_cache()
+
+    def phrase_table():
+        from phrase_translator import get_phrase_table
+        return get_phrase_table()
+
+    def history():
+        from prompt_history import get_prompt_history
+        return get_prompt_history()
+
+    def style_table():
+        from style_suggest import get_style_suggester
+        return get_style_suggester()
+
+    def composers():
+        import prompt_core
+        for lang in prompt_core.COMPOSE_LANGS:
+            prompt_core.get_composer(lang)
+
+    return [
+        ("prompt_core", lambda: __import__("prompt_core")),
+        ("gemini_sdk", sdk),
+        ("gemini_client", client),
+        ("presets", presets),
+        ("translation_cache", cache),
+        ("phrase_table", phrase_table),
+        ("style_table", style_table),
+        ("history", history),
+        ("composers", composers),
+    ]
+
+
+def warm_up(api_key: str = "") -> Dict[str, float]:
+    """Jalankan semua langkah; kembalikan detik per langkah. Kegagalan satu langkah tidak menghentikan yang lain."""
+    report: Dict[str, float] = {}
+    for name, step in _steps(api_key):
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            report[name + " (gagal)"] = time.perf_counter() - start
+            continue
+        report[name] = time.perf_counter() - start
+    return report
+
+
+def start_background_warmup(api_key: str = "") -> None:
+    """Sekali per proses; rerun berikutnya (sesi mana pun) tidak memulai ulang."""
+    global _thread
+
+    def run():
+        _report.update(warm_up(api_key))
+
+    with _lock:
+        if _thread is None:
+            _thread = threading.Thread(target=run, name="warmup", daemon=True)
+            _thread.start()
+
+
+def last_report() -> Dict[str, float]:
+    """Hasil warm-up proses ini (kosong selama masih berjalan)."""
+    return dict(_report) if _thread is not None and not _thread.is_alive() else {}
+
+
+# -------------------------------
+# Audit waktu import
+# -------------------------------
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+def import_times(code: str) -> List[Tuple[str, int, int, int]]:
+    """Jalankan `code` di interpreter baru dengan -X importtime; (modul, self µs, kumulatif µs, kedalaman)."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=os.path.dirname(os.path.abspath(__file__)),
+                          capture_output=True, text=True)
+    rows = []
+    for line in proc.stderr.splitlines():
+        m = _IMPORTTIME.match(line)
+        if m:
+            rows.append((m.group(4), int(m.group(1)), int(m.group(2)), len(m.group(3)) // 2))
+    return rows
+
+
+def importtime_report(with_streamlit: bool = True, top: int = 15) -> str:
+    code = "import warmup; warmup.warm_up()"
+    if with_streamlit:
+        code = "import streamlit, dotenv; " + code
+    rows = import_times(code)
+    by_package: Dict[str, int] = {}
+    for name, self_us, _, _ in rows:
+        root = name.split(".", 1)[0]
+        by_package[root] = by_package.get(root, 0) + self_us
+    total = sum(by_package.values())
+    lines = [f"Total import: {total / 1000:.1f} ms ({len(rows)} modul)", "", "Per paket (self):"]
+    for root, us in sorted(by_package.items(), key=lambda kv: -kv[1])[:top]:
+        lines.append(f"  {root:<28} {us / 1000:8.1f} ms")
+    lines += ["", "Import level atas (kumulatif):"]
+    for name, _, cum, depth in sorted((r for r in rows if r[3] == 0), key=lambda r: -r[2])[:top]:
+        lines.append(f"  {name:<28} {cum / 1000:8.1f} ms")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Warm-up proses dan audit waktu import.")
+    ap.add_argument("--importtime", action="store_true", help="Rincian waktu import di interpreter baru.")
+    ap.add_argument("--no-streamlit", action="store_true", help="Audit tanpa import streamlit.")
+    ap.add_argument("--top", type=int, default=15)
+    args = ap.parse_args(argv)
+    if args.importtime:
+        print(importtime_report(with_streamlit=not args.no_streamlit, top=args.top))
+        return 0
+    report = warm_up(os.getenv("GEMINI_API_KEYS") or os.getenv("GEMINI_API_KEY", ""))
+    for name, seconds in report.items():
+        print(f"{name:<28} {seconds * 1000:8.1f} ms")
+    print(f"{'total':<28} {sum(report.values()) * 1000:8.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())